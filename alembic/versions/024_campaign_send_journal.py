@@ -0,0 +1,70 @@
+"""Campaign send journal (campaign_sends, campaign_send_batches) for resumable sends
+
+Revision ID: 024
+Revises: 023
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision: str = "024"
+down_revision: Union[str, None] = "023"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "campaign_sends",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("campaign_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(32), nullable=False, server_default="running"),
+        sa.Column("recipient_ids", JSONB(), nullable=True),
+        sa.Column("sent_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("batch_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("last_batch_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["campaign_id"], ["campaigns.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_campaign_sends_id"), "campaign_sends", ["id"], unique=False)
+    op.create_index("ix_campaign_sends_campaign_id", "campaign_sends", ["campaign_id"], unique=False)
+
+    op.create_table(
+        "campaign_send_batches",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("send_id", sa.Integer(), nullable=False),
+        sa.Column("campaign_id", sa.Integer(), nullable=False),
+        sa.Column("batch_index", sa.Integer(), nullable=False),
+        sa.Column("subscriber_ids", JSONB(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["send_id"], ["campaign_sends.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["campaign_id"], ["campaigns.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_campaign_send_batches_id"), "campaign_send_batches", ["id"], unique=False)
+    op.create_index("ix_campaign_send_batches_send_id", "campaign_send_batches", ["send_id"], unique=False)
+
+    # Sends skip subscribers already recorded for the campaign (resume / crash recovery)
+    op.create_index(
+        "ix_campaign_recipients_campaign_subscriber",
+        "campaign_recipients",
+        ["campaign_id", "subscriber_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_campaign_recipients_campaign_subscriber", table_name="campaign_recipients")
+    op.drop_index("ix_campaign_send_batches_send_id", table_name="campaign_send_batches")
+    op.drop_index(op.f("ix_campaign_send_batches_id"), table_name="campaign_send_batches")
+    op.drop_table("campaign_send_batches")
+    op.drop_index("ix_campaign_sends_campaign_id", table_name="campaign_sends")
+    op.drop_index(op.f("ix_campaign_sends_id"), table_name="campaign_sends")
+    op.drop_table("campaign_sends")
@@ -0,0 +1,38 @@
+"""Campaign send jobs: queued status, progress counters, queue timestamp
+
+Revision ID: 025
+Revises: 024
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "025"
+down_revision: Union[str, None] = "024"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("campaign_sends", sa.Column("total_count", sa.Integer(), nullable=True))
+    op.add_column("campaign_sends", sa.Column("failed_count", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column(
+        "campaign_sends",
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+    )
+    op.alter_column("campaign_sends", "status", server_default="queued")
+    # started_at is now set by the worker when it picks the job up
+    op.alter_column("campaign_sends", "started_at", server_default=None)
+    op.create_index("ix_campaign_sends_status", "campaign_sends", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_campaign_sends_status", table_name="campaign_sends")
+    op.alter_column("campaign_sends", "started_at", server_default=sa.text("now()"))
+    op.alter_column("campaign_sends", "status", server_default="running")
+    op.drop_column("campaign_sends", "created_at")
+    op.drop_column("campaign_sends", "failed_count")
+    op.drop_column("campaign_sends", "total_count")
@@ -0,0 +1,47 @@
+"""Campaign send work units: audience id ranges claimed by workers
+
+Revision ID: 026
+Revises: 025
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "026"
+down_revision: Union[str, None] = "025"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "campaign_send_units",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("send_id", sa.Integer(), nullable=False),
+        sa.Column("campaign_id", sa.Integer(), nullable=False),
+        sa.Column("start_after_id", sa.Integer(), nullable=False),
+        sa.Column("end_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(32), nullable=False, server_default="pending"),
+        sa.Column("worker", sa.String(255), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("sent_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failed_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(["send_id"], ["campaign_sends.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["campaign_id"], ["campaigns.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_campaign_send_units_id"), "campaign_send_units", ["id"], unique=False)
+    op.create_index(op.f("ix_campaign_send_units_send_id"), "campaign_send_units", ["send_id"], unique=False)
+    op.create_index("ix_campaign_send_units_status", "campaign_send_units", ["status", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_campaign_send_units_status", table_name="campaign_send_units")
+    op.drop_index(op.f("ix_campaign_send_units_send_id"), table_name="campaign_send_units")
+    op.drop_index(op.f("ix_campaign_send_units_id"), table_name="campaign_send_units")
+    op.drop_table("campaign_send_units")
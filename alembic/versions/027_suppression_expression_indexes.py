@@ -0,0 +1,45 @@
+"""Expression indexes for suppression anti-joins on normalized email and domain
+
+Revision ID: 027
+Revises: 026
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "027"
+down_revision: Union[str, None] = "026"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Probe side: suppression_list looked up by (type, lower(value)) for each candidate recipient
+    op.create_index(
+        "ix_suppression_list_type_lower_value",
+        "suppression_list",
+        ["type", sa.text("lower(value)")],
+        unique=False,
+    )
+    # Subscriber side: normalized email and its domain, so Postgres can also drive the join from the suppression list
+    op.create_index(
+        "ix_subscribers_lower_trim_email",
+        "subscribers",
+        [sa.text("lower(trim(email))")],
+        unique=False,
+    )
+    op.create_index(
+        "ix_subscribers_email_domain",
+        "subscribers",
+        [sa.text("split_part(lower(trim(email)), '@', 2)")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_subscribers_email_domain", table_name="subscribers")
+    op.drop_index("ix_subscribers_lower_trim_email", table_name="subscribers")
+    op.drop_index("ix_suppression_list_type_lower_value", table_name="suppression_list")
@@ -0,0 +1,35 @@
+"""Campaign links: one id per distinct tracked destination, carried by compact click tokens
+
+Revision ID: 028
+Revises: 027
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "028"
+down_revision: Union[str, None] = "027"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "campaign_links",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("campaign_id", sa.Integer(), nullable=False),
+        sa.Column("url", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["campaign_id"], ["campaigns.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("campaign_id", "url", name="uq_campaign_links_campaign_url"),
+    )
+    op.create_index(op.f("ix_campaign_links_id"), "campaign_links", ["id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_campaign_links_id"), table_name="campaign_links")
+    op.drop_table("campaign_links")
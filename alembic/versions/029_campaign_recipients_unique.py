@@ -0,0 +1,46 @@
+"""Unique (campaign_id, subscriber_id) on campaign_recipients: one recorded delivery per subscriber and campaign
+
+Revision ID: 029
+Revises: 028
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "029"
+down_revision: Union[str, None] = "028"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Duplicates left by racing sends: keep the earliest row of each (campaign, subscriber) pair
+    op.execute(
+        """
+        DELETE FROM campaign_recipients r
+        USING campaign_recipients keep
+        WHERE keep.campaign_id = r.campaign_id
+          AND keep.subscriber_id = r.subscriber_id
+          AND keep.id < r.id
+        """
+    )
+    # The unique index serves the same lookups as the plain one from 024, which it replaces
+    op.drop_index("ix_campaign_recipients_campaign_subscriber", table_name="campaign_recipients")
+    op.create_index(
+        "uq_campaign_recipients_campaign_subscriber",
+        "campaign_recipients",
+        ["campaign_id", "subscriber_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_campaign_recipients_campaign_subscriber", table_name="campaign_recipients")
+    op.create_index(
+        "ix_campaign_recipients_campaign_subscriber",
+        "campaign_recipients",
+        ["campaign_id", "subscriber_id"],
+        unique=False,
+    )
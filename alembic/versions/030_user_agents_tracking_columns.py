@@ -0,0 +1,110 @@
+"""User agents dictionary; typed client columns on tracking_events instead of payload keys
+
+Open/click payloads used to repeat the raw User-Agent and its three labels on every row. The backfill moves them
+into user_agents / ua_id and the typed columns and strips them from payload, in id-range batches committed one by
+one so the table is never locked as a whole. Disk space of the shrunk rows is reused by later inserts; run
+VACUUM FULL (or pg_repack) to give it back to the OS.
+
+Revision ID: 030
+Revises: 029
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "030"
+down_revision: Union[str, None] = "029"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 50_000
+
+_CLIENT_EVENTS = "event_type IN ('open', 'click')"
+
+_INSERT_USER_AGENTS = f"""
+    INSERT INTO user_agents (ua_hash, user_agent, email_client, device, environment)
+    SELECT DISTINCT ON (md5(payload->>'user_agent'))
+        md5(payload->>'user_agent'),
+        payload->>'user_agent',
+        COALESCE(payload->>'email_client', 'Other'),
+        COALESCE(payload->>'device', 'desktop'),
+        COALESCE(payload->>'environment', 'desktop')
+    FROM tracking_events
+    WHERE id >= :lo AND id < :hi AND {_CLIENT_EVENTS}
+        AND jsonb_typeof(payload) = 'object' AND COALESCE(payload->>'user_agent', '') <> ''
+    ON CONFLICT (ua_hash) DO NOTHING
+"""
+
+_MOVE_TO_COLUMNS = f"""
+    UPDATE tracking_events t SET
+        ua_id = (SELECT u.id FROM user_agents u WHERE u.ua_hash = md5(t.payload->>'user_agent')),
+        email_client = t.payload->>'email_client',
+        device = t.payload->>'device',
+        environment = t.payload->>'environment',
+        payload = NULLIF(t.payload - 'user_agent' - 'email_client' - 'device' - 'environment', '{{}}'::jsonb)
+    WHERE t.id >= :lo AND t.id < :hi AND t.{_CLIENT_EVENTS} AND jsonb_typeof(t.payload) = 'object'
+        AND t.payload ?| array['user_agent', 'email_client', 'device', 'environment']
+"""
+
+_MOVE_TO_PAYLOAD = f"""
+    UPDATE tracking_events t SET
+        payload = COALESCE(t.payload, '{{}}'::jsonb) || jsonb_strip_nulls(jsonb_build_object(
+            'user_agent', (SELECT u.user_agent FROM user_agents u WHERE u.id = t.ua_id),
+            'email_client', t.email_client,
+            'device', t.device,
+            'environment', t.environment
+        ))
+    WHERE t.id >= :lo AND t.id < :hi AND t.{_CLIENT_EVENTS}
+        AND (t.ua_id IS NOT NULL OR t.email_client IS NOT NULL OR t.device IS NOT NULL OR t.environment IS NOT NULL)
+"""
+
+
+def _in_batches(*statements: str) -> None:
+    """Run the statements over tracking_events id ranges of BATCH_SIZE, committing after each range."""
+    bind = op.get_bind()
+    lo, hi = bind.execute(sa.text("SELECT min(id), max(id) FROM tracking_events")).one()
+    if lo is None:
+        return
+    with op.get_context().autocommit_block():
+        for start in range(lo, hi + 1, BATCH_SIZE):
+            params = {"lo": start, "hi": start + BATCH_SIZE}
+            for statement in statements:
+                bind.execute(sa.text(statement), params)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_agents",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("ua_hash", sa.String(length=32), nullable=False),
+        sa.Column("user_agent", sa.Text(), nullable=False),
+        sa.Column("email_client", sa.String(length=64), nullable=False),
+        sa.Column("device", sa.String(length=16), nullable=False),
+        sa.Column("environment", sa.String(length=16), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("ua_hash"),
+    )
+    op.create_index(op.f("ix_user_agents_id"), "user_agents", ["id"], unique=False)
+    op.add_column("tracking_events", sa.Column("ua_id", sa.Integer(), nullable=True))
+    op.add_column("tracking_events", sa.Column("email_client", sa.String(length=64), nullable=True))
+    op.add_column("tracking_events", sa.Column("device", sa.String(length=16), nullable=True))
+    op.add_column("tracking_events", sa.Column("environment", sa.String(length=16), nullable=True))
+    op.create_foreign_key(
+        "tracking_events_ua_id_fkey", "tracking_events", "user_agents", ["ua_id"], ["id"], ondelete="SET NULL"
+    )
+    _in_batches(_INSERT_USER_AGENTS, _MOVE_TO_COLUMNS)
+
+
+def downgrade() -> None:
+    _in_batches(_MOVE_TO_PAYLOAD)
+    op.drop_constraint("tracking_events_ua_id_fkey", "tracking_events", type_="foreignkey")
+    op.drop_column("tracking_events", "environment")
+    op.drop_column("tracking_events", "device")
+    op.drop_column("tracking_events", "email_client")
+    op.drop_column("tracking_events", "ua_id")
+    op.drop_index(op.f("ix_user_agents_id"), table_name="user_agents")
+    op.drop_table("user_agents")
@@ -0,0 +1,126 @@
+"""Partition tracking_events by month on created_at; BRIN on created_at, composite (campaign|subscriber, event_type)
+
+The table is rebuilt: the old one is renamed to tracking_events_legacy, a range-partitioned tracking_events takes its
+place (same id sequence, primary key (id, created_at)) with one partition per month from the oldest event to
+three months ahead plus a default partition, and the rows are copied over in id-range batches, each committed on
+its own. New events go to the new table as soon as it exists. Later partitions and retention:
+app.services.tracking_partitions.
+
+Revision ID: 031
+Revises: 030
+Create Date: 2026-10-17
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision: str = "031"
+down_revision: Union[str, None] = "030"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 50_000
+MONTHS_AHEAD = 3
+
+_COLUMNS = "id, campaign_id, subscriber_id, event_type, payload, ua_id, email_client, device, environment, created_at"
+
+
+def _add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _copy_in_batches(source: str, target: str, select_columns: str) -> None:
+    """INSERT INTO target SELECT ... FROM source over id ranges of BATCH_SIZE, committing after each range."""
+    bind = op.get_bind()
+    lo, hi = bind.execute(sa.text(f"SELECT min(id), max(id) FROM {source}")).one()
+    if lo is None:
+        return
+    with op.get_context().autocommit_block():
+        for start in range(lo, hi + 1, BATCH_SIZE):
+            bind.execute(
+                sa.text(
+                    f"INSERT INTO {target} ({_COLUMNS}) SELECT {select_columns} FROM {source} "
+                    "WHERE id >= :lo AND id < :hi ORDER BY id"
+                ),
+                {"lo": start, "hi": start + BATCH_SIZE},
+            )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    op.execute("ALTER TABLE tracking_events RENAME TO tracking_events_legacy")
+    op.execute("ALTER INDEX tracking_events_pkey RENAME TO tracking_events_legacy_pkey")
+    op.drop_index("ix_tracking_events_subscriber_id", table_name="tracking_events_legacy")
+    op.drop_index("ix_tracking_events_campaign_id", table_name="tracking_events_legacy")
+
+    op.create_table(
+        "tracking_events",
+        sa.Column("id", sa.Integer(), server_default=sa.text("nextval('tracking_events_id_seq'::regclass)"), nullable=False),
+        sa.Column("campaign_id", sa.Integer(), nullable=True),
+        sa.Column("subscriber_id", sa.Integer(), nullable=True),
+        sa.Column("event_type", sa.String(32), nullable=False),
+        sa.Column("payload", JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("ua_id", sa.Integer(), nullable=True),
+        sa.Column("email_client", sa.String(length=64), nullable=True),
+        sa.Column("device", sa.String(length=16), nullable=True),
+        sa.Column("environment", sa.String(length=16), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["campaign_id"], ["campaigns.id"], name="tracking_events_campaign_id_fkey", ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["subscriber_id"], ["subscribers.id"], name="tracking_events_subscriber_id_fkey", ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["ua_id"], ["user_agents.id"], name="tracking_events_ua_id_fkey", ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id", "created_at", name="tracking_events_pkey"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.execute("ALTER SEQUENCE tracking_events_id_seq OWNED BY tracking_events.id")
+    op.create_index("ix_tracking_events_campaign_event", "tracking_events", ["campaign_id", "event_type"], unique=False)
+    op.create_index("ix_tracking_events_subscriber_event", "tracking_events", ["subscriber_id", "event_type"], unique=False)
+    op.create_index("ix_tracking_events_created_at_brin", "tracking_events", ["created_at"], unique=False, postgresql_using="brin")
+
+    now = datetime.now(timezone.utc)
+    this_month = date(now.year, now.month, 1)
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM tracking_events_legacy")).scalar()
+    if oldest is not None:
+        oldest = oldest.astimezone(timezone.utc)
+    month = min(date(oldest.year, oldest.month, 1), this_month) if oldest else this_month
+    while month <= _add_months(this_month, MONTHS_AHEAD):
+        following = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE tracking_events_p{month:%Y%m} PARTITION OF tracking_events "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{following.isoformat()} 00:00:00+00')"
+        )
+        month = following
+    op.execute("CREATE TABLE tracking_events_default PARTITION OF tracking_events DEFAULT")
+
+    _copy_in_batches(
+        "tracking_events_legacy",
+        "tracking_events",
+        _COLUMNS.replace("created_at", "COALESCE(created_at, now())"),
+    )
+    op.drop_table("tracking_events_legacy")
+
+
+def downgrade() -> None:
+    op.execute("CREATE TABLE tracking_events_unpartitioned (LIKE tracking_events INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE tracking_events_unpartitioned ALTER COLUMN created_at DROP NOT NULL")
+    _copy_in_batches("tracking_events", "tracking_events_unpartitioned", _COLUMNS)
+    op.execute("ALTER SEQUENCE tracking_events_id_seq OWNED BY tracking_events_unpartitioned.id")
+    # Drops every attached partition too; detached ones (aged out by retention) are left alone
+    op.drop_table("tracking_events")
+    op.rename_table("tracking_events_unpartitioned", "tracking_events")
+    op.create_primary_key("tracking_events_pkey", "tracking_events", ["id"])
+    op.create_foreign_key(
+        "tracking_events_campaign_id_fkey", "tracking_events", "campaigns", ["campaign_id"], ["id"], ondelete="SET NULL"
+    )
+    op.create_foreign_key(
+        "tracking_events_subscriber_id_fkey", "tracking_events", "subscribers", ["subscriber_id"], ["id"], ondelete="SET NULL"
+    )
+    op.create_foreign_key(
+        "tracking_events_ua_id_fkey", "tracking_events", "user_agents", ["ua_id"], ["id"], ondelete="SET NULL"
+    )
+    op.create_index("ix_tracking_events_subscriber_id", "tracking_events", ["subscriber_id"], unique=False)
+    op.create_index("ix_tracking_events_campaign_id", "tracking_events", ["campaign_id"], unique=False)
@@ -0,0 +1,26 @@
+"""Campaign send units: attempts counter, so a unit that keeps raising ends up failed
+
+Revision ID: 032
+Revises: 031
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "032"
+down_revision: Union[str, None] = "031"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "campaign_send_units", sa.Column("attempts", sa.Integer(), server_default="0", nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("campaign_send_units", "attempts")
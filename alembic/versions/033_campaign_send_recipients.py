@@ -0,0 +1,63 @@
+"""Campaign send recipients: explicit audiences stored once in a table instead of a JSONB id list
+
+Every chunk and unit-boundary query of a send used to inline the whole recipient_ids list; they now join this
+table. Existing lists are moved over.
+
+Revision ID: 033
+Revises: 032
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision: str = "033"
+down_revision: Union[str, None] = "032"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "campaign_send_recipients",
+        sa.Column("send_id", sa.Integer(), nullable=False),
+        sa.Column("subscriber_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["send_id"], ["campaign_sends.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("send_id", "subscriber_id"),
+    )
+    op.add_column(
+        "campaign_sends", sa.Column("recipient_filter", sa.Boolean(), server_default=sa.false(), nullable=False)
+    )
+    op.execute(
+        """
+        INSERT INTO campaign_send_recipients (send_id, subscriber_id)
+        SELECT id, (jsonb_array_elements_text(recipient_ids))::int FROM campaign_sends
+        WHERE jsonb_typeof(recipient_ids) = 'array' AND jsonb_array_length(recipient_ids) > 0
+        ON CONFLICT DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        UPDATE campaign_sends SET recipient_filter = true
+        WHERE jsonb_typeof(recipient_ids) = 'array' AND jsonb_array_length(recipient_ids) > 0
+        """
+    )
+    op.drop_column("campaign_sends", "recipient_ids")
+
+
+def downgrade() -> None:
+    op.add_column("campaign_sends", sa.Column("recipient_ids", JSONB(), nullable=True))
+    op.execute(
+        """
+        UPDATE campaign_sends s SET recipient_ids = (
+            SELECT jsonb_agg(r.subscriber_id ORDER BY r.subscriber_id)
+            FROM campaign_send_recipients r WHERE r.send_id = s.id
+        )
+        WHERE s.recipient_filter
+        """
+    )
+    op.drop_column("campaign_sends", "recipient_filter")
+    op.drop_table("campaign_send_recipients")
@@ -0,0 +1,36 @@
+"""Campaign links: unique on (campaign_id, md5(url)) instead of the raw URL
+
+A btree index entry is limited to about 2.7 KB, so the unique constraint on (campaign_id, url) rejected long
+tracked URLs. Rows are now keyed on an md5 hex column, like user_agents.ua_hash.
+
+Revision ID: 034
+Revises: 033
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "034"
+down_revision: Union[str, None] = "033"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("campaign_links", sa.Column("url_hash", sa.String(length=32), nullable=True))
+    op.execute("UPDATE campaign_links SET url_hash = md5(url)")
+    op.alter_column("campaign_links", "url_hash", nullable=False)
+    op.drop_constraint("uq_campaign_links_campaign_url", "campaign_links", type_="unique")
+    op.create_unique_constraint(
+        "uq_campaign_links_campaign_url_hash", "campaign_links", ["campaign_id", "url_hash"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_campaign_links_campaign_url_hash", "campaign_links", type_="unique")
+    # Fails if a URL too long for the old btree key was registered meanwhile
+    op.create_unique_constraint("uq_campaign_links_campaign_url", "campaign_links", ["campaign_id", "url"])
+    op.drop_column("campaign_links", "url_hash")
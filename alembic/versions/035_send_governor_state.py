@@ -0,0 +1,36 @@
+"""Send governor state: one token bucket and daily message count per provider account, shared across processes
+
+Revision ID: 035
+Revises: 034
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "035"
+down_revision: Union[str, None] = "034"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "send_governor_state",
+        sa.Column("name", sa.String(length=32), nullable=False),
+        sa.Column("tokens", sa.Float(), nullable=False),
+        sa.Column("rate", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("paused_until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("day", sa.Date(), nullable=True),
+        sa.Column("day_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("day_exhausted", sa.Boolean(), server_default=sa.false(), nullable=False),
+        sa.Column("bulk_exhausted", sa.Boolean(), server_default=sa.false(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("send_governor_state")
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -20,6 +22,38 @@ class Settings(BaseSettings):
     resend_sandbox_redirect: str = ""
     # Optional reply-to address; improves trust and reduces spam flags when set to a real address (e.g. support@yourdomain.com).
     resend_reply_to: str = ""
+    # Campaign sends: number of Resend batch requests (100 emails each) kept in flight at once.
+    campaign_send_concurrency: int = 4
+    # Processes rendering campaign emails in parallel (0 = render in the sending thread). Worth it for very large sends.
+    campaign_render_processes: int = 0
+    # A send marked running with no progress for this long is considered crashed and may be resumed.
+    campaign_send_stale_seconds: int = 300
+    # Recipients per send work unit; workers (any number, on any node) each claim one unit at a time.
+    campaign_send_unit_size: int = 5000
+    # A unit whose processing raises is retried; after this many failed attempts it, and its send, are marked failed.
+    campaign_send_max_attempts: int = 3
+    # Recipients read ahead and interleaved by domain so each batch mixes mailbox providers (0 = send in id order).
+    campaign_domain_window: int = 1000
+    # Per-domain caps in messages per minute, e.g. "gmail.com=3000,outlook.com=2000,yahoo.com=1500".
+    campaign_domain_rate_limits: str = ""
+    # Cap for every other domain, messages per minute (0 = uncapped).
+    campaign_domain_default_rate: int = 0
+    # Automation and booking emails check an in-memory suppression index; max seconds before it picks up other processes' edits.
+    suppression_refresh_seconds: int = 30
+    # Resend requests per second (Resend's default limit is 2/s; 0 = unpaced); lowered automatically on 429s.
+    resend_requests_per_second: float = 2.0
+    # Messages per UTC day handed to Resend (0 = no limit). Set to your plan's daily quota.
+    resend_messages_per_day: int = 0
+    # Keep the Resend rate, backoff and daily quota in Postgres so the API and all send workers share one account limit;
+    # False gives each process its own (then divide the limits above between processes yourself).
+    resend_governor_shared: bool = True
+    # Times a rate-limited (429) Resend request is retried before it counts as failed.
+    resend_rate_limit_retries: int = 5
+    # Transactional emails (bookings, automations) vs campaign batches: fair-queuing weight of the transactional lane,
+    # requests of burst capacity campaigns may not use, and share of RESEND_MESSAGES_PER_DAY kept for transactional.
+    resend_transactional_weight: float = 4.0
+    resend_transactional_reserve: int = 1
+    resend_transactional_daily_share: float = 0.1
 
     # CORS (comma-separated origins; include all dev ports you use, e.g. 3000, 3001)
     cors_origins: str = "http://localhost:3000,http://localhost:3001"
@@ -32,6 +66,21 @@ class Settings(BaseSettings):
     tracking_secret: str = "change-me-in-production"
     # Frontend app URL (for unsubscribe redirect and email logo). When set, unsubscribe redirects here so users see the app's confirmation page. If unset, tracking_base_url is used.
     frontend_base_url: str = ""
+    # Open/click events are queued in memory and written in multi-row batches; max events held (0 = write each inline).
+    tracking_buffer_size: int = 10000
+    # How often the tracking buffer is flushed (milliseconds), and how many queued events trigger an early flush.
+    tracking_flush_interval_ms: int = 500
+    tracking_flush_batch: int = 500
+    # When the tracking buffer is full: "inline" writes the event in the request, "drop" discards it (counted).
+    tracking_buffer_overflow: str = "inline"
+    # tracking_events has one partition per month; the maintenance job creates them this many months ahead.
+    tracking_partition_months_ahead: int = 3
+    # Partitions whose month ended more than this many months before the current one are aged out; 0 keeps all.
+    tracking_retention_months: int = 0
+    # How old partitions are aged out: "detach" keeps them as standalone tables (archive, then drop), "drop" deletes.
+    tracking_retention_mode: str = "detach"
+    # X-API-Key required by GET /metrics on the tracking app (and /t/metrics); unset = /metrics is not served.
+    metrics_api_key: str = ""
 
     # Google Calendar OAuth (for calendar sync / busy detection)
     google_client_id: str = ""
@@ -47,6 +96,10 @@ class Settings(BaseSettings):
     twilio_auth_token: str = ""
     # WhatsApp sender number with whatsapp: prefix (e.g. whatsapp:+14155238886 for sandbox).
     twilio_whatsapp_from: str = ""
+    # WhatsApp campaign sends: Twilio requests kept in flight at once.
+    whatsapp_send_concurrency: int = 16
+    # Messages per second for the WhatsApp sender (Twilio's default per-sender throughput is 80; sandbox is far lower).
+    whatsapp_messages_per_second: float = 40.0
 
     @field_validator("debug", mode="before")
     @classmethod
@@ -60,5 +113,7 @@ class Settings(BaseSettings):
         return value
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
+    """Settings from the environment and .env, read once per process (restart to pick up changes)."""
     return Settings()
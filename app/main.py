@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -6,10 +7,21 @@ from fastapi.responses import FileResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.config import get_settings
-from app.routers import subscribers, campaigns, automations, dashboard, workers, webhooks, segments, event_types, bookings, team_members, booking_profile, calendar, public_booking, tracking, audit, groups, tags, suppression, forms, unsubscribe, inbound, fields as subscriber_fields
+from app.services.tracking_buffer import tracking_buffer
+from app.tracking_app import tracking_app
+from app.routers import subscribers, campaigns, automations, dashboard, workers, webhooks, segments, event_types, bookings, team_members, booking_profile, calendar, public_booking, audit, groups, tags, suppression, forms, unsubscribe, inbound, fields as subscriber_fields
 
 settings = get_settings()
-app = FastAPI(title="Klarnow mailing tool", version="0.1.0")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Write open/click events still waiting in the tracking buffer before the process exits
+    tracking_buffer.close()
+
+
+app = FastAPI(title="Klarnow mailing tool", version="0.1.0", lifespan=lifespan)
 
 # Allow both common Next.js dev ports so OPTIONS preflight succeeds from either
 _origins = [o.strip() for o in settings.cors_origins.split(",") if o.strip()]
@@ -39,11 +51,13 @@ app.include_router(booking_profile.router, prefix="/api/booking-profile", tags=[
 app.include_router(calendar.router, prefix="/api/calendar", tags=["calendar"])
 app.include_router(public_booking.router, prefix="/api/public", tags=["public-booking"])
 app.include_router(audit.router, prefix="/api/audit-logs", tags=["audit"])
-app.include_router(tracking.router, tags=["tracking"])
 app.include_router(unsubscribe.router, prefix="/api", tags=["unsubscribe"])
 app.include_router(inbound.router, prefix="/api/inbound", tags=["inbound"])
 app.include_router(subscriber_fields.router, prefix="/api/fields", tags=["fields"])
 
+# Open/click tracking: a lightweight ASGI app (see app/tracking_app.py), also runnable as its own process
+app.mount("/t", tracking_app)
+
 
 # Uploaded campaign images (create dir and mount before other routes that might catch /uploads)
 _uploads_dir = Path(__file__).resolve().parent.parent / "uploads"
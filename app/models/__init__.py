@@ -1,10 +1,10 @@
 from app.database import Base
 from app.models.subscriber import Subscriber
-from app.models.campaign import Campaign, CampaignRecipient
+from app.models.campaign import Campaign, CampaignLink, CampaignRecipient, CampaignSend, CampaignSendBatch, CampaignSendRecipient, CampaignSendUnit
 from app.models.automation import Automation, AutomationStep, AutomationRun, PendingAutomationDelay, AutomationVersion
 from app.models.event_bus import Event, WebhookSubscription
 from app.models.activity import ActivityLog, SystemAlert
-from app.models.tracking import TrackingEvent, SubscriberActivity
+from app.models.tracking import TrackingEvent, SubscriberActivity, UserAgent
 from app.models.segment import Segment
 from app.models.group import Group, SubscriberGroup
 from app.models.tag import Tag, SubscriberTag
@@ -14,12 +14,18 @@ from app.models.booking import EventType, TeamMember, Booking, Availability
 from app.models.booking_profile import BookingProfile
 from app.models.audit_log import AuditLog
 from app.models.subscriber_field import SubscriberFieldDefinition
+from app.models.send_governor import SendGovernorState
 
 __all__ = [
     "Base",
     "Subscriber",
     "Campaign",
     "CampaignRecipient",
+    "CampaignSend",
+    "CampaignSendBatch",
+    "CampaignLink",
+    "CampaignSendUnit",
+    "CampaignSendRecipient",
     "Automation",
     "AutomationStep",
     "AutomationRun",
@@ -31,6 +37,7 @@ __all__ = [
     "SystemAlert",
     "TrackingEvent",
     "SubscriberActivity",
+    "UserAgent",
     "Segment",
     "Group",
     "SubscriberGroup",
@@ -47,4 +54,5 @@ __all__ = [
     "BookingProfile",
     "AuditLog",
     "SubscriberFieldDefinition",
+    "SendGovernorState",
 ]
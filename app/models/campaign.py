@@ -1,5 +1,6 @@
 import enum
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Column, DateTime, Enum, ForeignKey, Index, Integer, String, Text, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -40,6 +41,8 @@ class Campaign(Base):
 
 class CampaignRecipient(Base):
     __tablename__ = "campaign_recipients"
+    # One recorded delivery per subscriber and campaign; retried or concurrent chunks insert with ON CONFLICT DO NOTHING
+    __table_args__ = (Index("uq_campaign_recipients_campaign_subscriber", "campaign_id", "subscriber_id", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     campaign_id = Column(Integer, ForeignKey("campaigns.id", ondelete="CASCADE"), nullable=False)
@@ -49,3 +52,85 @@ class CampaignRecipient(Base):
 
     campaign = relationship("Campaign", back_populates="recipients")
     subscriber = relationship("Subscriber", back_populates="campaign_recipients")
+
+
+class CampaignSend(Base):
+    """A campaign send job: queued by the API, executed by a worker; a resume re-queues the same row."""
+    __tablename__ = "campaign_sends"
+
+    id = Column(Integer, primary_key=True, index=True)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(String(32), default="queued", nullable=False)  # queued | running | failed | completed
+    # True when the send was started for an explicit list of subscribers (rows in campaign_send_recipients)
+    recipient_filter = Column(Boolean, default=False, nullable=False)
+    total_count = Column(Integer, nullable=True)  # audience size, counted by the worker that starts the send
+    sent_count = Column(Integer, default=0, nullable=False)
+    failed_count = Column(Integer, default=0, nullable=False)  # skipped: suppressed or undeliverable
+    batch_count = Column(Integer, default=0, nullable=False)
+    error_message = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    last_batch_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    batches = relationship("CampaignSendBatch", back_populates="send", cascade="all, delete-orphan")
+    units = relationship("CampaignSendUnit", back_populates="send", cascade="all, delete-orphan")
+
+
+class CampaignSendRecipient(Base):
+    """Audience of a send started for explicit recipients: stored once, joined by every chunk query of the send."""
+    __tablename__ = "campaign_send_recipients"
+
+    send_id = Column(Integer, ForeignKey("campaign_sends.id", ondelete="CASCADE"), primary_key=True)
+    subscriber_id = Column(Integer, primary_key=True)
+
+
+class CampaignSendBatch(Base):
+    """Send journal: one row per chunk accepted by the provider, written in the same transaction as its recipient rows."""
+    __tablename__ = "campaign_send_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    send_id = Column(Integer, ForeignKey("campaign_sends.id", ondelete="CASCADE"), nullable=False, index=True)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id", ondelete="CASCADE"), nullable=False)
+    batch_index = Column(Integer, nullable=False)
+    subscriber_ids = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    send = relationship("CampaignSend", back_populates="batches")
+
+
+class CampaignSendUnit(Base):
+    """
+    Work unit of a send: the audience slice with subscriber id in (start_after_id, end_id]. Workers claim units with
+    FOR UPDATE SKIP LOCKED, so each slice is sent by exactly one worker; heartbeat_at advances with every chunk.
+    """
+    __tablename__ = "campaign_send_units"
+
+    id = Column(Integer, primary_key=True, index=True)
+    send_id = Column(Integer, ForeignKey("campaign_sends.id", ondelete="CASCADE"), nullable=False, index=True)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id", ondelete="CASCADE"), nullable=False)
+    start_after_id = Column(Integer, nullable=False)
+    end_id = Column(Integer, nullable=False)
+    status = Column(String(32), nullable=False, default="pending")  # pending | running | done | failed
+    worker = Column(String(255), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    sent_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")  # failed attempts (exceptions)
+    error_message = Column(Text, nullable=True)
+
+    send = relationship("CampaignSend", back_populates="units")
+
+
+class CampaignLink(Base):
+    """A distinct tracked destination of a campaign; click tokens carry its id instead of the full URL."""
+    __tablename__ = "campaign_links"
+    # Keyed on md5(url): a btree entry holds at most ~2.7 KB, and long tracked URLs are common
+    __table_args__ = (UniqueConstraint("campaign_id", "url_hash", name="uq_campaign_links_campaign_url_hash"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id", ondelete="CASCADE"), nullable=False)
+    url = Column(Text, nullable=False)
+    url_hash = Column(String(32), nullable=False)  # md5 hex of url, same as Postgres md5(url)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
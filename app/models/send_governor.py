@@ -0,0 +1,21 @@
+from sqlalchemy import Boolean, Column, Date, DateTime, Float, Integer, String
+
+from app.database import Base
+
+
+class SendGovernorState(Base):
+    """
+    Token bucket and daily message count of one provider account, shared by every process that sends through it
+    (app.services.shared_send_governor). One row per account, updated under a row lock on each admission.
+    """
+    __tablename__ = "send_governor_state"
+
+    name = Column(String(32), primary_key=True)  # e.g. "resend"
+    tokens = Column(Float, nullable=False)
+    rate = Column(Float, nullable=False)  # current requests/sec, lowered on 429s and raised back on successes
+    updated_at = Column(DateTime(timezone=True), nullable=False)  # when tokens was last refilled
+    paused_until = Column(DateTime(timezone=True), nullable=True)  # Retry-After of the last 429
+    day = Column(Date, nullable=True)  # UTC day day_count belongs to
+    day_count = Column(Integer, default=0, nullable=False)
+    day_exhausted = Column(Boolean, default=False, nullable=False)
+    bulk_exhausted = Column(Boolean, default=False, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -6,15 +6,43 @@ from sqlalchemy.sql import func
 from app.database import Base
 
 
+class UserAgent(Base):
+    """A distinct User-Agent header seen by open/click tracking; events reference it by id instead of repeating it."""
+    __tablename__ = "user_agents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ua_hash = Column(String(32), nullable=False, unique=True)  # md5 of user_agent (headers can exceed a btree entry)
+    user_agent = Column(Text, nullable=False)
+    email_client = Column(String(64), nullable=False)
+    device = Column(String(16), nullable=False)
+    environment = Column(String(16), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class TrackingEvent(Base):
+    """
+    Range-partitioned by month on created_at (app.services.tracking_partitions creates and ages out partitions),
+    so the primary key has to include created_at.
+    """
     __tablename__ = "tracking_events"
+    __table_args__ = (
+        Index("ix_tracking_events_campaign_event", "campaign_id", "event_type"),
+        Index("ix_tracking_events_subscriber_event", "subscriber_id", "event_type"),
+        Index("ix_tracking_events_created_at_brin", "created_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     campaign_id = Column(Integer, ForeignKey("campaigns.id", ondelete="SET NULL"), nullable=True)
     subscriber_id = Column(Integer, ForeignKey("subscribers.id", ondelete="SET NULL"), nullable=True)
     event_type = Column(String(32), nullable=False)
-    payload = Column(JSONB, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    payload = Column(JSONB, nullable=True)  # event-specific extras only, e.g. {"url": ...} for clicks
+    # Open/click client labels, parsed from the User-Agent when the event is written
+    ua_id = Column(Integer, ForeignKey("user_agents.id", ondelete="SET NULL"), nullable=True)
+    email_client = Column(String(64), nullable=True)
+    device = Column(String(16), nullable=True)
+    environment = Column(String(16), nullable=True)
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
 
 
 class SubscriberActivity(Base):
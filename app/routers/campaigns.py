@@ -1,6 +1,6 @@
 import uuid
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
 from fastapi.responses import Response
@@ -9,12 +9,19 @@ from sqlalchemy.orm import Session
 
 from app.config import get_settings
 from app.database import get_db
-from app.models.campaign import Campaign, CampaignRecipient, CampaignStatus
+from app.models.campaign import Campaign, CampaignRecipient, CampaignSend, CampaignStatus
 from app.models.segment import Segment
 from app.models.subscriber import Subscriber, SubscriberStatus
 from app.models.tracking import TrackingEvent
-from app.schemas.campaign import CampaignCreate, CampaignUpdate, CampaignResponse, CampaignSendRequest
-from app.services.campaign_service import send_campaign
+from app.schemas.campaign import (
+    CampaignCreate,
+    CampaignUpdate,
+    CampaignPreflightResponse,
+    CampaignResponse,
+    CampaignSendJobResponse,
+    CampaignSendRequest,
+)
+from app.services.campaign_service import enqueue_campaign_send, preflight_campaign_send, requeue_campaign_send
 from app.services.segment_service import evaluate_segment
 
 router = APIRouter()
@@ -212,15 +219,31 @@ def delete_campaign(campaign_id: int, db: Session = Depends(get_db)):
     return Response(status_code=204)
 
 
-@router.post("/{campaign_id}/send")
-def send_campaign_endpoint(
-    campaign_id: int,
-    body: CampaignSendRequest,
-    db: Session = Depends(get_db),
-):
-    campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
-    if not campaign:
-        raise HTTPException(status_code=404, detail="Campaign not found")
+def _send_job_response(send: CampaignSend) -> CampaignSendJobResponse:
+    remaining = None
+    if send.total_count is not None:
+        remaining = max(send.total_count - send.sent_count - send.failed_count, 0)
+    throughput = None
+    if send.started_at and send.last_batch_at and send.last_batch_at > send.started_at:
+        throughput = round(send.sent_count / (send.last_batch_at - send.started_at).total_seconds(), 1)
+    return CampaignSendJobResponse(
+        job_id=send.id,
+        campaign_id=send.campaign_id,
+        status=send.status,
+        total=send.total_count,
+        sent=send.sent_count,
+        failed=send.failed_count,
+        remaining=remaining,
+        throughput_per_sec=throughput,
+        error_message=send.error_message,
+        created_at=send.created_at,
+        started_at=send.started_at,
+        finished_at=send.finished_at,
+    )
+
+
+def _resolve_recipient_ids(db: Session, body: CampaignSendRequest) -> Optional[List[int]]:
+    """Explicit recipient ids narrowed by segment / exclude segment; None means all active subscribers."""
     recipient_ids = body.recipient_ids if body.recipient_ids else None
     if body.segment_id is not None:
         seg = db.query(Segment).filter(Segment.id == body.segment_id).first()
@@ -240,10 +263,78 @@ def send_campaign_endpoint(
             else:
                 all_active = [r[0] for r in db.query(Subscriber.id).filter(Subscriber.status == SubscriberStatus.active).all()]
                 recipient_ids = [i for i in all_active if i not in exclude_ids]
-    sent, err = send_campaign(db, campaign, recipient_ids)
+    return recipient_ids
+
+
+@router.post("/{campaign_id}/preflight", response_model=CampaignPreflightResponse)
+def preflight_campaign_endpoint(
+    campaign_id: int,
+    body: CampaignSendRequest,
+    db: Session = Depends(get_db),
+):
+    """How many recipients a send with this body would reach after the suppression list, without rendering anything."""
+    campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return preflight_campaign_send(db, campaign, _resolve_recipient_ids(db, body))
+
+
+@router.post("/{campaign_id}/send", status_code=202)
+def send_campaign_endpoint(
+    campaign_id: int,
+    body: CampaignSendRequest,
+    db: Session = Depends(get_db),
+):
+    campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    send, err = enqueue_campaign_send(db, campaign, _resolve_recipient_ids(db, body))
+    if err:
+        raise HTTPException(status_code=400, detail=err)
+    # total is None until the worker has counted the audience; poll the send job for it
+    return {
+        "job_id": send.id,
+        "status": send.status,
+        "total": send.total_count,
+        "message": f"Campaign queued (job {send.id})",
+    }
+
+
+@router.post("/{campaign_id}/resume", status_code=202)
+def resume_campaign_endpoint(campaign_id: int, db: Session = Depends(get_db)):
+    """Re-queue an interrupted send (provider failure or crash). Recipients already sent are skipped."""
+    campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    send, err = requeue_campaign_send(db, campaign)
     if err:
         raise HTTPException(status_code=400, detail=err)
-    return {"sent": sent, "message": f"Campaign sent to {sent} subscribers"}
+    return {"job_id": send.id, "status": send.status, "message": "Campaign send queued to resume"}
+
+
+@router.get("/{campaign_id}/send-jobs", response_model=List[CampaignSendJobResponse])
+def list_send_jobs(campaign_id: int, db: Session = Depends(get_db)):
+    """Send jobs for a campaign, newest first."""
+    sends = (
+        db.query(CampaignSend)
+        .filter(CampaignSend.campaign_id == campaign_id)
+        .order_by(CampaignSend.id.desc())
+        .all()
+    )
+    return [_send_job_response(s) for s in sends]
+
+
+@router.get("/{campaign_id}/send-jobs/{job_id}", response_model=CampaignSendJobResponse)
+def get_send_job(campaign_id: int, job_id: int, db: Session = Depends(get_db)):
+    """Progress of a send job: sent, failed and remaining counts plus throughput."""
+    send = (
+        db.query(CampaignSend)
+        .filter(CampaignSend.id == job_id, CampaignSend.campaign_id == campaign_id)
+        .first()
+    )
+    if not send:
+        raise HTTPException(status_code=404, detail="Send job not found")
+    return _send_job_response(send)
 
 
 @router.get("/{campaign_id}/non-opener-subscriber-ids")
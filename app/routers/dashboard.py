@@ -256,11 +256,18 @@ def get_overview(db: Session = Depends(get_db)) -> Any:
 
     # Campaign performance: emails_sent = count of recipient records with sent_at
     emails_sent = db.query(CampaignRecipient).filter(CampaignRecipient.sent_at.isnot(None)).count()
-    delivered = db.query(TrackingEvent).filter(TrackingEvent.event_type == "delivered").count()
-    opens = db.query(TrackingEvent).filter(TrackingEvent.event_type == "open").count()
-    clicks = db.query(TrackingEvent).filter(TrackingEvent.event_type == "click").count()
-    unsubscribes = db.query(TrackingEvent).filter(TrackingEvent.event_type == "unsubscribe").count()
-    spam = db.query(TrackingEvent).filter(TrackingEvent.event_type == "spam_complaint").count()
+    # Tracking event counts in one pass over tracking_events
+    event_counts = dict(
+        db.query(TrackingEvent.event_type, func.count(TrackingEvent.id))
+        .filter(TrackingEvent.event_type.in_(["delivered", "open", "click", "unsubscribe", "spam_complaint"]))
+        .group_by(TrackingEvent.event_type)
+        .all()
+    )
+    delivered = event_counts.get("delivered", 0)
+    opens = event_counts.get("open", 0)
+    clicks = event_counts.get("click", 0)
+    unsubscribes = event_counts.get("unsubscribe", 0)
+    spam = event_counts.get("spam_complaint", 0)
     if delivered == 0 and emails_sent > 0:
         delivered = emails_sent  # assume delivered = sent when no tracking yet
 
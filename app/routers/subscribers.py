@@ -194,21 +194,27 @@ def get_subscriber_stats(
     unique_openers = len(open_counts_q)
     read_never = max(0, total_active - unique_openers)
 
-    # Top email clients and reading environment (from open/click events in period with payload)
+    # Top email clients and reading environment (open/click events in period, grouped in SQL)
     client_counter: Counter = Counter()
     environment_counter: Counter = Counter()
-    for evt in (
-        db.query(TrackingEvent.payload)
-        .filter(
-            TrackingEvent.event_type.in_(["open", "click"]),
-            TrackingEvent.created_at >= period_start,
-        )
+    client_events = (
+        TrackingEvent.event_type.in_(["open", "click"]),
+        TrackingEvent.created_at >= period_start,
+    )
+    for client, n in (
+        db.query(TrackingEvent.email_client, func.count(TrackingEvent.id))
+        .filter(*client_events)
+        .group_by(TrackingEvent.email_client)
+        .all()
+    ):
+        client_counter[client or "Unknown"] += n
+    for environment, n in (
+        db.query(TrackingEvent.environment, func.count(TrackingEvent.id))
+        .filter(*client_events)
+        .group_by(TrackingEvent.environment)
         .all()
     ):
-        p = evt[0] if isinstance(evt, (list, tuple)) else evt
-        if p and isinstance(p, dict):
-            client_counter[p.get("email_client") or "Unknown"] += 1
-            environment_counter[p.get("environment") or "desktop"] += 1
+        environment_counter[environment or "desktop"] += n
 
     top_email_clients = [{"client": c, "count": n} for c, n in client_counter.most_common(5)]
     reading_environment = [
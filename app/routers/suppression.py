@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.suppression import SuppressionEntry, SuppressionType
 from app.schemas.suppression import SuppressionCreate, SuppressionResponse
+from app.services.suppression_index import suppression_index
 
 router = APIRouter()
 
@@ -42,6 +43,7 @@ def add_suppression(body: SuppressionCreate, db: Session = Depends(get_db)):
     db.add(entry)
     db.commit()
     db.refresh(entry)
+    suppression_index.invalidate()
     return entry
 
 
@@ -52,4 +54,5 @@ def remove_suppression(entry_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Suppression entry not found")
     db.delete(entry)
     db.commit()
+    suppression_index.invalidate()
     return None
@@ -1,6 +1,7 @@
 # Internal/cron endpoints for background processing.
 # Call from a scheduler (e.g. cron) to process queued work.
 
+import os
 from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends
@@ -10,8 +11,9 @@ from app.database import get_db
 from app.models.booking import Booking, BookingReminder, BookingStatus, EventType
 from app.models.campaign import Campaign, CampaignStatus
 from app.services.automation_service import process_due_automation_delays
-from app.services.booking_confirmation import send_booking_reminder_email
-from app.services.campaign_service import send_campaign
+from app.services.booking_confirmation import EmailOutcome, send_booking_reminder_email
+from app.services.campaign_service import enqueue_campaign_send, process_campaign_send_queue
+from app.services.tracking_partitions import maintain_partitions
 
 router = APIRouter()
 
@@ -35,6 +37,7 @@ def process_booking_reminders(max_processed: int = 100, db: Session = Depends(ge
         .all()
     )
     sent = 0
+    skipped = 0
     for rem in rows:
         booking = db.query(Booking).filter(Booking.id == rem.booking_id).first()
         if not booking or booking.status in (BookingStatus.cancelled,):
@@ -45,7 +48,7 @@ def process_booking_reminders(max_processed: int = 100, db: Session = Depends(ge
             rem.sent_at = now
             continue
         if rem.channel == "email":
-            ok = send_booking_reminder_email(
+            outcome = send_booking_reminder_email(
                 attendee_email=booking.attendee_email,
                 attendee_name=booking.attendee_name or "",
                 event_name=et.name,
@@ -54,16 +57,20 @@ def process_booking_reminders(max_processed: int = 100, db: Session = Depends(ge
                 location=getattr(et, "location_link", None) or "",
                 minutes_before=rem.minutes_before,
             )
-            if ok:
+            if outcome == EmailOutcome.sent:
                 rem.sent_at = now
                 sent += 1
+            elif outcome == EmailOutcome.skipped:
+                # Suppressed attendee: never going to be sent, so take it out of the due set
+                rem.sent_at = now
+                skipped += 1
     db.commit()
-    return {"processed": len(rows), "sent": sent}
+    return {"processed": len(rows), "sent": sent, "skipped": skipped}
 
 
 @router.post("/process-scheduled-campaigns")
 def process_scheduled_campaigns(max_processed: int = 10, db: Session = Depends(get_db)):
-    """Send draft campaigns whose scheduled_at is in the past. Call periodically (e.g. every minute)."""
+    """Queue draft campaigns whose scheduled_at is in the past. Call periodically (e.g. every minute)."""
     now = datetime.now(timezone.utc)
     campaigns = (
         db.query(Campaign)
@@ -76,9 +83,22 @@ def process_scheduled_campaigns(max_processed: int = 10, db: Session = Depends(g
         .limit(max_processed)
         .all()
     )
-    sent_total = 0
+    queued = 0
     for campaign in campaigns:
-        sent, err = send_campaign(db, campaign, recipient_ids=None)
+        send, err = enqueue_campaign_send(db, campaign, recipient_ids=None)
         if not err:
-            sent_total += sent
-    return {"processed": len(campaigns), "sent_total": sent_total}
+            queued += 1
+    return {"processed": len(campaigns), "queued": queued}
+
+
+@router.post("/process-campaign-sends")
+def process_campaign_sends(max_units: int = 1, db: Session = Depends(get_db)):
+    """Start queued campaign sends and work up to max_units send units. Prefer the dedicated worker (scripts/campaign_send_worker.py) for large lists."""
+    count = process_campaign_send_queue(db, worker=f"api:{os.getpid()}", max_units=max_units)
+    return {"processed": count}
+
+
+@router.post("/maintain-tracking-partitions")
+def maintain_tracking_partitions(db: Session = Depends(get_db)):
+    """Create upcoming monthly tracking_events partitions and age out old ones (TRACKING_RETENTION_MONTHS). Call daily."""
+    return maintain_partitions(db)
@@ -56,3 +56,25 @@ class CampaignSendRequest(BaseModel):
     recipient_ids: Optional[List[int]] = None  # None or empty = all active subscribers
     segment_id: Optional[int] = None  # If set, send only to subscribers matching this segment (MailerLite-style)
     exclude_segment_id: Optional[int] = None  # If set, exclude subscribers matching this segment
+
+
+class CampaignPreflightResponse(BaseModel):
+    audience: int  # eligible recipients not yet sent, before suppression
+    invalid: int = 0  # no usable email address (missing or blank); never sent to
+    suppressed: int  # removed by the suppression list (email or domain)
+    recipients: int  # what a send would go to now
+
+
+class CampaignSendJobResponse(BaseModel):
+    job_id: int
+    campaign_id: int
+    status: str  # queued | running | failed | completed
+    total: Optional[int] = None
+    sent: int = 0
+    failed: int = 0
+    remaining: Optional[int] = None
+    throughput_per_sec: Optional[float] = None
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -8,10 +8,12 @@ from app.models.subscriber import Subscriber
 from app.models.group import SubscriberGroup
 from app.models.tag import SubscriberTag
 from app.services.resend_service import send_email
+from app.services.suppression_index import is_suppressed
 from app.services.event_bus import emit as event_emit
 from app.services.activity_service import log_activity
 from app.services.email_template import wrap_transactional_html
 from app.services.tracking_utils import build_unsubscribe_url
+from app.services.template_engine import render_for_subscriber
 from app.config import get_settings
 
 
@@ -22,7 +24,7 @@ def _execute_steps_from(
     from_index: int,
 ) -> None:
     """
-    Execute steps from from_index onward. On email step: send and continue.
+    Execute steps from from_index onward. On email step: send (unless suppressed) and continue.
     On delay step: create PendingAutomationDelay, set run.status = "waiting", and return.
     On completion: set run.status = "completed", run.completed_at = now.
     """
@@ -43,20 +45,20 @@ def _execute_steps_from(
             return
 
         if step.step_type == "email" and step.payload:
+            if is_suppressed(subscriber.email):
+                # Suppressed address (in-memory index, no query): skip the email, keep running the other steps
+                continue
             subject_raw = step.payload.get("subject", "")
             inner_html = step.payload.get("html", "")
-            # Personalize tokens (same as campaigns)
-            repl = {"{{name}}": subscriber.name or "", "{{email}}": subscriber.email or "", "{{id}}": str(subscriber.id)}
-            for token, value in repl.items():
-                subject_raw = subject_raw.replace(token, value)
-                inner_html = (inner_html or "").replace(token, value)
-            subject = subject_raw
             # Apply same design as campaigns: wrapper + logo + unsubscribe
             settings = get_settings()
             base_url = (getattr(settings, "frontend_base_url", None) or settings.tracking_base_url or "").strip().rstrip("/")
             unsubscribe_url = build_unsubscribe_url(base_url, settings.tracking_secret or "", subscriber.id) if base_url else "#"
-            wrapped = wrap_transactional_html(inner_html)
-            html = wrapped.replace("{{unsubscribe_url}}", unsubscribe_url)
+            # Personalize tokens (same compiled templates as campaigns, including {{custom.<key>}})
+            subject = render_for_subscriber(subject_raw, subscriber)
+            html = render_for_subscriber(
+                wrap_transactional_html(inner_html or ""), subscriber, unsubscribe_url=unsubscribe_url
+            )
             try:
                 send_email(to=subscriber.email, subject=subject, html=html)
             except Exception as e:
@@ -0,0 +1,62 @@
+"""Bounded-concurrency dispatcher for provider batch calls (e.g. Resend send_batch)."""
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, List, Optional, Tuple
+
+from loguru import logger
+
+
+class BatchDispatcher:
+    """
+    Keep up to max_in_flight batch calls running on a thread pool while the caller renders the next chunk.
+    Results come back in submission order as (meta, result) so the caller does its bookkeeping (DB writes)
+    on its own thread with its own session. A call that raises is reported as result None (hard failure).
+
+        with BatchDispatcher(send_batch, 4) as dispatcher:
+            for payloads, meta in chunks:
+                for done_meta, result in dispatcher.ready():
+                    ...
+                dispatcher.submit(payloads, meta)
+            for done_meta, result in dispatcher.drain():
+                ...
+    """
+
+    def __init__(self, send_fn: Callable[..., Optional[dict]], max_in_flight: int = 1):
+        self._send_fn = send_fn
+        self._max_in_flight = max(1, int(max_in_flight or 1))
+        self._executor = ThreadPoolExecutor(max_workers=self._max_in_flight, thread_name_prefix="batch-send")
+        self._in_flight: Deque[Tuple[Any, Future]] = deque()
+
+    def __enter__(self) -> "BatchDispatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._executor.shutdown(wait=True)
+
+    @staticmethod
+    def _result(fut: Future) -> Optional[dict]:
+        try:
+            return fut.result()
+        except Exception as e:
+            logger.error("Batch send raised: {}", e)
+            return None
+
+    def ready(self) -> List[Tuple[Any, Optional[dict]]]:
+        """Return finished calls in submission order. Blocks only while every slot is busy, so submit() never queues."""
+        done = []
+        while self._in_flight and (self._in_flight[0][1].done() or len(self._in_flight) >= self._max_in_flight):
+            meta, fut = self._in_flight.popleft()
+            done.append((meta, self._result(fut)))
+        return done
+
+    def submit(self, payloads: List[dict], meta: Any = None, **kwargs: Any) -> None:
+        """Start a batch call (keyword arguments go to send_fn). Call ready() first so the in-flight bound is respected."""
+        self._in_flight.append((meta, self._executor.submit(self._send_fn, payloads, **kwargs)))
+
+    def drain(self) -> List[Tuple[Any, Optional[dict]]]:
+        """Wait for every in-flight call and return all results in submission order."""
+        done = []
+        while self._in_flight:
+            meta, fut = self._in_flight.popleft()
+            done.append((meta, self._result(fut)))
+        return done
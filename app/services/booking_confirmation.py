@@ -1,4 +1,5 @@
 """Booking confirmation and notifications: .ics, confirmation/cancellation/reschedule/reminder/host emails."""
+import enum
 import json
 from datetime import datetime, timedelta, timezone
 from typing import List
@@ -8,6 +9,18 @@ from sqlalchemy.orm import Session
 
 from app.config import get_settings
 from app.services.resend_service import send_email
+from app.services.suppression_index import is_suppressed
+
+
+class EmailOutcome(str, enum.Enum):
+    """Result of a booking reminder. skipped = deliberately not sent (suppressed address); do not retry it."""
+    sent = "sent"
+    skipped = "skipped"
+    failed = "failed"
+
+    def __bool__(self) -> bool:
+        # Only a sent email is truthy, so `if send_booking_reminder_email(...)` still means "it went out"
+        return self is EmailOutcome.sent
 
 
 def _ics_escape(s: str) -> str:
@@ -70,6 +83,9 @@ def send_booking_confirmation_email(
     if not settings.resend_api_key:
         logger.warning("RESEND_API_KEY not set; skipping booking confirmation email")
         return False
+    if is_suppressed(attendee_email):
+        logger.info("Skipping booking confirmation email: {} is suppressed", attendee_email)
+        return False
     start_fmt = start_at.strftime("%A, %B %d, %Y at %I:%M %p") if start_at else ""
     end_fmt = end_at.strftime("%I:%M %p") if end_at else ""
     status_line = "Your booking is confirmed." if is_confirmed else "Your booking is pending confirmation."
@@ -104,6 +120,9 @@ def send_booking_cancellation_email(
     settings = get_settings()
     if not settings.resend_api_key:
         return False
+    if is_suppressed(attendee_email):
+        logger.info("Skipping booking cancellation email: {} is suppressed", attendee_email)
+        return False
     start_fmt = start_at.strftime("%A, %B %d, %Y at %I:%M %p") if start_at else ""
     html = f"""
     <p>Hi {attendee_name or 'there'},</p>
@@ -136,6 +155,9 @@ def send_booking_reschedule_email(
     settings = get_settings()
     if not settings.resend_api_key:
         return False
+    if is_suppressed(attendee_email):
+        logger.info("Skipping booking reschedule email: {} is suppressed", attendee_email)
+        return False
     start_fmt = start_at.strftime("%A, %B %d, %Y at %I:%M %p") if start_at else ""
     end_fmt = end_at.strftime("%I:%M %p") if end_at else ""
     html = f"""
@@ -164,11 +186,14 @@ def send_booking_reminder_email(
     end_at: datetime,
     location: str = "",
     minutes_before: int = 60,
-) -> bool:
-    """Send a reminder email before the booking. Returns True if sent."""
+) -> EmailOutcome:
+    """Send a reminder email before the booking. Returns sent, skipped (suppressed attendee) or failed."""
     settings = get_settings()
     if not settings.resend_api_key:
-        return False
+        return EmailOutcome.failed
+    if is_suppressed(attendee_email):
+        logger.info("Skipping booking reminder email: {} is suppressed", attendee_email)
+        return EmailOutcome.skipped
     start_fmt = start_at.strftime("%A, %B %d, %Y at %I:%M %p") if start_at else ""
     end_fmt = end_at.strftime("%I:%M %p") if end_at else ""
     when = "in 1 hour" if minutes_before == 60 else f"in {minutes_before // 60} hours" if minutes_before >= 60 else f"in {minutes_before} minutes"
@@ -184,10 +209,10 @@ def send_booking_reminder_email(
             subject=f"Reminder: {event_name} – {start_fmt}",
             html=html.strip(),
         )
-        return result is not None
+        return EmailOutcome.sent if result is not None else EmailOutcome.failed
     except Exception as e:
         logger.exception("Failed to send reminder email: {}", e)
-        return False
+        return EmailOutcome.failed
 
 
 def send_host_notification_email(
@@ -215,7 +240,7 @@ def send_host_notification_email(
     ok = False
     for addr in to_emails:
         addr = (addr or "").strip()
-        if not addr or "@" not in addr:
+        if not addr or "@" not in addr or is_suppressed(addr):
             continue
         try:
             result = send_email(
@@ -0,0 +1,67 @@
+"""
+Tracked link registry for compact click tokens.
+
+Each distinct destination of a campaign gets a campaign_links row once (when a send compiles its render plan);
+tokens then carry that small id. /t/click resolves ids through a bounded in-process cache: rows never change,
+so a cached entry stays valid until the campaign is deleted. Rows are unique on (campaign_id, md5(url)), so URLs of
+any length can be registered.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.campaign import CampaignLink
+
+_CACHE_SIZE = 10_000
+_cache: "OrderedDict[int, tuple[int, str]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def url_hash(url: str) -> str:
+    """Lookup key of a destination: md5 hex, same as Postgres md5() on the stored text."""
+    return hashlib.md5(url.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+def get_link_id(db: Session, campaign_id: int, url: str) -> int:
+    """Id of the campaign_links row for (campaign_id, url), inserting it if needed (safe across concurrent workers)."""
+    key = url_hash(url)
+    db.execute(
+        pg_insert(CampaignLink)
+        .values(campaign_id=campaign_id, url=url, url_hash=key)
+        .on_conflict_do_nothing(index_elements=["campaign_id", "url_hash"])
+    )
+    link_id = (
+        db.query(CampaignLink.id)
+        .filter(CampaignLink.campaign_id == campaign_id, CampaignLink.url_hash == key)
+        .scalar()
+    )
+    db.commit()
+    return link_id
+
+
+def cached_link(link_id: int) -> tuple[int, str] | None:
+    """(campaign_id, url) for a link id if it is in the cache; never touches the database."""
+    with _cache_lock:
+        hit = _cache.get(link_id)
+        if hit is not None:
+            _cache.move_to_end(link_id)
+        return hit
+
+
+def resolve_link(db: Session, link_id: int) -> tuple[int, str] | None:
+    """(campaign_id, url) for a link id, from the cache when possible."""
+    hit = cached_link(link_id)
+    if hit is not None:
+        return hit
+    row = db.query(CampaignLink.campaign_id, CampaignLink.url).filter(CampaignLink.id == link_id).first()
+    if row is None:
+        return None
+    value = (row[0], row[1])
+    with _cache_lock:
+        _cache[link_id] = value
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return value
@@ -0,0 +1,206 @@
+"""
+Compiled render plans for campaign HTML.
+
+Everything that is identical for every recipient (layout wrapping, image URL rewriting, finding links, the
+open-pixel insertion point and personalization token positions) is done once per A/B variant. Rendering one
+recipient is then a single join over precomputed segments plus one HMAC for the pixel and, with a link
+registry, one per tracked link (compact /t/click?t=<token> URLs).
+Without a registry, output is identical to personalizing the HTML and running inject_tracking_html on it.
+"""
+import hashlib
+import hmac
+import urllib.parse
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from app.services.html_rewriter import html_to_plain, scan_html
+from app.services.template_engine import parse_segments, resolve
+from app.services.tracking_utils import _html_escape_url, build_click_token, build_click_url
+
+# Segment kinds
+_LITERAL = 0
+_TOKEN = 1
+_LINK = 2  # static destination: per recipient only subscriber id + signature change
+_DYNAMIC_LINK = 3  # href contains placeholders: personalized, then wrapped, per recipient
+_PIXEL = 4
+_TOKEN_LINK = 5  # static destination registered in campaign_links: per recipient only the token changes
+
+
+def _tracked_destination(href: str, click_base: str) -> str | None:
+    """Return the decoded destination to wrap, or None when the link must be left alone (same rules as inject_tracking_html)."""
+    href_stripped = (href or "").replace("&amp;", "&").replace("&quot;", '"').strip()
+    if (
+        not href_stripped
+        or href_stripped.startswith(("mailto:", "tel:", "#"))
+        or click_base in href_stripped.lower()
+        or "/unsubscribe" in href_stripped.lower()
+    ):
+        return None
+    return href_stripped
+
+
+def _join(segments, context, custom_fields) -> str:
+    return "".join(
+        seg if isinstance(seg, str) else resolve(seg[0], seg[1], seg[2], context, custom_fields) for seg in segments
+    )
+
+
+class RenderPlan:
+    """
+    Precompiled HTML for one campaign variant. render() takes the placeholder context
+    ({"name", "email", "id", "unsubscribe_url"}), the subscriber id and the subscriber's custom_fields
+    (for {{custom.<key>}}) and returns the final HTML. image_base_url makes local upload image URLs absolute
+    (same rules as the old per-campaign regex rewrite). link_id maps a static destination to its campaign_links id;
+    when given, those links get compact tokens instead of the full encoded URL and a per-link signature.
+    plain_text is the variant's plain-text alternative (html_to_plain), placeholders still in it.
+    """
+
+    def __init__(
+        self,
+        html: str,
+        base_url: str,
+        secret: str,
+        campaign_id: int,
+        link_id: Optional[Callable[[str], int]] = None,
+        image_base_url: str = "",
+    ):
+        self.base_url = base_url
+        self.secret = secret
+        self.campaign_id = campaign_id
+        self._click_base = base_url.rstrip("/").lower() if base_url else ""
+        base = base_url.rstrip("/") if base_url else ""
+        # Keyed HMAC state computed once; copy() per signature skips re-deriving the key pads
+        self._mac = hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+        self._click_prefix = _html_escape_url(f"{base}/t/click?c={campaign_id}&s=")
+        self._open_prefix = _html_escape_url(f"{base}/t/open?c={campaign_id}&s=")
+        self._token_prefix = f"{base}/t/click?t="
+        self._link_id = link_id
+        self._image_base_url = image_base_url
+        self._pixel_suffix = (
+            '" width="1" height="1" alt="" border="0" '
+            'style="display:block;width:1px;height:1px;min-width:1px;min-height:1px;" />'
+        )
+        self.segments: List[Tuple[int, object]] = []
+        self.plain_text = ""
+        self._compile(html or "")
+
+    # --- compile ---
+
+    def _add_text(self, text: str) -> None:
+        for seg in parse_segments(text):
+            if isinstance(seg, str):
+                self._add_literal(seg)
+            else:
+                self.segments.append((_TOKEN, seg))
+
+    def _add_literal(self, text: str) -> None:
+        if self.segments and self.segments[-1][0] == _LITERAL:
+            self.segments[-1] = (_LITERAL, self.segments[-1][1] + text)
+        else:
+            self.segments.append((_LITERAL, text))
+
+    def _compile(self, html: str) -> None:
+        # One scan: image src rewrite, every href and the pixel position
+        scan = scan_html(html, self._image_base_url)
+        self.plain_text = html_to_plain(html)
+        if not self.base_url:
+            self._add_text(html)
+            return
+        html = scan.html
+        if scan.body_open_end is not None:
+            pixel_pos = scan.body_open_end
+        elif scan.body_close is not None:
+            pixel_pos = scan.body_close
+            # inject_tracking_html substitutes a lowercase "</body>" after the pixel
+            html = html[:pixel_pos] + "</body>" + html[pixel_pos + 7 :]
+        else:
+            pixel_pos = 0
+        pixel_done = False
+
+        def add_span(start: int, end: int) -> None:
+            nonlocal pixel_done
+            if not pixel_done and start <= pixel_pos <= end:
+                self._add_text(html[start:pixel_pos])
+                self.segments.append((_PIXEL, None))
+                pixel_done = True
+                self._add_text(html[pixel_pos:end])
+            else:
+                self._add_text(html[start:end])
+
+        pos = 0
+        for start, end, quote_char, href in scan.links:
+            add_span(pos, start)
+            original = html[start:end]
+            href_segments = parse_segments(href)
+            if any(not isinstance(seg, str) for seg in href_segments):
+                self.segments.append((_DYNAMIC_LINK, (quote_char, parse_segments(original), href_segments)))
+            else:
+                dest = _tracked_destination(href, self._click_base)
+                if dest is None:
+                    self._add_text(original)
+                elif self._link_id is not None:
+                    link_id = self._link_id(dest)
+                    self.segments.append((_TOKEN_LINK, (f"href={quote_char}{self._token_prefix}", link_id, quote_char)))
+                else:
+                    encoded = urllib.parse.quote(dest, safe="")
+                    self.segments.append(
+                        (
+                            _LINK,
+                            (
+                                f"href={quote_char}{self._click_prefix}",
+                                _html_escape_url(f"&url={encoded}&sig="),
+                                quote_char,
+                                f"click:{self.campaign_id}:",
+                                f":{dest}",
+                            ),
+                        )
+                    )
+            pos = end
+        add_span(pos, len(html))
+        if not pixel_done:
+            self.segments.append((_PIXEL, None))
+
+    # --- render ---
+
+    def _sign(self, payload: str) -> str:
+        h = self._mac.copy()
+        h.update(payload.encode("utf-8"))
+        return h.hexdigest()
+
+    def render(self, context: Dict[str, str], subscriber_id: int, custom_fields: Optional[Mapping[str, Any]] = None) -> str:
+        sid = str(subscriber_id)
+        parts = []
+        append = parts.append
+        for kind, data in self.segments:
+            if kind == _LITERAL:
+                append(data)
+            elif kind == _TOKEN_LINK:
+                head, link_id, quote_char = data
+                append(head)
+                append(build_click_token(self.secret, self.campaign_id, subscriber_id, link_id, keyed=self._mac))
+                append(quote_char)
+            elif kind == _TOKEN:
+                append(resolve(data[0], data[1], data[2], context, custom_fields))
+            elif kind == _LINK:
+                head, middle, quote_char, sig_head, sig_tail = data
+                append(head)
+                append(sid)
+                append(middle)
+                append(self._sign(sig_head + sid + sig_tail))
+                append(quote_char)
+            elif kind == _PIXEL:
+                append('<img src="')
+                append(self._open_prefix)
+                append(sid)
+                append("&amp;sig=")
+                append(self._sign(f"open:{self.campaign_id}:{sid}"))
+                append(self._pixel_suffix)
+            else:
+                quote_char, full_segments, href_segments = data
+                href = _join(href_segments, context, custom_fields)
+                dest = _tracked_destination(href, self._click_base)
+                if dest is None:
+                    append(_join(full_segments, context, custom_fields))
+                else:
+                    url = build_click_url(self.base_url, self.secret, self.campaign_id, subscriber_id, dest)
+                    append(f"href={quote_char}{_html_escape_url(url)}{quote_char}")
+        return "".join(parts)
@@ -0,0 +1,129 @@
+"""
+Optional multi-process render stage for campaign email sends (CAMPAIGN_RENDER_PROCESSES > 0).
+
+Rendering is pure Python (template joins, HMACs), so in one process it is capped by the GIL. Here the send loop
+streams plain recipient tuples (id, email, name, custom_fields, variant index) to a ProcessPoolExecutor; each
+worker compiles the campaign's variants once (cached by RenderSpec.key) and returns the chunk's payloads. Results
+come back in submission order, with a bounded number of chunks in flight, so the send loop's bookkeeping is
+unchanged.
+
+The spec (both variants' HTML plus the links map) is pickled once per render_chunks call to a temporary file; a
+chunk task carries only the spec key, that path and its recipients, and a worker reads the file on a cache miss.
+The pool outlives a send, so the spec cannot go through the pool initializer.
+
+Workers are started with "spawn": they don't inherit the parent's database connections and never use the
+database. Tracked links are registered in the parent while it compiles its own variants, and the url -> id map
+travels in the spec.
+"""
+import multiprocessing
+import os
+import pickle
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+# Worker-side cache of compiled specs (a worker serves one or two campaigns at a time)
+_compiled: Dict[Tuple, Any] = {}
+_COMPILED_CACHE_SIZE = 4
+
+
+class RenderSpec(NamedTuple):
+    """Everything a worker needs to rebuild a send's variants without the database."""
+
+    key: Tuple  # (campaign_id, send_id): identifies the compiled form in worker caches
+    variants: List[Tuple[Optional[str], str, str]]  # (name, subject, html_body) per variant, in index order
+    links: Dict[str, int]  # tracked destination -> campaign_links id
+    plain_body: Optional[str]
+    base_url: str
+    secret: str
+    campaign_id: int
+    reply_to: str
+
+
+class _Recipient(NamedTuple):
+    id: int
+    email: str
+    name: Optional[str]
+    custom_fields: Any
+
+
+def _get_pool(processes: int) -> ProcessPoolExecutor:
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != processes:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+            _pool_size = processes
+        return _pool
+
+
+def _compile(spec_path: str):
+    with open(spec_path, "rb") as f:
+        spec: RenderSpec = pickle.load(f)
+    from app.services.campaign_service import _Variant
+    from app.services.template_engine import compile_template
+
+    variants = [
+        _Variant(name, subject, html_body, spec.base_url, spec.secret, spec.campaign_id, spec.links.__getitem__)
+        for name, subject, html_body in spec.variants
+    ]
+    plain_template = compile_template(spec.plain_body) if spec.plain_body else None
+    return spec, variants, plain_template
+
+
+def _render_chunk(key: Tuple, spec_path: str, items: List[Tuple[int, str, Optional[str], Any, int]]) -> List[dict]:
+    """Worker: payloads for one chunk, in item order. The spec is loaded from spec_path the first time key is seen."""
+    from app.services.campaign_service import _build_email_payload
+
+    compiled = _compiled.get(key)
+    if compiled is None:
+        if len(_compiled) >= _COMPILED_CACHE_SIZE:
+            _compiled.pop(next(iter(_compiled)))
+        compiled = _compiled[key] = _compile(spec_path)
+    spec, variants, plain_template = compiled
+    return [
+        _build_email_payload(
+            _Recipient(sid, email, name, custom_fields),
+            variants[index],
+            plain_template,
+            spec.base_url,
+            spec.secret,
+            spec.reply_to,
+        )
+        for sid, email, name, custom_fields, index in items
+    ]
+
+
+def render_chunks(
+    spec: RenderSpec, chunks: Iterable[List[Tuple[Any, int]]], processes: int
+) -> Iterator[Tuple[List[dict], List[Tuple[Any, int]]]]:
+    """
+    Render chunks of (recipient row, variant index) on the process pool. Yields (payloads, chunk) in input order,
+    keeping at most two chunks per process in flight so memory stays bounded.
+    """
+    pool = _get_pool(processes)
+    in_flight: deque = deque()
+    fd, spec_path = tempfile.mkstemp(prefix="campaign-render-", suffix=".pickle")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(spec, f, protocol=pickle.HIGHEST_PROTOCOL)
+        for chunk in chunks:
+            items = [(s.id, s.email, s.name, s.custom_fields, index) for s, index in chunk]
+            in_flight.append((chunk, pool.submit(_render_chunk, spec.key, spec_path, items)))
+            if len(in_flight) >= 2 * processes:
+                done, fut = in_flight.popleft()
+                yield fut.result(), done
+        while in_flight:
+            done, fut = in_flight.popleft()
+            yield fut.result(), done
+    finally:
+        for _, fut in in_flight:
+            fut.cancel()
+        os.unlink(spec_path)
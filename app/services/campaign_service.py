@@ -1,163 +1,320 @@
-from datetime import datetime, timezone
-import random
+from datetime import datetime, timedelta, timezone
+import hashlib
+import zlib
 
+from loguru import logger
+from sqlalchemy import Integer, and_, exists, func, insert, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.orm import Session
 
-from app.models.campaign import Campaign, CampaignRecipient, CampaignStatus
+from app.models.campaign import (
+    Campaign,
+    CampaignRecipient,
+    CampaignSend,
+    CampaignSendBatch,
+    CampaignSendRecipient,
+    CampaignSendUnit,
+    CampaignStatus,
+)
 from app.models.subscriber import Subscriber, SubscriberStatus
 from app.models.suppression import SuppressionEntry, SuppressionType
-from app.services.resend_service import send_batch
-from app.services.whatsapp_service import send_whatsapp
+from app.services.resend_service import governor, send_batch
+from app.services.batch_dispatcher import BatchDispatcher
+from app.services.whatsapp_service import send_whatsapp_many
 from app.services.event_bus import emit as event_emit
 from app.services.activity_service import log_activity
-from app.services.tracking_utils import inject_tracking_html, build_unsubscribe_url
+from app.services.tracking_utils import build_unsubscribe_url
+from app.services.campaign_render import RenderPlan
+from app.services.campaign_links import get_link_id
+from app.services.campaign_render_pool import RenderSpec, render_chunks
+from app.services.domain_pacing import domain_pacer, interleave_by_domain
+from app.services.template_engine import CompiledTemplate, compile_template, subscriber_context
 from app.services.email_template import wrap_transactional_html
 from app.config import get_settings
-import re
-
-
-def _html_to_plain(html: str) -> str:
-    """Strip HTML tags and collapse whitespace for a plain-text fallback. Improves deliverability (multipart preferred)."""
-    if not html:
-        return ""
-    text = re.sub(r"<br\s*/?>", "\n", html, flags=re.IGNORECASE)
-    text = re.sub(r"</p>", "\n", text, flags=re.IGNORECASE)
-    text = re.sub(r"<[^>]+>", "", text)
-    text = re.sub(r"\n\s*\n", "\n\n", text)
-    return text.strip() or ""
-
-
-def _load_suppressed_set(db: Session):
-    """Return (set of suppressed emails, set of suppressed domains)."""
-    entries = db.query(SuppressionEntry).all()
-    emails = set()
-    domains = set()
-    for e in entries:
-        if e.type == SuppressionType.email:
-            emails.add(e.value.lower())
-        else:
-            domains.add(e.value.lower())
-    return emails, domains
-
-
-def _is_suppressed(email: str, suppressed_emails: set, suppressed_domains: set) -> bool:
-    email = (email or "").strip().lower()
-    if not email:
-        return True
-    if email in suppressed_emails:
-        return True
-    if "@" in email:
-        domain = email.split("@", 1)[1]
-        if domain in suppressed_domains:
-            return True
-    return False
-
-
-def _rewrite_image_urls_for_email(html: str, public_base_url: str) -> str:
-    """Replace localhost, 127.0.0.1, and relative /uploads/ image URLs with public_base_url so images load when recipients open the email."""
-    if not html or not public_base_url:
-        return html
-    base = public_base_url.rstrip("/")
-
-    def replace_src(match: re.Match) -> str:
-        quote = match.group(1)
-        url = (match.group(2) or "").strip()
-        if not url:
-            return match.group(0)
-        if "/t/open" in url:
-            return match.group(0)
-        if url.startswith("/") and "/uploads/" in url:
-            new_url = f"{base}{url}"
-            return f'src={quote}{new_url}{quote}'
-        if "localhost" in url.lower() or "127.0.0.1" in url:
-            if "/uploads/" in url:
-                path = "/uploads/" + url.split("/uploads/", 1)[-1].split("?")[0].split("#")[0]
-                new_url = f"{base}{path}"
-                return f'src={quote}{new_url}{quote}'
-        return match.group(0)
-
-    return re.sub(r'src=(["\'])([^"\']*?)["\']', replace_src, html, flags=re.IGNORECASE)
-
-
-def _personalize(text: str, subscriber: Subscriber, extra: dict | None = None) -> str:
-    """Replace {{name}}, {{email}}, {{id}} and any extra placeholders with subscriber values."""
-    if not text:
-        return text
-    out = (
-        text.replace("{{name}}", subscriber.name or "")
-        .replace("{{email}}", subscriber.email or "")
-        .replace("{{id}}", str(subscriber.id))
+
+
+def _normalized_email():
+    """lower(trim(email)) – the form suppression entries are matched against (see migration 027 indexes)."""
+    return func.lower(func.trim(Subscriber.email))
+
+
+def _suppression_matches():
+    """EXISTS clauses for a suppression entry matching the subscriber's normalized email, and its domain."""
+    email = _normalized_email()
+    by_email = exists().where(
+        SuppressionEntry.type == SuppressionType.email,
+        func.lower(SuppressionEntry.value) == email,
+    )
+    by_domain = exists().where(
+        SuppressionEntry.type == SuppressionType.domain,
+        func.lower(SuppressionEntry.value) == func.split_part(email, "@", 2),
     )
-    if extra:
-        for k, v in extra.items():
-            out = out.replace(k, str(v))
-    return out
+    return by_email, by_domain
 
 
-def send_campaign(
-    db: Session,
-    campaign: Campaign,
-    recipient_ids: list[int] | None,
-) -> tuple[int, str]:
+def _not_suppressed(query):
     """
-    Resolve recipients, send via Resend (email) or Twilio (whatsapp), record CampaignRecipient and update campaign status.
-    Returns (sent_count, error_message). error_message is empty on full success.
+    Exclude subscribers whose normalized email, or its domain, is on the suppression list. Both checks are
+    anti-joins evaluated by Postgres, so neither the suppression list nor suppressed subscribers are loaded.
     """
-    if campaign.status != CampaignStatus.draft:
-        return 0, "Campaign is not in draft status"
+    by_email, by_domain = _suppression_matches()
+    return query.filter(Subscriber.email.isnot(None), _normalized_email() != "", ~by_email, ~by_domain)
+
 
-    query = db.query(Subscriber).filter(Subscriber.status == SubscriberStatus.active)
+RECIPIENT_CHUNK_SIZE = 100  # Resend batch API accepts up to 100 emails per call
+
+
+def _recipient_query(db: Session, recipient_ids: list[int] | None, send_id: int | None = None):
+    """
+    Lightweight column query for active recipients (rows, not ORM objects, so nothing accumulates in the session).
+    With send_id, limited to that send's campaign_send_recipients rows: a semi-join, so chunk queries of a send for
+    200k explicit recipients don't each carry the whole id list.
+    """
+    query = db.query(
+        Subscriber.id, Subscriber.email, Subscriber.name, Subscriber.phone, Subscriber.custom_fields
+    ).filter(
+        Subscriber.status == SubscriberStatus.active
+    )
     if recipient_ids:
         query = query.filter(Subscriber.id.in_(recipient_ids))
-    subscribers = query.all()
-    if not subscribers:
-        return 0, "No active subscribers to send to"
-
-    channel = (getattr(campaign, "channel", None) or "email").lower()
-    if channel == "whatsapp":
-        subscribers = [s for s in subscribers if getattr(s, "phone", None) and str(s.phone).strip()]
-        if not subscribers:
-            return 0, "No recipients with a phone number. Add phone numbers to subscribers for WhatsApp campaigns."
-        settings = get_settings()
-        if not settings.twilio_account_sid or not settings.twilio_whatsapp_from:
-            return 0, "WhatsApp is not configured. Set TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, and TWILIO_WHATSAPP_FROM."
-        campaign.status = CampaignStatus.sending
-        db.commit()
-        sent = 0
-        message_body = (campaign.plain_body or campaign.subject or "").strip()
-        if not message_body:
-            campaign.status = CampaignStatus.draft
-            db.commit()
-            return 0, "WhatsApp campaign needs a message (plain body or subject)."
-        for s in subscribers:
-            personalized = _personalize(message_body, s)
-            if send_whatsapp(s.phone, personalized):
-                rec = CampaignRecipient(
-                    campaign_id=campaign.id,
-                    subscriber_id=s.id,
-                    sent_at=datetime.now(timezone.utc),
-                    variant=None,
-                )
-                db.add(rec)
-                sent += 1
-        campaign.status = CampaignStatus.sent
-        campaign.sent_at = datetime.now(timezone.utc)
-        db.commit()
-        event_emit(db, "campaign.sent", {"campaign_id": campaign.id, "sent_count": sent})
-        log_activity(db, "campaign.sent", "campaign", campaign.id, {"sent_count": sent})
-        return sent, ""
-    # --- Email path ---
-    suppressed_emails, suppressed_domains = _load_suppressed_set(db)
-    subscribers = [s for s in subscribers if not _is_suppressed(s.email, suppressed_emails, suppressed_domains)]
-    if not subscribers:
-        return 0, "No recipients after applying suppression list"
+    if send_id is not None:
+        query = query.filter(
+            exists().where(
+                CampaignSendRecipient.send_id == send_id,
+                CampaignSendRecipient.subscriber_id == Subscriber.id,
+            )
+        )
+    return query
 
-    campaign.status = CampaignStatus.sending
+
+def _send_audience_query(db: Session, campaign: Campaign, send: CampaignSend):
+    """_audience_query for a send, restricted to its stored recipient list when it was started with one."""
+    return _audience_query(db, campaign, None, send_id=send.id if send.recipient_filter else None)
+
+
+def _iter_recipient_chunks(query, chunk_size: int = RECIPIENT_CHUNK_SIZE):
+    """
+    Yield recipient rows in subscriber id order, chunk_size at a time, using keyset pagination (id > last_id).
+    Each chunk is its own bounded query, so memory stays flat for any audience size and the session may commit between chunks.
+    """
+    last_id = 0
+    while True:
+        rows = query.filter(Subscriber.id > last_id).order_by(Subscriber.id).limit(chunk_size).all()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1].id
+
+
+def _iter_domain_chunks(query):
+    """
+    Recipient chunks interleaved across recipient domains (see domain_pacing) and paced to the per-domain caps.
+    The domain is computed by Postgres with each row (the same expression the suppression domain check uses).
+    """
+    window = get_settings().campaign_domain_window
+    if window <= 0:
+        return _iter_recipient_chunks(query)
+    query = query.add_columns(func.split_part(_normalized_email(), "@", 2).label("domain"))
+    pacer = domain_pacer if domain_pacer.enabled else None
+    return interleave_by_domain(_iter_recipient_chunks(query), RECIPIENT_CHUNK_SIZE, window, pacer)
+
+
+class _Variant:
+    """Compiled subject template and HTML render plan for one A/B variant ("a", "b" or None when not testing)."""
+
+    __slots__ = ("name", "subject", "plan", "plain")
+
+    def __init__(
+        self,
+        name: str | None,
+        subject: str,
+        html_body: str,
+        base_url: str,
+        secret: str,
+        campaign_id: int,
+        link_id=None,
+    ):
+        self.name = name
+        self.subject = compile_template(subject or "")
+        html = wrap_transactional_html(html_body)
+        # Open/click tracking (pixel at /t/open, links wrapped to /t/click) and rewriting image URLs (localhost,
+        # /uploads/) to the public base are compiled in, in one scan, when TRACKING_BASE_URL is set;
+        # link_id registers static destinations in campaign_links so links carry a compact token
+        self.plan = RenderPlan(html, base_url, secret, campaign_id, link_id=link_id, image_base_url=base_url)
+        # Plain-text alternative derived once from the source HTML; per recipient only its placeholders are filled
+        self.plain = CompiledTemplate(self.plan.plain_text)
+
+
+def _build_email_payload(
+    s,
+    variant: _Variant,
+    plain_template: CompiledTemplate | None,
+    base_url: str,
+    secret: str,
+    reply_to: str,
+) -> dict:
+    """Render subject, HTML (from the variant's compiled plan), plain text and headers for one recipient."""
+    unsubscribe_url = build_unsubscribe_url(base_url, secret, s.id) if base_url else "#"
+    context = subscriber_context(s, unsubscribe_url=unsubscribe_url)
+    custom_fields = s.custom_fields
+    subject = variant.subject.render(context, custom_fields)
+    html = variant.plan.render(context, s.id, custom_fields)
+    plain = plain_template.render(context, custom_fields) if plain_template else None
+    if not plain or not plain.strip():
+        plain = variant.plain.render(context, custom_fields)
+
+    # Minimal headers: avoid Precedence/list/bulk so Gmail is less likely to route to Promotions.
+    # List-Unsubscribe + List-Unsubscribe-Post only when we have an unsubscribe URL (required for one-click).
+    headers = {}
+    if base_url and unsubscribe_url and unsubscribe_url != "#":
+        headers["List-Unsubscribe"] = f"<{unsubscribe_url}>"
+        headers["List-Unsubscribe-Post"] = "List-Unsubscribe=One-Click"
+
+    payload = {
+        "to": s.email,
+        "subject": subject,
+        "html": html,
+        "text": plain,
+        "headers": headers,
+    }
+    if reply_to:
+        payload["reply_to"] = reply_to
+    return payload
+
+
+def _record_recipients(
+    db: Session,
+    send: CampaignSend,
+    variants: list[tuple[int, str | None]],
+    skipped: int = 0,
+    unit: CampaignSendUnit | None = None,
+) -> int:
+    """
+    Record a chunk the provider accepted: one multi-row INSERT into campaign_recipients plus a send journal entry,
+    committed together, so the session never holds more than one chunk of pending rows and a resume knows exactly
+    who was already sent. skipped counts recipients of the chunk that were not sent (suppressed or undeliverable).
+    Counters are bumped with atomic UPDATEs because several workers record chunks of the same send concurrently.
+    Subscribers the campaign already has a row for are left out (unique index), so a chunk that reached the provider
+    twice is counted once. Returns the number newly recorded as sent.
+    """
+    if not variants and not skipped:
+        return 0
+    now = datetime.now(timezone.utc)
+    recorded: list[int] = []
+    if variants:
+        # A chunk re-sent after a crash or by a racing worker only records subscribers not recorded yet
+        recorded = list(
+            db.execute(
+                pg_insert(CampaignRecipient)
+                .values(
+                    [
+                        {"campaign_id": send.campaign_id, "subscriber_id": sub_id, "sent_at": now, "variant": variant}
+                        for sub_id, variant in variants
+                    ]
+                )
+                .on_conflict_do_nothing(index_elements=["campaign_id", "subscriber_id"])
+                .returning(CampaignRecipient.subscriber_id)
+            ).scalars()
+        )
+    batch_count = db.execute(
+        update(CampaignSend)
+        .where(CampaignSend.id == send.id)
+        .values(
+            batch_count=CampaignSend.batch_count + (1 if recorded else 0),
+            sent_count=CampaignSend.sent_count + len(recorded),
+            failed_count=CampaignSend.failed_count + skipped,
+            last_batch_at=now,
+        )
+        .returning(CampaignSend.batch_count)
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
+    if recorded:
+        db.add(
+            CampaignSendBatch(
+                send_id=send.id,
+                campaign_id=send.campaign_id,
+                batch_index=batch_count - 1,
+                subscriber_ids=recorded,
+            )
+        )
+    if unit is not None:
+        unit.sent_count += len(recorded)
+        unit.failed_count += skipped
+        unit.heartbeat_at = now
     db.commit()
+    return len(recorded)
+
+
+def _ab_draw(campaign_id: int, subscriber_id: int) -> float:
+    """Stable number in [0, 1) per subscriber and campaign: a re-sent chunk gets the same A/B variants (and payload)."""
+    return zlib.crc32(f"{campaign_id}:{subscriber_id}".encode()) / 2**32
+
 
+def _chunk_idempotency_key(send: CampaignSend, subscriber_ids: list[int]) -> str:
+    """
+    Provider idempotency key for a chunk: derived from the send and the chunk's subscribers only, so a retry, a
+    resume that forms the same chunk again, or a second worker racing on it all present the same key.
+    """
+    digest = hashlib.sha256(",".join(map(str, sorted(subscriber_ids))).encode()).hexdigest()[:32]
+    return f"campaign-{send.campaign_id}-send-{send.id}-{digest}"
+
+
+def _channel(campaign: Campaign) -> str:
+    return (getattr(campaign, "channel", None) or "email").lower()
+
+
+def _whatsapp_message(campaign: Campaign) -> str:
+    return (campaign.plain_body or campaign.subject or "").strip()
+
+
+def _audience_query(
+    db: Session,
+    campaign: Campaign,
+    recipient_ids: list[int] | None,
+    suppress: bool = True,
+    send_id: int | None = None,
+):
+    """
+    Recipients still to send for this campaign: active, channel-eligible, not already recorded as sent and
+    (email campaigns, unless suppress=False) not on the suppression list.
+    """
+    query = _recipient_query(db, recipient_ids, send_id)
+    if _channel(campaign) == "whatsapp":
+        query = query.filter(Subscriber.phone.isnot(None), func.trim(Subscriber.phone) != "")
+    elif suppress:
+        query = _not_suppressed(query)
+    # A campaign goes to each subscriber at most once; this is what lets a resume skip already-sent chunks
+    return query.filter(
+        ~exists().where(
+            CampaignRecipient.campaign_id == campaign.id,
+            CampaignRecipient.subscriber_id == Subscriber.id,
+        )
+    )
+
+
+def _send_whatsapp_chunks(
+    db: Session, campaign: Campaign, send: CampaignSend, query, unit: CampaignSendUnit | None = None
+) -> tuple[int, str]:
+    sent = 0
+    message_template = compile_template(_whatsapp_message(campaign))
+    for chunk in _iter_recipient_chunks(query):
+        # The chunk goes out concurrently on the WhatsApp dispatcher pool; its rows are then recorded in one INSERT
+        messages = [(s.phone, message_template.render(subscriber_context(s), s.custom_fields)) for s in chunk]
+        results = send_whatsapp_many(messages)
+        delivered = [(s.id, None) for s, ok in zip(chunk, results) if ok]
+        sent += _record_recipients(db, send, delivered, skipped=len(chunk) - len(delivered), unit=unit)
+    return sent, ""
+
+
+def _send_email_chunks(
+    db: Session, campaign: Campaign, send: CampaignSend, query, unit: CampaignSendUnit | None = None
+) -> tuple[int, str]:
     settings = get_settings()
     base_url = (settings.tracking_base_url or "").strip()
     secret = settings.tracking_secret or ""
+    reply_to = (settings.resend_reply_to or "").strip()
 
     use_ab = (
         campaign.ab_split_percent
@@ -165,76 +322,493 @@ def send_campaign(
         and campaign.ab_html_body_b
     )
     split_b = (campaign.ab_split_percent or 0) / 100.0
+    # Per-variant static work happens once here; each recipient is then just joins and HMACs.
+    # Tracked links are registered as the variants compile; links keeps the ids for render workers.
+    links: dict[str, int] = {}
+
+    def link_id(url: str) -> int:
+        if url not in links:
+            links[url] = get_link_id(db, campaign.id, url)
+        return links[url]
+
+    variant_specs = [("a" if use_ab else None, campaign.subject, campaign.html_body)]
+    if use_ab:
+        variant_specs.append(("b", campaign.ab_subject_b, campaign.ab_html_body_b))
+    variants = [
+        _Variant(name, subject, html_body, base_url, secret, campaign.id, link_id)
+        for name, subject, html_body in variant_specs
+    ]
+    plain_body = getattr(campaign, "plain_body", None) or None
+    plain_template = compile_template(plain_body) if plain_body else None
+
+    def assigned_chunks():
+        # A/B assignment stays in this process so it is the same whichever stage renders
+        for chunk in _iter_domain_chunks(query):
+            yield [(s, 1 if use_ab and _ab_draw(campaign.id, s.id) < split_b else 0) for s in chunk]
+
+    processes = settings.campaign_render_processes
+    if processes > 0:
+        spec = RenderSpec(
+            (campaign.id, send.id), variant_specs, links, plain_body, base_url, secret, campaign.id, reply_to
+        )
+        rendered = render_chunks(spec, assigned_chunks(), processes)
+    else:
+        rendered = (
+            ([_build_email_payload(s, variants[i], plain_template, base_url, secret, reply_to) for s, i in chunk], chunk)
+            for chunk in assigned_chunks()
+        )
 
-    emails_to_send = []
-    variants = []
-    unsubscribe_url_placeholder = "{{unsubscribe_url}}"
-    for s in subscribers:
-        if use_ab and random.random() < split_b:
-            variant = "b"
-            subject = _personalize(campaign.ab_subject_b, s)
-            raw_html = wrap_transactional_html(campaign.ab_html_body_b)
-        else:
-            variant = "a" if use_ab else None
-            subject = _personalize(campaign.subject, s)
-            raw_html = wrap_transactional_html(campaign.html_body)
-        unsubscribe_url = build_unsubscribe_url(base_url, secret, s.id) if base_url else "#"
-        html = _personalize(raw_html, s, extra={unsubscribe_url_placeholder: unsubscribe_url})
-        # Rewrite image URLs (localhost, /uploads/) to public base so images load for recipients
-        if base_url:
-            html = _rewrite_image_urls_for_email(html, base_url)
-        # Open/click tracking: pixel at /t/open and link wraps to /t/click when TRACKING_BASE_URL is set
-        if base_url:
-            html = inject_tracking_html(html, base_url, secret, campaign.id, s.id)
-        plain = _personalize(campaign.plain_body or "", s) if getattr(campaign, "plain_body", None) else None
-        if plain and not plain.strip():
-            plain = None
-        if plain is None:
-            plain = _html_to_plain(html)
-
-        # Minimal headers: avoid Precedence/list/bulk so Gmail is less likely to route to Promotions.
-        # List-Unsubscribe + List-Unsubscribe-Post only when we have an unsubscribe URL (required for one-click).
-        headers = {}
-        if base_url and unsubscribe_url and unsubscribe_url != "#":
-            headers["List-Unsubscribe"] = f"<{unsubscribe_url}>"
-            headers["List-Unsubscribe-Post"] = "List-Unsubscribe=One-Click"
-
-        payload = {
-            "to": s.email,
-            "subject": subject,
-            "html": html,
-            "text": plain,
-            "headers": headers,
-        }
-        if (reply_to := (settings.resend_reply_to or "").strip()):
-            payload["reply_to"] = reply_to
-        emails_to_send.append(payload)
-        variants.append((s.id, variant))
-
-    chunk_size = 100
     sent = 0
-    for i in range(0, len(emails_to_send), chunk_size):
-        chunk = emails_to_send[i : i + chunk_size]
-        sub_chunk = subscribers[i : i + chunk_size]
-        var_chunk = variants[i : i + chunk_size]
-        result = send_batch(chunk)
-        if result is None:
+    failed = False
+
+    def record(completed) -> None:
+        nonlocal sent, failed
+        for recipients, result in completed:
+            if result is None:
+                failed = True
+                continue
+            sent += _record_recipients(db, send, recipients, unit=unit)
+
+    # Keep up to campaign_send_concurrency batch calls in flight; bookkeeping stays on this thread/session.
+    with BatchDispatcher(send_batch, settings.campaign_send_concurrency) as dispatcher:
+        # Suppressed addresses are already excluded by the audience query
+        for emails_to_send, chunk in rendered:
+            record(dispatcher.ready())
+            if failed:
+                break
+            dispatcher.submit(
+                emails_to_send,
+                [(s.id, variants[i].name) for s, i in chunk],
+                idempotency_key=_chunk_idempotency_key(send, [s.id for s, _ in chunk]),
+            )
+        # Stop on the first hard failure, but still record chunks that were already in flight and succeeded.
+        record(dispatcher.drain())
+
+    if failed:
+        return sent, "Daily email quota reached" if governor.quota_exhausted() else "Resend send failed"
+    return sent, ""
+
+
+def _finish_send(db: Session, campaign: Campaign, send: CampaignSend) -> None:
+    """Mark a send completed (campaign sent) or failed (campaign back to draft only if nothing went out)."""
+    now = datetime.now(timezone.utc)
+    err = send.error_message or ""
+    if not err and send.sent_count == 0:
+        if _channel(campaign) == "whatsapp":
+            err = "No WhatsApp messages could be delivered"
+        else:
+            err = "No recipients after applying suppression list"
+    if err:
+        already_sent = db.query(exists().where(CampaignRecipient.campaign_id == campaign.id)).scalar()
+        if already_sent:
+            # Keep the campaign in "sending" so a plain re-send can't start over; resume continues where this stopped
+            err = f"{err}. {send.sent_count} recipients were sent; resume the campaign to send to the rest."
+        else:
             campaign.status = CampaignStatus.draft
+        send.status = "failed"
+        send.error_message = err
+        send.finished_at = now
+        db.commit()
+        return
+
+    send.status = "completed"
+    send.finished_at = now
+    campaign.status = CampaignStatus.sent
+    campaign.sent_at = now
+    db.commit()
+    event_emit(db, "campaign.sent", {"campaign_id": campaign.id, "sent_count": send.sent_count})
+    log_activity(db, "campaign.sent", "campaign", campaign.id, {"sent_count": send.sent_count})
+
+
+def _plan_send_units(db: Session, campaign: Campaign, send: CampaignSend) -> None:
+    """
+    Split the send's audience into subscriber id ranges of campaign_send_unit_size recipients (one index-range
+    query per boundary). A re-queued send keeps its ranges: every unfinished unit just goes back to pending.
+    """
+    existing = db.query(CampaignSendUnit.id).filter(CampaignSendUnit.send_id == send.id).first()
+    if existing:
+        db.query(CampaignSendUnit).filter(
+            CampaignSendUnit.send_id == send.id, CampaignSendUnit.status != "done"
+        ).update(
+            {"status": "pending", "worker": None, "error_message": None, "finished_at": None, "attempts": 0},
+            synchronize_session=False,
+        )
+        return
+    unit_size = max(1, get_settings().campaign_send_unit_size)
+    ids = _send_audience_query(db, campaign, send).with_entities(Subscriber.id)
+    ranges = []
+    after = 0
+    while True:
+        remaining = ids.filter(Subscriber.id > after)
+        end = remaining.order_by(Subscriber.id).offset(unit_size - 1).limit(1).scalar()
+        if end is None:
+            end = remaining.order_by(Subscriber.id.desc()).limit(1).scalar()
+            if end is not None:
+                ranges.append((after, end))
+            break
+        ranges.append((after, end))
+        after = end
+    if ranges:
+        db.execute(
+            insert(CampaignSendUnit).values(
+                [
+                    {
+                        "send_id": send.id,
+                        "campaign_id": send.campaign_id,
+                        "start_after_id": start_after,
+                        "end_id": end_id,
+                        "status": "pending",
+                        "sent_count": 0,
+                        "failed_count": 0,
+                    }
+                    for start_after, end_id in ranges
+                ]
+            )
+        )
+
+
+def _start_send(db: Session, send: CampaignSend) -> bool:
+    """Move a queued send to running and plan its work units. Returns False if its campaign is gone."""
+    campaign = db.query(Campaign).filter(Campaign.id == send.campaign_id).first()
+    if not campaign:
+        send.status = "failed"
+        send.error_message = "Campaign not found"
+        send.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        return False
+    _plan_send_units(db, campaign, send)
+    if send.total_count is None:
+        # Counted here rather than at enqueue, so queueing a large send doesn't hold up the request
+        send.total_count = _send_audience_query(db, campaign, send).count()
+    send.status = "running"
+    if not send.started_at:
+        send.started_at = datetime.now(timezone.utc)
+    campaign.status = CampaignStatus.sending
+    db.commit()
+    _finish_send_if_done(db, send.id)
+    return True
+
+
+def _claim_send_unit(db: Session, worker: str, send_id: int | None = None) -> CampaignSendUnit | None:
+    """
+    Claim the next pending unit of a running send with FOR UPDATE SKIP LOCKED, so concurrent workers never get the
+    same unit. A unit whose worker stopped heartbeating for campaign_send_stale_seconds is claimable again.
+    """
+    now = datetime.now(timezone.utc)
+    stale_before = now - timedelta(seconds=get_settings().campaign_send_stale_seconds)
+    query = (
+        db.query(CampaignSendUnit)
+        .join(CampaignSend, CampaignSend.id == CampaignSendUnit.send_id)
+        .filter(
+            CampaignSend.status == "running",
+            CampaignSend.error_message.is_(None),
+            or_(
+                CampaignSendUnit.status == "pending",
+                and_(CampaignSendUnit.status == "running", CampaignSendUnit.heartbeat_at < stale_before),
+            ),
+        )
+    )
+    if send_id is not None:
+        query = query.filter(CampaignSendUnit.send_id == send_id)
+    unit = query.order_by(CampaignSendUnit.id).with_for_update(of=CampaignSendUnit, skip_locked=True).first()
+    if not unit:
+        db.rollback()
+        return None
+    unit.status = "running"
+    unit.worker = worker
+    unit.heartbeat_at = now
+    db.commit()
+    return unit
+
+
+def _process_send_unit(db: Session, unit: CampaignSendUnit) -> None:
+    """Send one unit's id range; a hard failure stops the whole send (other workers claim no further units)."""
+    send = db.query(CampaignSend).filter(CampaignSend.id == unit.send_id).first()
+    campaign = db.query(Campaign).filter(Campaign.id == unit.campaign_id).first()
+    query = _send_audience_query(db, campaign, send).filter(
+        Subscriber.id > unit.start_after_id, Subscriber.id <= unit.end_id
+    )
+    if _channel(campaign) == "whatsapp":
+        _, err = _send_whatsapp_chunks(db, campaign, send, query, unit)
+    else:
+        _, err = _send_email_chunks(db, campaign, send, query, unit)
+    unit.status = "failed" if err else "done"
+    unit.error_message = err or None
+    unit.finished_at = datetime.now(timezone.utc)
+    if err:
+        db.execute(
+            update(CampaignSend)
+            .where(CampaignSend.id == send.id, CampaignSend.error_message.is_(None))
+            .values(error_message=err)
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+    _finish_send_if_done(db, unit.send_id)
+
+
+def _run_send_unit(db: Session, unit: CampaignSendUnit) -> None:
+    """
+    _process_send_unit with error handling: an exception rolls back, counts an attempt and puts the unit back to
+    pending; after campaign_send_max_attempts it marks the unit failed and stops the send with the error recorded,
+    instead of the unit going stale and being reclaimed forever.
+    """
+    unit_id = unit.id
+    try:
+        _process_send_unit(db, unit)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Campaign send unit {} failed: {}", unit_id, e)
+        unit = db.query(CampaignSendUnit).filter(CampaignSendUnit.id == unit_id).with_for_update().first()
+        if unit is None:
+            db.rollback()
+            return
+        unit.attempts += 1
+        err = f"Send unit failed: {e}"[:500]
+        unit.error_message = err
+        if unit.attempts < max(1, get_settings().campaign_send_max_attempts):
+            unit.status = "pending"
+            unit.worker = None
             db.commit()
-            return sent, "Resend send failed"
-        for (sub, (sub_id, variant)) in zip(sub_chunk, var_chunk):
-            rec = CampaignRecipient(
-                campaign_id=campaign.id,
-                subscriber_id=sub_id,
-                sent_at=datetime.now(timezone.utc),
-                variant=variant,
+            return
+        unit.status = "failed"
+        unit.finished_at = datetime.now(timezone.utc)
+        db.execute(
+            update(CampaignSend)
+            .where(CampaignSend.id == unit.send_id, CampaignSend.error_message.is_(None))
+            .values(error_message=err)
+            .execution_options(synchronize_session=False)
+        )
+        send_id = unit.send_id
+        db.commit()
+        _finish_send_if_done(db, send_id)
+
+
+def _finish_send_if_done(db: Session, send_id: int) -> None:
+    """Finalize the send once no unit is in progress and none is left to claim (or the send hit a hard failure)."""
+    send = (
+        db.query(CampaignSend)
+        .filter(CampaignSend.id == send_id, CampaignSend.status == "running")
+        .with_for_update()
+        .first()
+    )
+    if not send:
+        db.rollback()
+        return
+    open_statuses = ("running",) if send.error_message else ("pending", "running")
+    in_progress = db.query(
+        exists().where(CampaignSendUnit.send_id == send_id, CampaignSendUnit.status.in_(open_statuses))
+    ).scalar()
+    if in_progress:
+        db.rollback()
+        return
+    campaign = db.query(Campaign).filter(Campaign.id == send.campaign_id).first()
+    _finish_send(db, campaign, send)
+
+
+def _validate_send(db: Session, campaign: Campaign, recipient_ids: list[int] | None) -> str:
+    """Return an error message if the campaign can't be sent to this audience, else ""."""
+    if campaign.status != CampaignStatus.draft:
+        return "Campaign is not in draft status"
+
+    if _recipient_query(db, recipient_ids).first() is None:
+        return "No active subscribers to send to"
+
+    if _channel(campaign) == "whatsapp":
+        if _audience_query(db, campaign, recipient_ids).first() is None:
+            return "No recipients with a phone number. Add phone numbers to subscribers for WhatsApp campaigns."
+        settings = get_settings()
+        if not settings.twilio_account_sid or not settings.twilio_whatsapp_from:
+            return "WhatsApp is not configured. Set TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, and TWILIO_WHATSAPP_FROM."
+        if not _whatsapp_message(campaign):
+            return "WhatsApp campaign needs a message (plain body or subject)."
+    elif _audience_query(db, campaign, recipient_ids).first() is None:
+        return "No recipients after applying suppression list"
+    return ""
+
+
+def preflight_campaign_send(db: Session, campaign: Campaign, recipient_ids: list[int] | None) -> dict:
+    """
+    Count the audience a send would go to, without rendering anything: eligible recipients not yet sent, how many
+    of them have no usable email (missing or blank), how many the suppression list removes, and how many remain.
+    One query: each count is an aggregate FILTER over the same audience.
+    """
+    audience_query = _audience_query(db, campaign, recipient_ids, suppress=False)
+    if _channel(campaign) == "whatsapp":
+        audience = audience_query.count()
+        return {"audience": audience, "invalid": 0, "suppressed": 0, "recipients": audience}
+    blank = or_(Subscriber.email.is_(None), _normalized_email() == "")
+    by_email, by_domain = _suppression_matches()
+    audience, invalid, suppressed = audience_query.with_entities(
+        func.count(),
+        func.count().filter(blank),
+        func.count().filter(and_(~blank, or_(by_email, by_domain))),
+    ).one()
+    return {
+        "audience": audience,
+        "invalid": invalid,
+        "suppressed": suppressed,
+        "recipients": audience - invalid - suppressed,
+    }
+
+
+def enqueue_campaign_send(
+    db: Session,
+    campaign: Campaign,
+    recipient_ids: list[int] | None,
+) -> tuple[CampaignSend | None, str]:
+    """
+    Validate and queue a send job (CampaignSend with status "queued"); the campaign moves to "sending" right away
+    so it can't be queued twice. The draft -> sending move happens under a row lock (FOR UPDATE SKIP LOCKED), so a
+    manual send and schedulers on other nodes racing for the same campaign queue it exactly once; the losers get
+    an error. Workers run it via process_campaign_send_queue. Returns (send, error_message).
+    """
+    claimed = (
+        db.query(Campaign)
+        .filter(Campaign.id == campaign.id, Campaign.status == CampaignStatus.draft)
+        .with_for_update(skip_locked=True)
+        .populate_existing()
+        .first()
+    )
+    if not claimed:
+        db.rollback()
+        return None, "Campaign is not in draft status or is already being sent"
+    err = _validate_send(db, claimed, recipient_ids)
+    if err:
+        db.rollback()
+        return None, err
+    send = CampaignSend(
+        campaign_id=claimed.id,
+        status="queued",
+        recipient_filter=bool(recipient_ids),
+        sent_count=0,
+        failed_count=0,
+        batch_count=0,
+    )
+    db.add(send)
+    if recipient_ids:
+        db.flush()
+        # Stored once (one array parameter, unnested server-side); unit planning and chunk queries join against it
+        db.execute(
+            pg_insert(CampaignSendRecipient)
+            .from_select(
+                ["send_id", "subscriber_id"],
+                select(literal(send.id), func.unnest(literal(sorted(set(recipient_ids)), ARRAY(Integer)))),
             )
-            db.add(rec)
-            sent += 1
+            .on_conflict_do_nothing()
+        )
+    claimed.status = CampaignStatus.sending
+    db.commit()
+    db.refresh(send)
+    return send, ""
 
-    campaign.status = CampaignStatus.sent
-    campaign.sent_at = datetime.now(timezone.utc)
+
+def requeue_campaign_send(db: Session, campaign: Campaign) -> tuple[CampaignSend | None, str]:
+    """
+    Queue the campaign's latest failed (or crashed) send again: same audience, skipping everyone already journaled
+    as sent. A send still marked running is only taken over once it has made no progress for
+    campaign_send_stale_seconds. Returns (send, error_message).
+    """
+    send = (
+        db.query(CampaignSend)
+        .filter(CampaignSend.campaign_id == campaign.id)
+        .order_by(CampaignSend.id.desc())
+        .first()
+    )
+    if not send or send.status == "completed" or campaign.status == CampaignStatus.sent:
+        return None, "Campaign has no interrupted send to resume"
+    if send.status == "queued":
+        return None, "Campaign send is already queued"
+    if send.status == "running":
+        last_progress = send.last_batch_at or send.started_at
+        stale_after = timedelta(seconds=get_settings().campaign_send_stale_seconds)
+        if last_progress and datetime.now(timezone.utc) - last_progress < stale_after:
+            return None, "Campaign send is still in progress"
+    send.status = "queued"
+    send.error_message = None
+    send.finished_at = None
+    campaign.status = CampaignStatus.sending
     db.commit()
-    event_emit(db, "campaign.sent", {"campaign_id": campaign.id, "sent_count": sent})
-    log_activity(db, "campaign.sent", "campaign", campaign.id, {"sent_count": sent})
-    return sent, ""
+    db.refresh(send)
+    return send, ""
+
+
+def run_campaign_send(db: Session, send: CampaignSend, worker: str = "inline") -> tuple[int, str]:
+    """
+    Execute a queued send job in this process: plan its units, work through all of them, finalize.
+    Other workers may claim units of the same send meanwhile. Returns (sent_count, error_message).
+    """
+    send_id = send.id
+    if send.status == "queued":
+        claimed = (
+            db.query(CampaignSend)
+            .filter(CampaignSend.id == send_id, CampaignSend.status == "queued")
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if not claimed:
+            db.rollback()
+        elif not _start_send(db, claimed):
+            return 0, "Campaign not found"
+    while True:
+        unit = _claim_send_unit(db, worker, send_id=send_id)
+        if not unit:
+            break
+        _run_send_unit(db, unit)
+    send = db.query(CampaignSend).filter(CampaignSend.id == send_id).first()
+    if send.status == "running":
+        # Remaining units are being finished by other workers
+        return send.sent_count, ""
+    return send.sent_count, send.error_message or ""
+
+
+def process_campaign_send_queue(db: Session, worker: str, max_units: int = 1) -> int:
+    """
+    One worker iteration: start the oldest queued send (claimed with FOR UPDATE SKIP LOCKED and split into units),
+    then claim and send up to max_units units of any running send. Any number of worker processes or nodes can run
+    this concurrently; each unit is processed by exactly one of them. Returns the number of units processed.
+    """
+    send = (
+        db.query(CampaignSend)
+        .filter(CampaignSend.status == "queued")
+        .order_by(CampaignSend.id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if send:
+        _start_send(db, send)
+    else:
+        db.rollback()
+    processed = 0
+    for _ in range(max_units):
+        unit = _claim_send_unit(db, worker)
+        if not unit:
+            break
+        _run_send_unit(db, unit)
+        processed += 1
+    return processed
+
+
+def send_campaign(
+    db: Session,
+    campaign: Campaign,
+    recipient_ids: list[int] | None,
+) -> tuple[int, str]:
+    """
+    Send a campaign synchronously in the caller's thread (the API queues a job instead; see enqueue_campaign_send).
+    Recipients are streamed from the database in chunks of RECIPIENT_CHUNK_SIZE; each chunk is rendered, sent and
+    dropped before the next is read, so memory stays flat and the first batch goes out without waiting for the whole audience.
+    Every accepted chunk is journaled on a CampaignSend; after a provider failure or crash use resume_campaign_send.
+    Returns (sent_count, error_message). error_message is empty on full success.
+    """
+    send, err = enqueue_campaign_send(db, campaign, recipient_ids)
+    if err:
+        return 0, err
+    return run_campaign_send(db, send)
+
+
+def resume_campaign_send(db: Session, campaign: Campaign) -> tuple[int, str]:
+    """Synchronously continue an interrupted send (see requeue_campaign_send). Returns (sent_count, error_message)."""
+    send, err = requeue_campaign_send(db, campaign)
+    if err:
+        return 0, err
+    return run_campaign_send(db, send)
@@ -0,0 +1,148 @@
+"""
+Recipient-domain-aware pacing for campaign sends.
+
+Audiences stream in subscriber id order, so a big send hands gmail.com (or outlook.com, yahoo.com) whole runs of
+consecutive batches, which mailbox providers answer with deferrals and throttling. interleave_by_domain reads a
+window of recipients ahead, keeps one queue per recipient domain and builds each outgoing chunk round-robin
+across domains, so every batch mixes providers. DomainPacer optionally caps messages per minute per domain
+(CAMPAIGN_DOMAIN_RATE_LIMITS): a capped domain only gets into a chunk while its bucket has tokens, the others
+keep flowing meanwhile.
+
+The domain comes precomputed from SQL with each row (row.domain, split_part of the normalized email, as in the
+suppression domain check), so nothing here splits addresses.
+"""
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, Optional
+
+from app.config import get_settings
+
+_MAX_HOLD_SECONDS = 1.0  # longest a partly filled chunk waits for capped domains
+
+
+def parse_domain_limits(spec: str) -> Dict[str, float]:
+    """"gmail.com=3000, outlook.com=2000" -> {"gmail.com": 3000.0, "outlook.com": 2000.0} (messages per minute)."""
+    limits: Dict[str, float] = {}
+    for item in (spec or "").split(","):
+        domain, _, value = item.partition("=")
+        domain = domain.strip().lower().lstrip("@")
+        if domain and value.strip():
+            limits[domain] = float(value)
+    return limits
+
+
+class DomainPacer:
+    """Per-domain token buckets (messages per minute, burst of one second's worth). Domains without a cap are unlimited."""
+
+    def __init__(self, limits: Dict[str, float], default_limit: float = 0):
+        self._limits = limits
+        self._default = default_limit
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, List[float]] = {}  # domain -> [tokens, updated]
+
+    @classmethod
+    def from_settings(cls) -> "DomainPacer":
+        settings = get_settings()
+        return cls(parse_domain_limits(settings.campaign_domain_rate_limits), settings.campaign_domain_default_rate)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._limits) or self._default > 0
+
+    def _rate(self, domain: str) -> float:
+        """Tokens per second for the domain; 0 = unlimited."""
+        return self._limits.get(domain, self._default) / 60.0
+
+    def try_take(self, domain: str) -> bool:
+        rate = self._rate(domain)
+        if rate <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                bucket = self._buckets[domain] = [max(1.0, rate), now]
+            bucket[0] = min(max(1.0, rate), bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True
+            return False
+
+    def wait_time(self, domains: Iterable[str]) -> float:
+        """Seconds until at least one of the domains may take a message."""
+        waits = []
+        with self._lock:
+            now = time.monotonic()
+            for domain in domains:
+                rate = self._rate(domain)
+                bucket = self._buckets.get(domain)
+                if rate <= 0 or bucket is None:
+                    return 0.0
+                tokens = bucket[0] + (now - bucket[1]) * rate
+                waits.append(max(0.0, (1 - tokens) / rate))
+        return min(waits) if waits else 0.0
+
+
+def interleave_by_domain(
+    chunks: Iterable[list],
+    chunk_size: int,
+    window: int,
+    pacer: Optional[DomainPacer] = None,
+) -> Iterator[list]:
+    """
+    Re-chunk a stream of recipient rows (each with a .domain) so consecutive rows rotate across domains.
+    Up to window rows are buffered; with a pacer, rows of a domain over its cap wait in its queue (sleeping
+    only when every buffered domain is capped). Every row is yielded exactly once, in chunks of chunk_size
+    except the last one and any chunk that waited _MAX_HOLD_SECONDS on capped domains.
+    """
+    queues: Dict[str, Deque] = {}
+    order: Deque[str] = deque()  # domains with queued rows, in round-robin order
+    buffered = 0
+    source = iter(chunks)
+    exhausted = False
+    out: list = []
+    out_started = time.monotonic()
+    while True:
+        while not exhausted and buffered < window:
+            rows = next(source, None)
+            if rows is None:
+                exhausted = True
+                break
+            for row in rows:
+                queue = queues.get(row.domain)
+                if queue is None:
+                    queue = queues[row.domain] = deque()
+                    order.append(row.domain)
+                queue.append(row)
+            buffered += len(rows)
+        skipped = 0  # consecutive domains passed over because they are at their cap
+        while len(out) < chunk_size and order and skipped < len(order):
+            domain = order[0]
+            if pacer is not None and not pacer.try_take(domain):
+                order.rotate(-1)
+                skipped += 1
+                continue
+            skipped = 0
+            queue = queues[domain]
+            out.append(queue.popleft())
+            buffered -= 1
+            if queue:
+                order.rotate(-1)
+            else:
+                order.popleft()
+                del queues[domain]
+        # Only capped rows left: keep filling the chunk as tokens come, but don't hold it for more than a second
+        if len(out) >= chunk_size or (out and (not order or time.monotonic() - out_started >= _MAX_HOLD_SECONDS)):
+            yield out
+            out = []
+            out_started = time.monotonic()
+        elif not order:
+            if exhausted:
+                return
+        else:
+            time.sleep(min(_MAX_HOLD_SECONDS, max(0.01, pacer.wait_time(order) if pacer is not None else 0.01)))
+
+
+domain_pacer = DomainPacer.from_settings()
@@ -0,0 +1,204 @@
+"""
+HTML scanning for campaign render plans.
+
+scan_html makes the compile-time pass over a variant's markup: it rewrites local image src values to the public base
+URL, records every href attribute and finds where the open pixel goes. It replaces the chain of whole-document
+regexes (image rewrite, the DOTALL href regex, the <body> search) that campaign_render used to compile with.
+Candidate attributes are found with literal searches over a lowercased copy (the regex engine's fast path) and each
+is checked against the tag around it: Python only runs per href/src, and href/src text in the body copy is left alone.
+
+html_to_plain builds the plain-text alternative once per variant (personalized per recipient from that text, not
+derived from each rendered email), with one compiled-regex or str pass over the whole text per step.
+"""
+import re
+from bisect import bisect_right
+from html import escape, unescape
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+# Attributes of a tag up to its closing '>', skipping '>' inside quoted values
+_ATTRS = r"[^>\"']*(?:(?:\"[^\"]*\"|'[^']*')[^>\"']*)*"
+# A tag: name (optionally "/name") then attributes
+_TAG_RE = re.compile(r"<(/?[^\s/>]+)(" + _ATTRS + r")>")
+_ATTRS_RE = re.compile(_ATTRS)
+# A tag from its '<' up to a point in its attributes that is not inside a quoted value
+_TAG_PREFIX_RE = re.compile(r"</?[^\s/>]+" + _ATTRS)
+# The rest of a quoted href/src attribute from just past its name: the spaces around '=' (groups 1 and 2), then the
+# value in double (3) or single (4) quotes
+_ATTR_VALUE_RE = re.compile(r"(\s*)=(\s*)(?:\"([^\"]*)\"|'([^']*)')")
+# Can any '<' in the document sit inside a quoted attribute value (only then can a tag start be misread)?
+_QUOTED_LT_RE = re.compile(r"=\s*(?:\"[^\"]*<|'[^']*<)")
+_HREF_RE = re.compile("href")
+_SRC_RE = re.compile("src")
+_ASCII_LOWER = {code: code + 32 for code in range(ord("A"), ord("Z") + 1)}
+
+# Plain text: elements whose content is not body text, tags that start or end a line, list items, links
+_NO_TEXT_RE = re.compile(r"<(head|title|style|script)(?=[\s/>])" + _ATTRS + r">.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_BLOCK_TAGS = r"p|div|ul|ol|table|h[1-6]|blockquote"
+_LINE_BREAK_RE = re.compile(r"<(?:br|hr|/tr|/?(?:" + _BLOCK_TAGS + r"))(?=[\s/>])" + _ATTRS + ">", re.IGNORECASE)
+_LIST_ITEM_RE = re.compile(r"<li(?=[\s/>])" + _ATTRS + ">", re.IGNORECASE)
+_LINK_RE = re.compile(r"<[aA](?=[\s/>])(" + _ATTRS + r")>([^<]*(?:<(?!/[aA][\s>])[^<]*)*)</[aA]\s*>")
+_NBSP_RUN_RE = re.compile(r" *\xa0[\xa0 ]*")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+class HtmlScan(NamedTuple):
+    html: str  # input with image src values rewritten
+    links: List[Tuple[int, int, str, str]]  # (start, end, quote_char, value) of each quoted href="..." in html
+    body_open_end: Optional[int]  # index just past the first <body ...> tag
+    body_close: Optional[int]  # index of the first "</body>" when there is no <body> tag
+
+
+def _public_image_url(url: str, base: str) -> Optional[str]:
+    """Public URL for a local upload (relative /uploads/ or localhost), or None to leave the src as is."""
+    url = url.strip()
+    if not url or "/t/open" in url:
+        return None
+    if url.startswith("/") and "/uploads/" in url:
+        return f"{base}{url}"
+    if ("localhost" in url.lower() or "127.0.0.1" in url) and "/uploads/" in url:
+        return base + "/uploads/" + url.split("/uploads/", 1)[-1].split("?")[0].split("#")[0]
+    return None
+
+
+def _lower(html: str) -> str:
+    """html lowercased with every index unchanged, so it can be searched with literal patterns."""
+    lowered = html.lower()
+    # A few non-ASCII characters lowercase to two code points; then only ASCII letters are folded
+    return lowered if len(lowered) == len(html) else html.translate(_ASCII_LOWER)
+
+
+def _attribute_check(lowered: str) -> Callable[[int], bool]:
+    """in_tag(pos) for lowered: whether pos is in the attributes of a tag, outside any quoted value."""
+    if _QUOTED_LT_RE.search(lowered) is None:
+
+        def in_tag(pos: int) -> bool:
+            start = lowered.rfind("<", 0, pos)
+            return start >= 0 and _TAG_PREFIX_RE.fullmatch(lowered, start, pos) is not None
+
+        return in_tag
+
+    # Some '<' sits inside a quoted value, so the nearest '<' may not start a tag: tokenize the document instead
+    spans = [tag.span(2) for tag in _TAG_RE.finditer(lowered)]
+    starts = [start for start, _ in spans]
+
+    def in_tag(pos: int) -> bool:
+        k = bisect_right(starts, pos) - 1
+        return k >= 0 and pos <= spans[k][1] and _ATTRS_RE.fullmatch(lowered, spans[k][0], pos) is not None
+
+    return in_tag
+
+
+def scan_html(html: str, image_base_url: str = "") -> HtmlScan:
+    """
+    Scan html once. With image_base_url, src="..." values pointing at local uploads are made absolute.
+    Attributes are matched within the tag they belong to, so a '>' inside a quoted value is handled, and href/src
+    text in the body copy or inside another attribute's value is left alone.
+    """
+    base = image_base_url.rstrip("/") if image_base_url else ""
+    lowered = _lower(html)
+    in_tag = _attribute_check(lowered)
+    name_ends = [m.end() for m in _HREF_RE.finditer(lowered)]
+    if base:
+        name_ends = sorted(name_ends + [m.end() for m in _SRC_RE.finditer(lowered)])
+
+    out: List[str] = []
+    shift = 0  # output length minus input length so far (image URLs rewritten before this point)
+    copied = 0  # input index up to which html has been copied to out
+    links: List[Tuple[int, int, str, str]] = []
+    rewrites: List[Tuple[int, int]] = []  # (input index after a rewritten src, shift from then on)
+    for name_end in name_ends:
+        attr = _ATTR_VALUE_RE.match(lowered, name_end)
+        if attr is None or not in_tag(name_end):
+            continue
+        group = 3 if attr.start(3) >= 0 else 4
+        quote = lowered[attr.start(group) - 1]
+        value = html[attr.start(group) : attr.end(group)]
+        value_end = attr.end()  # just past the closing quote
+        if lowered[name_end - 1] == "f":
+            if value:
+                links.append((name_end - 4 + shift, value_end + shift, quote, value))
+        elif not attr.group(1) and not attr.group(2) and ("'" if quote == '"' else '"') not in value:
+            new_url = _public_image_url(value, base)
+            if new_url is not None:
+                start = name_end - 3
+                replacement = f"src={quote}{new_url}{quote}"
+                out.append(html[copied:start])
+                out.append(replacement)
+                copied = value_end
+                shift += len(replacement) - (value_end - start)
+                rewrites.append((value_end, shift))
+    out.append(html[copied:])
+
+    def output_index(index: int) -> int:
+        return index + next((after for end, after in reversed(rewrites) if end <= index), 0)
+
+    body_open_end = body_close = None
+    pos = lowered.find("<body")
+    while pos >= 0:
+        tag = _TAG_RE.match(lowered, pos)
+        if tag is not None and tag.group(1) == "body":
+            body_open_end = output_index(tag.end())
+            break
+        pos = lowered.find("<body", pos + 5)
+    if body_open_end is None:
+        pos = lowered.find("</body>")
+        if pos >= 0:
+            body_close = output_index(pos)
+    return HtmlScan("".join(out), links, body_open_end, body_close)
+
+
+def _link_href(attrs: str) -> Optional[str]:
+    """Destination of an <a> tag with these attributes, if it is worth showing in the plain text."""
+    lowered = _lower(attrs)
+    pos = lowered.find("href")
+    while pos >= 0:
+        attr = _ATTR_VALUE_RE.match(lowered, pos + 4)
+        if attr is not None and _ATTRS_RE.fullmatch(lowered, 0, pos):
+            group = 3 if attr.start(3) >= 0 else 4
+            href = attrs[attr.start(group) : attr.end(group)].strip()
+            if "&" in href:
+                href = unescape(href)
+            return href if href.startswith(("http://", "https://", "{{")) else None
+        pos = lowered.find("href", pos + 4)
+    return None
+
+
+def _link_text(match: re.Match) -> str:
+    """A link's content followed by its destination, e.g. "Read more (https://example.com/a)"."""
+    content = match.group(2)
+    href = _link_href(match.group(1))
+    if href is None:
+        return content
+    label = _TAG_RE.sub("", content) if "<" in content else content
+    if "&" in label:
+        label = " ".join(unescape(label).split())
+    label = label.strip()
+    if label == href:
+        return content
+    if "&" in href or "<" in href:
+        href = escape(href, quote=False)  # the whole text is unescaped once more afterwards
+    return f"{content} ({href})" if label else f"{content} {href} "
+
+
+def _escape_attribute_lt(tag: re.Match) -> str:
+    return f"<{tag.group(1)}{tag.group(2).replace('<', '&lt;')}>"
+
+
+def html_to_plain(html: str) -> str:
+    """
+    Readable text for the multipart plain-text alternative: text outside head/style/script, whitespace collapsed as
+    a browser would, entities decoded, a line break at <br> and around block elements, list items as "- ", at most one blank line in a row.
+    A link is followed by its destination as written in the source (not a tracking URL), e.g. "Read more
+    (https://example.com/a)"; {{unsubscribe_url}} stays a placeholder to personalize per recipient.
+    """
+    if _QUOTED_LT_RE.search(html):
+        # Keep a '<' inside an attribute value from being read as a tag by the passes below
+        html = _TAG_RE.sub(_escape_attribute_lt, html)
+    text = " ".join(_NO_TEXT_RE.sub("", html).split())
+    text = _LINK_RE.sub(_link_text, text)
+    text = _LIST_ITEM_RE.sub("\n- ", _LINE_BREAK_RE.sub("\n", text))
+    text = _TAG_RE.sub("", text)
+    if "&" in text:
+        text = _NBSP_RUN_RE.sub(" ", unescape(text))
+    lines = "\n".join(map(str.strip, text.split("\n")))
+    return _BLANK_LINES_RE.sub("\n\n", lines).strip()
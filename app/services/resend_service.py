@@ -1,11 +1,15 @@
+import time
 from email.utils import formataddr
-from typing import List, Optional
+from typing import Any, Callable, List, Optional
 
 import resend
 from loguru import logger
+from resend.exceptions import RateLimitError, ResendError
 from resend.exceptions import ValidationError as ResendValidationError
 
 from app.config import get_settings
+from app.services.send_governor import BULK, TRANSACTIONAL, SendGovernor
+from app.services.shared_send_governor import SharedSendGovernor
 
 settings = get_settings()
 if settings.resend_api_key:
@@ -39,6 +43,94 @@ def _apply_sandbox_redirect(from_addr: str, to: str | List[str]) -> List[str]:
     return [settings.resend_sandbox_redirect]
 
 
+# Pace and quota for every Resend call. Transactional emails (send_email) and campaign batches (send_batch) wait in
+# separate lanes; transactional gets the larger weight and a reserve bulk can't use. With RESEND_GOVERNOR_SHARED the
+# limits are kept in Postgres and shared by the API and every campaign send worker; otherwise each process has its own.
+_governor_limits = dict(
+    requests_per_second=settings.resend_requests_per_second,
+    messages_per_day=settings.resend_messages_per_day,
+    weights={TRANSACTIONAL: settings.resend_transactional_weight, BULK: 1.0},
+    reserved_tokens=settings.resend_transactional_reserve,
+    reserved_daily=int(settings.resend_messages_per_day * settings.resend_transactional_daily_share),
+)
+governor = (
+    SharedSendGovernor("resend", **_governor_limits)
+    if settings.resend_governor_shared
+    else SendGovernor(**_governor_limits)
+)
+
+
+def _retry_after(error: RateLimitError) -> float:
+    """Seconds to wait from the 429's Retry-After (or ratelimit-reset) header; 1s if absent or unparseable."""
+    headers = {k.lower(): v for k, v in (getattr(error, "headers", None) or {}).items()}
+    for name in ("retry-after", "ratelimit-reset"):
+        try:
+            return max(0.0, float(headers[name]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return 1.0
+
+
+_IDEMPOTENT_RETRIES = 2  # extra attempts for a keyed request after a network error, 5xx or 409 (same key in flight)
+
+
+def _is_transient(error: Exception) -> bool:
+    """Network failure (the SDK wraps it in RuntimeError), server error, or the same idempotency key still in flight."""
+    if isinstance(error, ResendError):
+        try:
+            code = int(error.code)
+        except (TypeError, ValueError):
+            return False
+        return code >= 500 or (code == 409 and error.error_type == "concurrent_idempotent_requests")
+    return isinstance(error, RuntimeError)
+
+
+def _governed_call(call: Callable[[], Any], messages: int, lane: str, idempotent: bool = False) -> Any:
+    """
+    Run one Resend request under the governor. Rate-limited requests are retried (after Retry-After) up to
+    RESEND_RATE_LIMIT_RETRIES times; other errors and an exhausted daily quota propagate to the caller.
+    An idempotent request (one carrying an Idempotency-Key) is also retried after transient failures: if the
+    first attempt did reach Resend, the retry gets its response back instead of sending twice.
+    """
+    if not governor.reserve_messages(messages, lane):
+        raise RateLimitError(
+            message="Daily message quota (RESEND_MESSAGES_PER_DAY) reached",
+            error_type="daily_quota_exceeded",
+            code=429,
+        )
+    attempt = transient_attempt = 0
+    try:
+        while True:
+            governor.acquire(lane)
+            try:
+                result = call()
+            except RateLimitError as e:
+                if e.error_type in ("daily_quota_exceeded", "monthly_quota_exceeded"):
+                    governor.on_quota_exceeded()
+                    raise
+                attempt += 1
+                if attempt > settings.resend_rate_limit_retries:
+                    raise
+                wait = _retry_after(e)
+                governor.on_rate_limited(wait)
+                logger.warning(
+                    "Resend rate limited; retrying in {:.1f}s at {:.2f} req/s (attempt {})", wait, governor.rate, attempt
+                )
+                continue
+            except Exception as e:
+                if not idempotent or not _is_transient(e) or transient_attempt >= _IDEMPOTENT_RETRIES:
+                    raise
+                transient_attempt += 1
+                logger.warning("Resend request failed ({}); retrying with the same idempotency key", e)
+                time.sleep(transient_attempt)
+                continue
+            governor.on_success()
+            return result
+    except Exception:
+        governor.release_messages(messages)
+        raise
+
+
 def send_email(
     to: str | List[str],
     subject: str,
@@ -60,18 +152,25 @@ def send_email(
     if settings.resend_reply_to and settings.resend_reply_to.strip():
         params["reply_to"] = settings.resend_reply_to.strip()
     try:
-        result = resend.Emails.send(params)
+        result = _governed_call(lambda: resend.Emails.send(params), len(recipients), TRANSACTIONAL)
         return result
     except ResendValidationError as e:
         logger.error("Resend validation failed: {}. {}", e, _SANDBOX_HINT)
         raise
+    except RateLimitError as e:
+        logger.error("Resend send rate limited, giving up: {}", e)
+        return None
     except Exception as e:
         logger.exception("Resend send failed: {}", e)
         return None
 
 
-def send_batch(emails: List[dict]) -> Optional[dict]:
-    """Send batch of emails. Each item: { "to": str, "subject": str, "html": str, "text": str (optional), "headers": dict (optional) }. Returns Resend batch response or None."""
+def send_batch(emails: List[dict], idempotency_key: Optional[str] = None) -> Optional[dict]:
+    """
+    Send batch of emails. Each item: { "to": str, "subject": str, "html": str, "text": str (optional), "headers": dict (optional) }. Returns Resend batch response or None.
+    With idempotency_key (sent as the Idempotency-Key header), Resend accepts the batch once: a retry or a second
+    worker sending the same key gets the original response instead of delivering again (keys live for 24 hours).
+    """
     if not settings.resend_api_key:
         logger.warning("RESEND_API_KEY not set; skipping batch send")
         return None
@@ -92,11 +191,15 @@ def send_batch(emails: List[dict]) -> Optional[dict]:
             p["reply_to"] = e["reply_to"]
         params_list.append(p)
     try:
-        result = resend.Batch.send(params_list)
+        options = {"idempotency_key": idempotency_key} if idempotency_key else None
+        result = _governed_call(lambda: resend.Batch.send(params_list, options), len(params_list), BULK, bool(options))
         return result
     except ResendValidationError as e:
         logger.error("Resend validation failed: {}. {}", e, _SANDBOX_HINT)
         raise
+    except RateLimitError as e:
+        logger.error("Resend batch send rate limited, giving up: {}", e)
+        return None
     except Exception as e:
         logger.exception("Resend batch send failed: {}", e)
         return None
@@ -0,0 +1,172 @@
+"""Token-bucket pacing with AIMD backoff, priority lanes and a daily message quota, for provider send calls (Resend, Twilio)."""
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+TRANSACTIONAL = "transactional"  # booking confirmations, reminders, automation steps
+BULK = "bulk"  # campaign batches
+
+
+class SendGovernor:
+    """
+    Paces provider calls to the account's limits. A token bucket admits requests at the current rate, which
+    starts at requests_per_second (0 = unpaced) and adapts AIMD-style: halved on every 429 (and paused for
+    Retry-After), then raised by a twentieth of the configured rate per successful request until it is back at
+    the maximum. messages_per_day (0 = no limit) caps the messages handed over per UTC day. One instance is shared
+    by every sending thread of the process and keeps its state in memory; SharedSendGovernor
+    (app.services.shared_send_governor) keeps the same state in Postgres for limits that span processes.
+
+    Callers wait in lanes. When several are waiting, the next token goes by weighted fair queuing (start-time
+    tags, so a lane with weight 4 gets four requests through for each one of a weight-1 lane while both are
+    backlogged). Lanes other than TRANSACTIONAL may not use the last reserved_tokens of the bucket nor the last
+    reserved_daily messages of the quota, so a transactional email finds capacity ready even mid-blast.
+    """
+
+    _MIN_RATE = 0.1  # requests/sec floor while backing off
+
+    def __init__(
+        self,
+        requests_per_second: float,
+        messages_per_day: int = 0,
+        weights: Optional[Dict[str, float]] = None,
+        reserved_tokens: int = 0,
+        reserved_daily: int = 0,
+    ):
+        self._lock = threading.RLock()  # reentrant so a subclass can hold it around the public methods
+        self._cond = threading.Condition(self._lock)
+        self._max_rate = float(requests_per_second or 0)
+        self._messages_per_day = int(messages_per_day or 0)
+        self._weights = dict(weights or {})
+        self._reserved_tokens = max(0, int(reserved_tokens or 0))
+        self._reserved_daily = max(0, int(reserved_daily or 0))
+        self._rate = self._max_rate
+        self._tokens = 1.0 + self._reserved_tokens
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        # Fair queuing state: waiting tickets (tag, seq, lane), last tag handed out per lane, virtual time
+        self._waiting: List[Tuple[float, int, str]] = []
+        self._last_tag: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._seq = 0
+        self._day = None
+        self._day_count = 0
+        self._day_exhausted = False
+        self._bulk_exhausted = False
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def _now(self) -> float:
+        return time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        # Burst is one second's worth of requests (at least one) plus the transactional reserve
+        capacity = max(1.0, self._rate) + self._reserved_tokens
+        self._tokens = min(capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def _needed(self, lane: str) -> float:
+        return 1.0 if lane == TRANSACTIONAL else 1.0 + self._reserved_tokens
+
+    def _next_ticket(self) -> Optional[Tuple[float, int, str]]:
+        """The waiting ticket to serve next: lowest tag among those the current tokens can admit, else lowest tag."""
+        eligible = [t for t in self._waiting if self._tokens >= self._needed(t[2])]
+        pool = eligible or self._waiting
+        return min(pool) if pool else None
+
+    def acquire(self, lane: str = BULK) -> None:
+        """Block until a request in this lane may be made."""
+        with self._cond:
+            self._seq += 1
+            tag = max(self._virtual_time, self._last_tag.get(lane, 0.0)) + 1.0 / self._weights.get(lane, 1.0)
+            self._last_tag[lane] = tag
+            ticket = (tag, self._seq, lane)
+            self._waiting.append(ticket)
+            try:
+                while True:
+                    wait = self._admit(ticket)
+                    if wait <= 0:
+                        self._virtual_time = max(self._virtual_time, tag)
+                        return
+                    self._cond.wait(wait)
+            finally:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+
+    def _admit(self, ticket: Tuple[float, int, str]) -> float:
+        """Take a token for this waiting ticket (0 returned) or return the seconds to wait before trying again."""
+        now = self._now()
+        self._refill(now)
+        wait = self._paused_until - now
+        if wait > 0:
+            return wait
+        if self._max_rate <= 0:
+            # Unpaced: admit at once, the lanes only matter while paused
+            return 0.0
+        if self._next_ticket() is ticket and self._tokens >= self._needed(ticket[2]):
+            self._tokens -= 1
+            return 0.0
+        # Until the next ticket (of any lane) can be admitted; if one already can, let it go first
+        wait = (min(self._needed(t[2]) for t in self._waiting) - self._tokens) / self._rate
+        if wait <= 0:
+            self._cond.notify_all()
+            wait = 0.01
+        return wait
+
+    def _roll_day(self) -> None:
+        today = datetime.now(timezone.utc).date()
+        if today != self._day:
+            self._day = today
+            self._day_count = 0
+            self._day_exhausted = False
+            self._bulk_exhausted = False
+
+    def reserve_messages(self, count: int, lane: str = BULK) -> bool:
+        """Count messages against today's quota. False (nothing reserved, quota treated as used up) if they would exceed it."""
+        with self._lock:
+            self._roll_day()
+            if self._day_exhausted:
+                return False
+            if self._messages_per_day > 0:
+                if lane == TRANSACTIONAL:
+                    if self._day_count + count > self._messages_per_day:
+                        self._day_exhausted = True
+                        return False
+                elif self._bulk_exhausted or self._day_count + count > self._messages_per_day - self._reserved_daily:
+                    # Only the non-transactional share is used up; transactional mail may still go out today
+                    self._bulk_exhausted = True
+                    return False
+            self._day_count += count
+            return True
+
+    def release_messages(self, count: int) -> None:
+        """Give back a reservation for messages the provider did not accept."""
+        with self._lock:
+            self._day_count = max(0, self._day_count - count)
+
+    def quota_exhausted(self, lane: str = BULK) -> bool:
+        """True once today's message quota for this lane is used up, locally or as reported by the provider."""
+        with self._lock:
+            self._roll_day()
+            return self._day_exhausted or (lane != TRANSACTIONAL and self._bulk_exhausted)
+
+    def on_success(self) -> None:
+        if self._max_rate <= 0:
+            return
+        with self._lock:
+            self._rate = min(self._max_rate, self._rate + self._max_rate / 20)
+
+    def on_rate_limited(self, retry_after: float) -> None:
+        with self._cond:
+            if self._max_rate > 0:
+                self._rate = max(self._MIN_RATE, self._rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            self._paused_until = max(self._paused_until, self._now() + retry_after)
+
+    def on_quota_exceeded(self) -> None:
+        """The provider reported its quota as used up: refuse further messages until the next UTC day."""
+        with self._lock:
+            self._roll_day()
+            self._day_exhausted = True
@@ -0,0 +1,116 @@
+"""
+SendGovernor whose token bucket, backoff and daily quota live in Postgres, so every process sending through one
+provider account (the API, any number of campaign send workers) draws from the same limits.
+
+Each admission, quota reservation and rate change locks the account's send_governor_state row, loads it into the
+governor, runs the in-memory logic of SendGovernor on it and writes it back, all in one short transaction. The
+lane rules carry over across processes: a campaign batch in a worker still cannot take the tokens or the share of
+the daily quota reserved for transactional mail sent by the API. Fair queuing between lanes (the weights) applies
+among the threads of one process. Times come from the database clock, so hosts need not agree on theirs.
+"""
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.database import SessionLocal
+from app.models.send_governor import SendGovernorState
+from app.services.send_governor import BULK, SendGovernor
+
+
+class SharedSendGovernor(SendGovernor):
+    """SendGovernor over the send_governor_state row `name`; same arguments and methods."""
+
+    def __init__(self, name: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._name = name
+        self._db_now = 0.0
+
+    def _now(self) -> float:
+        return self._db_now
+
+    @contextmanager
+    def _shared(self) -> Iterator[None]:
+        """Hold the state row locked with its values loaded into self; write them back on success."""
+        db = SessionLocal()
+        try:
+            row = self._locked_row(db)
+            if row is None:
+                db.execute(
+                    pg_insert(SendGovernorState)
+                    .values(
+                        name=self._name,
+                        tokens=1.0 + self._reserved_tokens,
+                        rate=self._max_rate,
+                        updated_at=func.clock_timestamp(),
+                        day_count=0,
+                        day_exhausted=False,
+                        bulk_exhausted=False,
+                    )
+                    .on_conflict_do_nothing(index_elements=["name"])
+                )
+                row = self._locked_row(db)
+            self._db_now = db.execute(select(func.clock_timestamp())).scalar().timestamp()
+            self._tokens = row.tokens
+            self._rate = min(row.rate, self._max_rate)
+            self._updated = row.updated_at.timestamp()
+            self._paused_until = row.paused_until.timestamp() if row.paused_until else 0.0
+            self._day = row.day
+            self._day_count = row.day_count
+            self._day_exhausted = row.day_exhausted
+            self._bulk_exhausted = row.bulk_exhausted
+            yield
+            row.tokens = self._tokens
+            row.rate = self._rate
+            row.updated_at = datetime.fromtimestamp(self._updated, timezone.utc)
+            row.paused_until = datetime.fromtimestamp(self._paused_until, timezone.utc) if self._paused_until else None
+            row.day = self._day
+            row.day_count = self._day_count
+            row.day_exhausted = self._day_exhausted
+            row.bulk_exhausted = self._bulk_exhausted
+            db.commit()
+        finally:
+            db.close()
+
+    def _locked_row(self, db) -> SendGovernorState:
+        return (
+            db.query(SendGovernorState)
+            .filter(SendGovernorState.name == self._name)
+            .with_for_update()
+            .populate_existing()
+            .first()
+        )
+
+    def _admit(self, ticket: Tuple[float, int, str]) -> float:
+        # Called by acquire() with the lock held
+        with self._shared():
+            return super()._admit(ticket)
+
+    def reserve_messages(self, count: int, lane: str = BULK) -> bool:
+        with self._lock, self._shared():
+            return super().reserve_messages(count, lane)
+
+    def release_messages(self, count: int) -> None:
+        with self._lock, self._shared():
+            super().release_messages(count)
+
+    def quota_exhausted(self, lane: str = BULK) -> bool:
+        with self._lock, self._shared():
+            return super().quota_exhausted(lane)
+
+    def on_success(self) -> None:
+        # Nothing to raise while the rate last seen is at the maximum; saves a round trip per request
+        if self._max_rate <= 0 or self._rate >= self._max_rate:
+            return
+        with self._lock, self._shared():
+            super().on_success()
+
+    def on_rate_limited(self, retry_after: float) -> None:
+        with self._lock, self._shared():
+            super().on_rate_limited(retry_after)
+
+    def on_quota_exceeded(self) -> None:
+        with self._lock, self._shared():
+            super().on_quota_exceeded()
@@ -0,0 +1,131 @@
+"""
+In-process suppression index for one-off sends (automations, booking emails).
+
+Campaign sends filter the suppression list in SQL; single transactional emails would pay a query each, so
+instead every process keeps the normalized suppressed emails and domains in two hash sets. The sets are loaded
+once, then refreshed at most every SUPPRESSION_REFRESH_SECONDS with one cheap query: new rows are picked up
+by id watermark, and a row count that no longer adds up (an entry was deleted) triggers a full reload.
+routers/suppression.py invalidates the index on every change, so this process sees its own edits immediately.
+Checks are O(1) set lookups and run no query between refreshes.
+"""
+import threading
+import time
+
+from loguru import logger
+from sqlalchemy import func
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.suppression import SuppressionEntry, SuppressionType
+
+
+def normalize_email(email: str | None) -> str:
+    return (email or "").strip().lower()
+
+
+def normalize_domain(domain: str | None) -> str:
+    domain = (domain or "").strip().lower()
+    return domain[1:] if domain.startswith("@") else domain
+
+
+class SuppressionIndex:
+    """Suppressed emails and domains held in memory, refreshed incrementally."""
+
+    def __init__(self, refresh_seconds: float | None = None):
+        self._refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._emails: set[str] = set()
+        self._domains: set[str] = set()
+        self._max_id = 0
+        self._count = 0
+        self._loaded = False
+        self._checked_at = 0.0
+
+    @property
+    def refresh_seconds(self) -> float:
+        if self._refresh_seconds is not None:
+            return self._refresh_seconds
+        return get_settings().suppression_refresh_seconds
+
+    def invalidate(self) -> None:
+        """Force a full reload on the next check (call after adding or removing entries)."""
+        with self._lock:
+            self._loaded = False
+
+    def is_suppressed(self, email: str | None) -> bool:
+        """True if the address or its domain is on the suppression list. Empty addresses count as suppressed."""
+        email = normalize_email(email)
+        if not email:
+            return True
+        self._ensure_fresh()
+        if email in self._emails:
+            return True
+        return "@" in email and email.split("@", 1)[1] in self._domains
+
+    def stats(self) -> dict:
+        return {"emails": len(self._emails), "domains": len(self._domains), "max_id": self._max_id}
+
+    # --- loading ---
+
+    def _ensure_fresh(self) -> None:
+        if self._loaded and time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+        with self._lock:
+            if self._loaded and time.monotonic() - self._checked_at < self.refresh_seconds:
+                return
+            try:
+                self._refresh()
+            except Exception as e:
+                # Keep serving the last known sets; the next check retries
+                logger.warning("Suppression index refresh failed: {}", e)
+            self._checked_at = time.monotonic()
+
+    def _refresh(self) -> None:
+        db = SessionLocal()
+        try:
+            if self._loaded:
+                count, max_id = db.query(func.count(SuppressionEntry.id), func.max(SuppressionEntry.id)).one()
+                if count == self._count and (max_id or 0) == self._max_id:
+                    return
+                rows = self._rows(db, after_id=self._max_id)
+                if self._count + len(rows) == count:
+                    # Only additions since the last refresh
+                    self._apply(rows, self._emails, self._domains)
+                    self._count = count
+                    return
+            # First load, invalidated, or entries were deleted: rebuild and swap
+            emails: set[str] = set()
+            domains: set[str] = set()
+            self._max_id = 0
+            rows = self._rows(db)
+            self._apply(rows, emails, domains)
+            self._emails, self._domains = emails, domains
+            self._count = len(rows)
+            self._loaded = True
+        finally:
+            db.close()
+
+    @staticmethod
+    def _rows(db, after_id: int = 0) -> list:
+        return (
+            db.query(SuppressionEntry.id, SuppressionEntry.type, SuppressionEntry.value)
+            .filter(SuppressionEntry.id > after_id)
+            .order_by(SuppressionEntry.id)
+            .all()
+        )
+
+    def _apply(self, rows, emails: set[str], domains: set[str]) -> None:
+        for entry_id, typ, value in rows:
+            if typ == SuppressionType.email:
+                emails.add(normalize_email(value))
+            else:
+                domains.add(normalize_domain(value))
+            if entry_id > self._max_id:
+                self._max_id = entry_id
+
+
+suppression_index = SuppressionIndex()
+
+
+def is_suppressed(email: str | None) -> bool:
+    return suppression_index.is_suppressed(email)
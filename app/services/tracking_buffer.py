@@ -0,0 +1,235 @@
+"""
+Write-behind buffer for open and click tracking events.
+
+The tracking endpoints used to INSERT and COMMIT one row per pixel load or click, so the burst of opens after a big
+send held a pool connection and waited for an fsync per request. Now an event goes on a bounded in-process queue
+and the request returns at once. One background thread drains the queue with multi-row INSERTs, every
+TRACKING_FLUSH_INTERVAL_MS or as soon as TRACKING_FLUSH_BATCH events are waiting. created_at is stamped when the
+event arrives, not when it is written.
+
+When the queue is full (TRACKING_BUFFER_SIZE), TRACKING_BUFFER_OVERFLOW decides: "inline" writes that event
+synchronously as before (nothing lost, that request pays the round trip), "drop" discards it and counts it.
+close() runs on application shutdown and writes whatever is still queued. A flush that fails for a transient reason
+(database down, pool timeout) is kept and retried on the next tick. A batch the database rejects (IntegrityError or
+DataError, e.g. an event of a campaign or subscriber deleted since the email went out, or forged ids) is written
+again row by row and only the refused rows are dropped and counted. A hard kill loses at most the events of the
+current interval.
+
+Events are stored compactly: the client labels (email_client, device, environment) go in typed columns and the raw
+User-Agent header is replaced by a user_agents id, resolved once per distinct header at write time.
+"""
+import atexit
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+
+import anyio
+from loguru import logger
+from sqlalchemy import insert, null
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.tracking import TrackingEvent
+from app.services.user_agents import user_agent_ids
+from app.utils.user_agent import parse_user_agent
+
+OVERFLOW_INLINE = "inline"
+OVERFLOW_DROP = "drop"
+
+
+class TrackingBuffer:
+    """Bounded queue of tracking_events rows with a background flusher thread (started on the first event)."""
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+        flush_batch: Optional[int] = None,
+        overflow: Optional[str] = None,
+    ):
+        settings = get_settings()
+        self._max_size = settings.tracking_buffer_size if max_size is None else max_size
+        interval_ms = settings.tracking_flush_interval_ms if flush_interval_ms is None else flush_interval_ms
+        self._interval = max(1, interval_ms) / 1000.0
+        self._flush_batch = max(1, settings.tracking_flush_batch if flush_batch is None else flush_batch)
+        self._overflow = (overflow or settings.tracking_buffer_overflow or OVERFLOW_INLINE).strip().lower()
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, self._max_size))
+        self._retry: List[dict] = []  # rows of a flush that failed transiently, written first on the next one
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.written = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_size > 0
+
+    def add(
+        self,
+        campaign_id: Optional[int],
+        subscriber_id: Optional[int],
+        event_type: str,
+        payload: Any = None,
+        user_agent: Optional[str] = None,
+    ) -> None:
+        """Queue one event for writing (or write it now when buffering is off, closed, or the queue is full)."""
+        row = self._row(campaign_id, subscriber_id, event_type, payload, user_agent)
+        if not self._offer(row):
+            self._write([row])
+
+    async def add_async(
+        self,
+        campaign_id: Optional[int],
+        subscriber_id: Optional[int],
+        event_type: str,
+        payload: Any = None,
+        user_agent: Optional[str] = None,
+    ) -> None:
+        """add() for async handlers: queueing never blocks; an inline write runs on a worker thread."""
+        row = self._row(campaign_id, subscriber_id, event_type, payload, user_agent)
+        if not self._offer(row):
+            await anyio.to_thread.run_sync(self._write, [row])
+
+    @staticmethod
+    def _row(
+        campaign_id: Optional[int],
+        subscriber_id: Optional[int],
+        event_type: str,
+        payload: Any,
+        user_agent: Optional[str],
+    ) -> dict:
+        email_client, device, environment = parse_user_agent(user_agent)
+        return {
+            "campaign_id": campaign_id,
+            "subscriber_id": subscriber_id,
+            "event_type": event_type,
+            "payload": payload,
+            "user_agent": user_agent,  # replaced by ua_id when written
+            "email_client": email_client,
+            "device": device,
+            "environment": environment,
+            "created_at": datetime.now(timezone.utc),
+        }
+
+    def _offer(self, row: dict) -> bool:
+        """Queue the row (or drop it, per the overflow policy). False if the caller has to write it inline."""
+        if not self.enabled or self._closed:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            if self._overflow != OVERFLOW_DROP:
+                return False
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped == 1 or dropped % 1000 == 0:
+                logger.warning("Tracking buffer full; {} events dropped so far", dropped)
+            return True
+        if self._queue.qsize() >= self._flush_batch:
+            self._wake.set()
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "retrying": len(self._retry),
+            "written": self.written,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+        }
+
+    def close(self) -> None:
+        """Stop the flusher and write every queued event. Later events are written inline."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._stop.set()
+            self._wake.set()
+            thread.join()
+        self._flush()
+
+    # --- flushing ---
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="tracking-flush", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self._interval)
+            self._wake.clear()
+            self._flush()
+
+    def _flush(self) -> None:
+        rows, self._retry = self._retry, []
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        start = 0
+        one_by_one_until = 0  # rows before this index (a batch the database rejected) are written one at a time
+        while start < len(rows):
+            size = 1 if start < one_by_one_until else self._flush_batch
+            batch = rows[start:start + size]
+            try:
+                self._write(batch)
+            except (IntegrityError, DataError) as e:
+                if len(batch) > 1:
+                    one_by_one_until = start + len(batch)
+                    continue
+                # This row can never be written (its campaign or subscriber is gone, or the ids are bogus)
+                with self._lock:
+                    self.rejected += 1
+                row = batch[0]
+                logger.warning(
+                    "Tracking event dropped ({} campaign={} subscriber={}): {}",
+                    row["event_type"], row["campaign_id"], row["subscriber_id"], e.orig,
+                )
+            except Exception as e:
+                # Keep the unwritten rows for the next tick, up to the buffer size; older ones are dropped first
+                pending = rows[start:]
+                keep = pending[-self._max_size:] if self._max_size > 0 else []
+                with self._lock:
+                    self.dropped += len(pending) - len(keep)
+                self._retry = keep
+                logger.error("Tracking events flush failed ({} pending): {}", len(pending), e)
+                return
+            start += len(batch)
+
+    def _write(self, rows: List[dict]) -> None:
+        db = SessionLocal()
+        try:
+            ua_ids = user_agent_ids(db, {row["user_agent"] for row in rows if row["user_agent"]})
+            values = []
+            for row in rows:
+                value = {key: v for key, v in row.items() if key != "user_agent"}
+                value["ua_id"] = ua_ids.get(row["user_agent"]) if row["user_agent"] else None
+                if value["payload"] is None:
+                    value["payload"] = null()  # SQL NULL, not a JSON 'null'
+                values.append(value)
+            db.execute(insert(TrackingEvent).values(values))
+            db.commit()
+        finally:
+            db.close()
+        with self._lock:
+            self.written += len(rows)
+
+
+tracking_buffer = TrackingBuffer()
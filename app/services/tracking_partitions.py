@@ -0,0 +1,127 @@
+"""
+Monthly partitions of tracking_events: create them ahead of time and age out old ones.
+
+tracking_events is range-partitioned on created_at with one partition per UTC month, named tracking_events_pYYYYMM,
+plus tracking_events_default for rows no month partition covers (normally empty). maintain_partitions runs daily
+through POST /api/workers/maintain-tracking-partitions:
+
+- creates the partitions of the current month and the next TRACKING_PARTITION_MONTHS_AHEAD; rows that already
+  landed in the default partition for such a month are moved into it;
+- when TRACKING_RETENTION_MONTHS is set, detaches or drops (TRACKING_RETENTION_MODE) every partition whose month
+  ended more than that many months before the current month began. Unlike a DELETE this is instant and leaves no
+  dead rows to vacuum. A detached partition stays as a plain table for archiving; drop it when done.
+
+Each DDL statement runs in its own short transaction with a lock timeout, so a long-running report never makes
+tracking inserts queue behind the job; a statement that times out is logged and retried on the next run.
+"""
+import re
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+
+PARENT = "tracking_events"
+DEFAULT_PARTITION = "tracking_events_default"
+RETENTION_DETACH = "detach"
+RETENTION_DROP = "drop"
+
+_LOCK_TIMEOUT = "5s"
+_MONTH_PARTITION = re.compile(r"^tracking_events_p(\d{4})(\d{2})$")
+
+
+def add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_p{month.year:04d}{month.month:02d}"
+
+
+def _bound(month: date) -> str:
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+def attached_partitions(db: Session) -> List[str]:
+    """Names of the partitions currently attached to tracking_events."""
+    return list(
+        db.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:parent AS regclass) ORDER BY c.relname"
+            ),
+            {"parent": PARENT},
+        ).scalars()
+    )
+
+
+def create_partition(db: Session, month: date) -> bool:
+    """Create (and commit) the partition of the month starting on `month` unless it exists. True if created."""
+    name = partition_name(month)
+    if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return False
+    start, end = _bound(month), _bound(add_months(month, 1))
+    db.execute(text(f"SET LOCAL lock_timeout = '{_LOCK_TIMEOUT}'"))
+    in_default = db.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= {start} AND created_at < {end})")
+    ).scalar()
+    if not in_default:
+        db.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT} FOR VALUES FROM ({start}) TO ({end})"))
+    else:
+        # The default partition holds rows of this month (the job did not run in time): move them over, then
+        # attach; Postgres refuses a new partition whose range overlaps rows in the default one.
+        db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)"))
+        db.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= {start} AND created_at < {end} "
+                f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+            )
+        )
+        db.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ({start}) TO ({end})"))
+    db.commit()
+    return True
+
+
+def maintain_partitions(db: Session, now: Optional[datetime] = None) -> Dict[str, List[str]]:
+    """Create upcoming month partitions and age out expired ones. Returns the partitions touched, by action."""
+    settings = get_settings()
+    now = now or datetime.now(timezone.utc)
+    this_month = date(now.year, now.month, 1)
+    result: Dict[str, List[str]] = {"created": [], "detached": [], "dropped": [], "failed": []}
+
+    for n in range(max(0, settings.tracking_partition_months_ahead) + 1):
+        month = add_months(this_month, n)
+        try:
+            if create_partition(db, month):
+                result["created"].append(partition_name(month))
+        except Exception as e:
+            db.rollback()
+            result["failed"].append(partition_name(month))
+            logger.error("Could not create tracking partition {}: {}", partition_name(month), e)
+
+    if settings.tracking_retention_months <= 0:
+        return result
+    mode = (settings.tracking_retention_mode or RETENTION_DETACH).strip().lower()
+    cutoff = add_months(this_month, -settings.tracking_retention_months)
+    for name in attached_partitions(db):
+        match = _MONTH_PARTITION.match(name)
+        if not match or add_months(date(int(match[1]), int(match[2]), 1), 1) > cutoff:
+            continue
+        try:
+            db.execute(text(f"SET LOCAL lock_timeout = '{_LOCK_TIMEOUT}'"))
+            if mode == RETENTION_DROP:
+                db.execute(text(f"DROP TABLE {name}"))
+                result["dropped"].append(name)
+            else:
+                db.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+                result["detached"].append(name)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            result["failed"].append(name)
+            logger.error("Could not {} tracking partition {}: {}", mode, name, e)
+    return result
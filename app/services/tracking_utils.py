@@ -2,7 +2,16 @@
 import re
 import hmac
 import hashlib
+import struct
 import urllib.parse
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+# Compact click token: version, campaign id, subscriber id, link id (campaign_links.id), then a truncated MAC of them
+_CLICK_TOKEN = struct.Struct(">BIII")
+_CLICK_TOKEN_VERSION = 1
+_CLICK_MAC_BYTES = 8
+# Tokens of emails sent before the MAC covered the link id: no version byte, MAC over campaign and subscriber only
+_LEGACY_CLICK_TOKEN = struct.Struct(">III")
 
 
 def _sign(secret: str, payload: str) -> str:
@@ -28,6 +37,45 @@ def build_click_url(
     return f"{base_url}/t/click?c={campaign_id}&s={subscriber_id}&url={encoded}&sig={sig}"
 
 
+def _click_mac(secret: str, head: bytes, keyed: "hmac.HMAC | None") -> bytes:
+    h = keyed.copy() if keyed is not None else hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+    h.update(b"click:" + head)
+    return h.digest()[:_CLICK_MAC_BYTES]
+
+
+def build_click_token(
+    secret: str, campaign_id: int, subscriber_id: int, link_id: int, keyed: "hmac.HMAC | None" = None
+) -> str:
+    """
+    URL-safe token (28 chars) for /t/click?t=...; the MAC covers the link id, so a recipient cannot turn it into a
+    click on another link. keyed is an optional HMAC already keyed with secret (copied, so key setup isn't repeated).
+    """
+    head = _CLICK_TOKEN.pack(_CLICK_TOKEN_VERSION, campaign_id, subscriber_id, link_id)
+    return urlsafe_b64encode(head + _click_mac(secret, head, keyed)).decode("ascii")
+
+
+def parse_click_token(secret: str, token: str, keyed: "hmac.HMAC | None" = None) -> tuple[int, int, int] | None:
+    """Return (campaign_id, subscriber_id, link_id) for a valid token, else None. keyed as for build_click_token."""
+    try:
+        raw = urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (ValueError, TypeError):
+        return None
+    if len(raw) == _CLICK_TOKEN.size + _CLICK_MAC_BYTES:
+        head = raw[: _CLICK_TOKEN.size]
+        version, campaign_id, subscriber_id, link_id = _CLICK_TOKEN.unpack(head)
+        if version != _CLICK_TOKEN_VERSION:
+            return None
+    elif len(raw) == _LEGACY_CLICK_TOKEN.size + _CLICK_MAC_BYTES:
+        campaign_id, subscriber_id, link_id = _LEGACY_CLICK_TOKEN.unpack(raw[: _LEGACY_CLICK_TOKEN.size])
+        head = struct.pack(">II", campaign_id, subscriber_id)
+    else:
+        return None
+    if secret and secret != "change-me-in-production":
+        if not hmac.compare_digest(_click_mac(secret, head, keyed), raw[-_CLICK_MAC_BYTES:]):
+            return None
+    return campaign_id, subscriber_id, link_id
+
+
 def build_unsubscribe_url(base_url: str, secret: str, subscriber_id: int) -> str:
     """Build signed URL for one-click unsubscribe (no campaign context)."""
     base_url = base_url.rstrip("/")
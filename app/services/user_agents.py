@@ -0,0 +1,69 @@
+"""
+User-agent dictionary for open and click tracking.
+
+Events reference a user_agents row (tracking_events.ua_id) instead of repeating the raw header in their payload.
+Real traffic comes from a few hundred distinct strings, so the tracking buffer resolves the distinct headers of a
+flush at once: known ones from a bounded in-process cache, the rest with one INSERT ... ON CONFLICT DO NOTHING
+(safe across processes) and one SELECT. Rows never change, so a cached id stays valid.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.tracking import UserAgent
+from app.utils.user_agent import parse_user_agent
+
+_CACHE_SIZE = 10_000
+_MAX_CACHED_LENGTH = 512  # longer (unusual or abusive) headers are looked up without taking a cache slot
+_cache: "OrderedDict[str, int]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def ua_hash(user_agent: str) -> str:
+    """Lookup key of a header: md5 hex, same as Postgres md5() on the stored text."""
+    return hashlib.md5(user_agent.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+def user_agent_ids(db: Session, user_agents: Iterable[str]) -> Dict[str, int]:
+    """
+    Id of the user_agents row for each header, inserting missing ones with their parse_user_agent labels.
+    New rows are committed before they are cached, so a cached id always exists.
+    """
+    ids: Dict[str, int] = {}
+    missing = []
+    with _cache_lock:
+        for ua in set(user_agents):
+            hit = _cache.get(ua)
+            if hit is None:
+                missing.append(ua)
+            else:
+                _cache.move_to_end(ua)
+                ids[ua] = hit
+    if not missing:
+        return ids
+
+    by_hash = {ua_hash(ua): ua for ua in missing}
+    rows = []
+    for h in sorted(by_hash):  # same insert order in every process, so concurrent flushes cannot deadlock
+        ua = by_hash[h]
+        email_client, device, environment = parse_user_agent(ua)
+        rows.append(
+            {"ua_hash": h, "user_agent": ua, "email_client": email_client, "device": device, "environment": environment}
+        )
+    db.execute(pg_insert(UserAgent).values(rows).on_conflict_do_nothing(index_elements=["ua_hash"]))
+    found = db.query(UserAgent.ua_hash, UserAgent.id).filter(UserAgent.ua_hash.in_(list(by_hash))).all()
+    db.commit()
+
+    with _cache_lock:
+        for h, ua_id in found:
+            ua = by_hash[h]
+            ids[ua] = ua_id
+            if len(ua) <= _MAX_CACHED_LENGTH:
+                _cache[ua] = ua_id
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return ids
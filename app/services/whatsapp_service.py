@@ -1,11 +1,58 @@
-"""Send WhatsApp messages via Twilio. Used for campaign channel=whatsapp."""
+"""
+Send WhatsApp messages via Twilio. Used for campaign channel=whatsapp.
+
+One Twilio client per process is kept for the life of the process, so its pooled HTTPS connections are reused
+instead of every message paying for a new client and TLS handshake. send_whatsapp_many sends a chunk on a bounded
+thread pool (WHATSAPP_SEND_CONCURRENCY), paced to the sender's throughput (WHATSAPP_MESSAGES_PER_SECOND) and
+backing off when Twilio answers 429.
+"""
 
 import re
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
 from loguru import logger
 
 from app.config import get_settings
+from app.services.send_governor import SendGovernor
+
+_client = None
+_client_key: Optional[Tuple[str, str]] = None
+_client_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_governor: Optional[SendGovernor] = None
+_RATE_LIMIT_RETRIES = 3
+
+
+def _get_client(account_sid: str, auth_token: str):
+    """The process-wide Twilio client (rebuilt only if the credentials change)."""
+    global _client, _client_key
+    with _client_lock:
+        if _client is None or _client_key != (account_sid, auth_token):
+            from requests.adapters import HTTPAdapter
+            from twilio.http.http_client import TwilioHttpClient
+            from twilio.rest import Client
+
+            http_client = TwilioHttpClient(pool_connections=True)
+            # Enough keep-alive connections for every dispatcher thread
+            pool_size = max(10, get_settings().whatsapp_send_concurrency)
+            http_client.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+            _client = Client(account_sid, auth_token, http_client=http_client)
+            _client_key = (account_sid, auth_token)
+        return _client
+
+
+def _get_pool() -> Tuple[ThreadPoolExecutor, SendGovernor]:
+    global _executor, _governor
+    with _client_lock:
+        if _executor is None:
+            settings = get_settings()
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.whatsapp_send_concurrency), thread_name_prefix="whatsapp-send"
+            )
+            _governor = SendGovernor(settings.whatsapp_messages_per_second)
+        return _executor, _governor
 
 
 def _normalize_phone(phone: str) -> Optional[str]:
@@ -23,26 +70,22 @@ def _normalize_phone(phone: str) -> Optional[str]:
     return "+" + digits
 
 
-def send_whatsapp(to_phone: str, body: str) -> bool:
-    """
-    Send one WhatsApp message via Twilio.
-    to_phone: subscriber phone (E.164 or 10-digit); will be normalized to whatsapp:+...
-    body: message text (max 4096 chars for WhatsApp).
-    Returns True if sent, False if skipped or failed.
-    """
-    settings = get_settings()
+def _sender(settings) -> Optional[str]:
+    """whatsapp:+... sender address, or None (with a warning) when Twilio is not configured."""
     if not settings.twilio_account_sid or not settings.twilio_auth_token or not settings.twilio_whatsapp_from:
         logger.warning("WhatsApp/Twilio not configured; skipping send")
-        return False
+        return None
+    from_num = (settings.twilio_whatsapp_from or "").strip()
+    if not from_num.lower().startswith("whatsapp:"):
+        from_num = "whatsapp:" + from_num
+    return from_num
 
+
+def _send(client, from_num: str, to_phone: str, body: str, governor: Optional[SendGovernor] = None) -> bool:
     normalized = _normalize_phone(to_phone)
     if not normalized:
         logger.warning("Invalid phone for WhatsApp: {}", to_phone)
         return False
-
-    from_num = (settings.twilio_whatsapp_from or "").strip()
-    if not from_num.lower().startswith("whatsapp:"):
-        from_num = "whatsapp:" + from_num
     to_num = normalized if normalized.startswith("whatsapp:") else "whatsapp:" + normalized
 
     body = (body or "").strip()
@@ -51,12 +94,56 @@ def send_whatsapp(to_phone: str, body: str) -> bool:
     if len(body) > 4096:
         body = body[:4093] + "..."
 
-    try:
-        from twilio.rest import Client
+    from twilio.base.exceptions import TwilioRestException
 
-        client = Client(settings.twilio_account_sid, settings.twilio_auth_token)
-        client.messages.create(from_=from_num, to=to_num, body=body)
-        return True
-    except Exception as e:
-        logger.exception("Twilio WhatsApp send failed: {}", e)
+    attempt = 0
+    while True:
+        if governor is not None:
+            governor.acquire()
+        try:
+            client.messages.create(from_=from_num, to=to_num, body=body)
+            if governor is not None:
+                governor.on_success()
+            return True
+        except TwilioRestException as e:
+            if e.status == 429 and governor is not None and attempt < _RATE_LIMIT_RETRIES:
+                attempt += 1
+                governor.on_rate_limited(1.0)
+                logger.warning("Twilio rate limited; retrying at {:.1f} msg/s (attempt {})", governor.rate, attempt)
+                continue
+            logger.error("Twilio WhatsApp send failed: {}", e)
+            return False
+        except Exception as e:
+            logger.exception("Twilio WhatsApp send failed: {}", e)
+            return False
+
+
+def send_whatsapp(to_phone: str, body: str) -> bool:
+    """
+    Send one WhatsApp message via Twilio.
+    to_phone: subscriber phone (E.164 or 10-digit); will be normalized to whatsapp:+...
+    body: message text (max 4096 chars for WhatsApp).
+    Returns True if sent, False if skipped or failed.
+    """
+    settings = get_settings()
+    from_num = _sender(settings)
+    if not from_num:
         return False
+    return _send(_get_client(settings.twilio_account_sid, settings.twilio_auth_token), from_num, to_phone, body)
+
+
+def send_whatsapp_many(messages: List[Tuple[str, str]]) -> List[bool]:
+    """
+    Send (to_phone, body) messages concurrently on the shared worker pool, paced to the sender's throughput
+    and retrying 429s with backoff. Returns one delivered flag per message, in input order.
+    """
+    if not messages:
+        return []
+    settings = get_settings()
+    from_num = _sender(settings)
+    if not from_num:
+        return [False] * len(messages)
+    client = _get_client(settings.twilio_account_sid, settings.twilio_auth_token)
+    executor, governor = _get_pool()
+    futures = [executor.submit(_send, client, from_num, phone, body, governor) for phone, body in messages]
+    return [fut.result() for fut in futures]
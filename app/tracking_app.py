@@ -0,0 +1,224 @@
+"""
+Open and click tracking endpoints (/t/open, /t/click) as a lightweight ASGI app. No auth — URLs are signed. A HEAD
+request (link checkers, proxies probing the pixel) gets the same response headers but records no event. /metrics is
+only served with the X-API-Key set in METRICS_API_KEY.
+
+These are the hottest routes after a big send, so they skip FastAPI: async handlers on raw ASGI (no threadpool hop,
+no dependency injection, no per-request ORM session), settings read once, the HMAC key set up once and copied per
+request, and events handed to the write-behind tracking buffer without waiting on the database. The only database
+read left is a click token's link on a cache miss, done on a worker thread.
+
+app.main mounts tracking_app at /t. A tracking-only process can serve the same endpoints without importing the API
+routers:
+
+    uvicorn app.tracking_app:app --port 8001
+"""
+import hashlib
+import hmac
+import json
+import urllib.parse
+from base64 import urlsafe_b64decode
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import anyio.to_thread
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.services.campaign_links import cached_link, resolve_link
+from app.services.tracking_buffer import tracking_buffer
+from app.services.tracking_utils import parse_click_token
+from app.utils.user_agent import user_agent_cache_stats
+
+# 1x1 transparent GIF
+_TRACKING_PIXEL_GIF = urlsafe_b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+_PIXEL_HEADERS = [
+    (b"content-type", b"image/gif"),
+    (b"content-length", str(len(_TRACKING_PIXEL_GIF)).encode()),
+    (b"cache-control", b"no-store, no-cache, must-revalidate"),
+    (b"pragma", b"no-cache"),
+]
+# Characters left as they are when quoting a redirect Location (as Starlette's RedirectResponse does)
+_LOCATION_SAFE = ":/%#?=@[]!$&'()*+,;"
+
+Scope = Dict[str, Any]
+Send = Callable[[dict], Awaitable[None]]
+
+
+class _BadRequest(Exception):
+    pass
+
+
+def _query(scope: Scope) -> Dict[str, str]:
+    return dict(urllib.parse.parse_qsl(scope["query_string"].decode("latin-1")))
+
+
+def _user_agent(scope: Scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"user-agent":
+            return value.decode("latin-1")
+    return None
+
+
+def _int_param(query: Dict[str, str], name: str) -> int:
+    try:
+        return int(query[name])
+    except (KeyError, ValueError):
+        raise _BadRequest("Missing tracking parameters")
+
+
+def _load_link(link_id: int) -> Optional[Tuple[int, str]]:
+    db = SessionLocal()
+    try:
+        return resolve_link(db, link_id)
+    finally:
+        db.close()
+
+
+async def _respond(send: Send, status: int, headers: List[Tuple[bytes, bytes]], body: bytes = b"") -> None:
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _respond_json(send: Send, status: int, content: dict) -> None:
+    body = json.dumps(content).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    await _respond(send, status, headers, body)
+
+
+class TrackingApp:
+    """ASGI app for {prefix}/open and {prefix}/click, plus /health and /metrics; handles lifespan when run alone."""
+
+    def __init__(self, prefix: str = ""):
+        secret = get_settings().tracking_secret or ""
+        self._secret = secret
+        self._verify = bool(secret) and secret != "change-me-in-production"
+        self._key = hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+        self._metrics_key = (get_settings().metrics_api_key or "").encode("utf-8")
+        self._routes = {
+            f"{prefix}/open": self._open,
+            f"{prefix}/click": self._click,
+            "/health": self._health,
+            "/metrics": self._metrics,
+        }
+
+    async def __call__(self, scope: Scope, receive: Callable, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path + "/"):
+            path = path[len(root_path):]
+        handler = self._routes.get(path)
+        if handler is None:
+            await _respond_json(send, 404, {"detail": "Not Found"})
+        elif scope["method"] not in ("GET", "HEAD"):
+            await _respond_json(send, 405, {"detail": "Method Not Allowed"})
+        else:
+            try:
+                await handler(scope, send)
+            except _BadRequest as e:
+                await _respond_json(send, 400, {"detail": str(e)})
+
+    async def _lifespan(self, receive: Callable, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                # Write events still waiting in the tracking buffer before the process exits
+                await anyio.to_thread.run_sync(tracking_buffer.close)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _signature_ok(self, payload: str, sig: str) -> bool:
+        if not self._verify:
+            return True
+        h = self._key.copy()
+        h.update(payload.encode("utf-8"))
+        return hmac.compare_digest(h.hexdigest(), sig)
+
+    async def _open(self, scope: Scope, send: Send) -> None:
+        """Log an open event and return a 1x1 transparent GIF. Called when the tracking pixel is loaded (not on HEAD)."""
+        query = _query(scope)
+        c = _int_param(query, "c")
+        s = _int_param(query, "s")
+        if not self._signature_ok(f"open:{c}:{s}", query.get("sig", "")):
+            raise _BadRequest("Invalid signature")
+        if scope["method"] == "HEAD":
+            await _respond(send, 200, _PIXEL_HEADERS)
+            return
+        await tracking_buffer.add_async(c, s, "open", user_agent=_user_agent(scope))
+        await _respond(send, 200, _PIXEL_HEADERS, _TRACKING_PIXEL_GIF)
+
+    async def _resolve_click_token(self, token: str) -> Tuple[int, int, str]:
+        """(campaign_id, subscriber_id, destination) for a compact click token."""
+        parsed = parse_click_token(self._secret, token, self._key)
+        if not parsed:
+            raise _BadRequest("Invalid signature")
+        c, s, link_id = parsed
+        link = cached_link(link_id)
+        if link is None:
+            link = await anyio.to_thread.run_sync(_load_link, link_id)
+        if not link or link[0] != c:
+            raise _BadRequest("Invalid link")
+        return c, s, link[1]
+
+    async def _click(self, scope: Scope, send: Send) -> None:
+        """
+        Log a click event and redirect to the destination URL. Links carry a compact token (t) naming a campaign_links
+        row; the older c/s/url/sig form is still accepted for messages sent before tokens.
+        """
+        query = _query(scope)
+        token = query.get("t")
+        if token:
+            c, s, url_decoded = await self._resolve_click_token(token)
+        else:
+            c = _int_param(query, "c")
+            s = _int_param(query, "s")
+            url = query.get("url")
+            if url is None:
+                raise _BadRequest("Missing tracking parameters")
+            # Verify signature: we signed with the original (decoded) destination URL; request may be raw or single/double encoded
+            url_decoded = urllib.parse.unquote(url)
+            url_decoded_twice = urllib.parse.unquote(url_decoded)
+            sig = query.get("sig", "")
+            for url_for_sig in (url_decoded, url_decoded_twice, url):
+                if self._signature_ok(f"click:{c}:{s}:{url_for_sig}", sig):
+                    break
+            else:
+                raise _BadRequest("Invalid signature")
+        if scope["method"] != "HEAD":
+            await tracking_buffer.add_async(c, s, "click", {"url": url_decoded}, user_agent=_user_agent(scope))
+        dest = url_decoded
+        if not dest.startswith(("http://", "https://")):
+            dest = "https://" + dest
+        location = urllib.parse.quote(dest, safe=_LOCATION_SAFE).encode("latin-1")
+        await _respond(send, 302, [(b"location", location), (b"content-length", b"0")])
+
+    async def _health(self, scope: Scope, send: Send) -> None:
+        await _respond_json(send, 200, {"status": "ok"})
+
+    async def _metrics(self, scope: Scope, send: Send) -> None:
+        """
+        Counters of this process: user-agent classification cache and tracking write buffer. Needs the X-API-Key header
+        to match METRICS_API_KEY; without that setting the route does not exist, as it shares the public tracking host.
+        """
+        if not self._metrics_key:
+            await _respond_json(send, 404, {"detail": "Not Found"})
+            return
+        api_key = next((value for name, value in scope["headers"] if name == b"x-api-key"), b"")
+        if not hmac.compare_digest(api_key, self._metrics_key):
+            await _respond_json(send, 401, {"detail": "Invalid or missing API key"})
+            return
+        await _respond_json(
+            send, 200, {"user_agent_cache": user_agent_cache_stats(), "tracking_buffer": tracking_buffer.stats()}
+        )
+
+
+# Mounted by app.main under /t
+tracking_app = TrackingApp()
+# Standalone tracking process: serves /t/open and /t/click itself
+app = TrackingApp(prefix="/t")
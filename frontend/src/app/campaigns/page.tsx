@@ -270,13 +270,33 @@ export default function CampaignsPage() {
     campaignsApi.getNonOpenerSubscriberIds(c.id).then((r) => setNonOpenerIds(r.subscriber_ids || [])).catch(() => setNonOpenerIds([]));
   };
 
+  /** A queued send is counted by the worker, not in the request: poll the send job briefly to show the count. */
+  const showQueuedSend = (campaignId: number, jobId: number, message: string) => {
+    setSuccessMessage(message);
+    let attempts = 0;
+    const poll = () => {
+      campaignsApi
+        .getSendJob(campaignId, jobId)
+        .then((job) => {
+          if (!mountedRef.current) return;
+          if (job.total != null) {
+            setSuccessMessage(`Campaign queued for sending to ${job.total} subscribers (job ${job.job_id}).`);
+          } else if (!job.finished_at && ++attempts < 5) {
+            setTimeout(poll, 1000);
+          }
+        })
+        .catch(() => {});
+    };
+    setTimeout(poll, 1000);
+  };
+
   const handleSendToNonOpeners = () => {
     if (!nonOpenerDraftId || nonOpenerIds.length === 0 || sendingToNonOpeners) return;
     setSendingToNonOpeners(true);
     campaignsApi
       .send(nonOpenerDraftId, { recipient_ids: nonOpenerIds })
       .then((res) => {
-        setSuccessMessage(res?.message ?? `Sent to ${res?.sent ?? 0} non-openers.`);
+        showQueuedSend(nonOpenerDraftId, res.job_id, res.message);
         setResendNonOpenersCampaign(null);
         load();
         setTimeout(() => setSuccessMessage(null), 6000);
@@ -343,9 +363,7 @@ export default function CampaignsPage() {
     campaignsApi
       .send(id, body)
       .then((res) => {
-        setSuccessMessage(
-          res?.message ?? `Campaign sent to ${res?.sent ?? 0} subscribers.`,
-        );
+        showQueuedSend(id, res.job_id, res.message);
         load();
         setTimeout(() => setSuccessMessage(null), 8000);
       })
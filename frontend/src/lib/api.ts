@@ -99,6 +99,21 @@ export type Campaign = {
   clicks?: number;
 };
 
+export type CampaignSendJob = {
+  job_id: number;
+  campaign_id: number;
+  status: string;
+  total: number | null;
+  sent: number;
+  failed: number;
+  remaining: number | null;
+  throughput_per_sec: number | null;
+  error_message: string | null;
+  created_at: string | null;
+  started_at: string | null;
+  finished_at: string | null;
+};
+
 export type CampaignCreateBody = {
   name: string;
   channel?: string;
@@ -223,10 +238,19 @@ export const campaignsApi = {
       body: JSON.stringify(body),
     }),
   send: (id: number, body: { recipient_ids?: number[]; segment_id?: number; exclude_segment_id?: number }) =>
-    api<{ sent: number; message: string }>(`/api/campaigns/${id}/send`, {
+    api<{ job_id: number; status: string; total: number | null; message: string; sent?: number }>(`/api/campaigns/${id}/send`, {
       method: "POST",
       body: JSON.stringify(body),
     }),
+  preflight: (id: number, body: { recipient_ids?: number[]; segment_id?: number; exclude_segment_id?: number }) =>
+    api<{ audience: number; invalid: number; suppressed: number; recipients: number }>(`/api/campaigns/${id}/preflight`, {
+      method: "POST",
+      body: JSON.stringify(body),
+    }),
+  resume: (id: number) =>
+    api<{ job_id: number; status: string; message: string; sent?: number }>(`/api/campaigns/${id}/resume`, { method: "POST" }),
+  getSendJob: (id: number, jobId: number) =>
+    api<CampaignSendJob>(`/api/campaigns/${id}/send-jobs/${jobId}`),
   getNonOpenerSubscriberIds: (id: number) =>
     api<{ subscriber_ids: number[]; count: number }>(`/api/campaigns/${id}/non-opener-subscriber-ids`),
   duplicate: (id: number) =>
@@ -0,0 +1,340 @@
+"""
+Benchmark: end-to-end campaign email send (send_campaign) against a local fake Resend server.
+
+For each audience size the harness seeds that many subscribers (plus a suppression list hitting ~3% of them)
+and a ~55 KB newsletter with many links and images, points the Resend SDK at an in-process HTTP server that
+answers batch calls after --latency-ms and rate-limits a fraction (--error-rate) of them with 429, then runs
+send_campaign and reports:
+
+  recipients_per_sec, time_to_first_send_ms (send_campaign start -> first batch reaching the provider),
+  peak_rss_mb, db_round_trips (statements executed by send_campaign), provider_requests / provider_errors
+
+Each size runs in a fresh child process so peak RSS is per run. Results are printed (or written to --output)
+as JSON with the git commit, to compare between commits.
+
+Needs a scratch Postgres database with the schema migrated (alembic upgrade head) and no real subscribers:
+every active subscriber is part of the audience. Rows the benchmark creates are deleted afterwards.
+
+    DATABASE_URL=postgresql://localhost/email_bench python scripts/bench_campaign_send.py \
+        [--sizes 10000,100000,1000000] [--latency-ms 20] [--error-rate 0.01] [--output bench.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Allow importing app when run as script
+sys.path.insert(0, str(ROOT))
+
+_BENCH_PREFIX = "bench-"
+_DOMAINS = ("gmail.com", "yahoo.com", "outlook.com", "example.org", "bench-blocked.example")
+
+
+# --- fake Resend server ---
+
+
+class _FakeResend(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float, error_rate: float):
+        super().__init__(("127.0.0.1", 0), _FakeResendHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.messages = 0
+        self.first_request_at = None  # wall clock, comparable with the client's time.time()
+
+
+class _FakeResendHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _reply(self, status: int, payload, headers: dict | None = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        server: _FakeResend = self.server
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"null")
+        count = len(payload) if isinstance(payload, list) else 1
+        with server.lock:
+            server.requests += 1
+            if server.first_request_at is None:
+                server.first_request_at = time.time()
+            limited = random.random() < server.error_rate
+            if limited:
+                server.errors += 1
+            else:
+                server.messages += count
+        time.sleep(server.latency)
+        if limited:
+            self._reply(
+                429,
+                {"statusCode": 429, "name": "rate_limit_exceeded", "message": "Too many requests"},
+                {"Retry-After": "0"},
+            )
+        elif self.path.startswith("/emails/batch"):
+            self._reply(200, {"data": [{"id": f"fake-{server.requests}-{i}"} for i in range(count)]})
+        else:
+            self._reply(200, {"id": f"fake-{server.requests}"})
+
+    def do_GET(self) -> None:
+        server: _FakeResend = self.server
+        with server.lock:
+            stats = {
+                "requests": server.requests,
+                "errors": server.errors,
+                "messages": server.messages,
+                "first_request_at": server.first_request_at,
+            }
+        self._reply(200, stats)
+
+
+# --- seeding ---
+
+
+def _newsletter_html() -> str:
+    """~55 KB newsletter: 80 stories, each with an image, two tracked links and personalization."""
+    blocks = []
+    for i in range(80):
+        blocks.append(
+            '<table role="presentation" width="100%"><tr><td style="padding:12px 0;">'
+            f'<img src="/uploads/story-{i}.png" alt="" width="560" style="display:block;">'
+            f"<h2>Story {i}</h2><p>Hi {{{{name|there}}}}, lorem ipsum dolor sit amet, consectetur adipiscing elit, "
+            "sed do eiusmod tempor incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis "
+            "nostrud exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat.<br>Duis aute irure dolor "
+            "in reprehenderit in voluptate velit esse cillum dolore eu fugiat nulla pariatur.</p>"
+            f'<p><a href="https://example.com/articles/{i}?utm_source=newsletter&amp;utm_medium=email">Read more</a>'
+            f' | <a href="https://example.com/share/{i}">Share</a></p></td></tr></table>\n'
+        )
+    blocks.append(
+        "<p>Your plan: {{custom.plan|free}}. Sent to {{email}}.</p>"
+        '<p><a href="{{unsubscribe_url}}">Unsubscribe</a></p>'
+    )
+    return "".join(blocks)
+
+
+def _cleanup(db) -> None:
+    from sqlalchemy import text
+
+    db.execute(text("DELETE FROM campaigns WHERE name LIKE :p"), {"p": f"{_BENCH_PREFIX}%"})
+    db.execute(text("DELETE FROM subscribers WHERE email LIKE :p"), {"p": f"{_BENCH_PREFIX}%"})
+    db.execute(text("DELETE FROM suppression_list WHERE lower(value) LIKE :p"), {"p": f"{_BENCH_PREFIX}%"})
+    db.commit()
+
+
+def _seed(db, size: int):
+    """Insert size subscribers server-side, a suppression list (one domain, every 50th address) and the campaign."""
+    from sqlalchemy import text
+
+    from app.models.campaign import Campaign
+
+    domains = "ARRAY[" + ",".join(f"'{d}'" for d in _DOMAINS[:-1]) + "]"
+    # 1 in 100 subscribers sits on the suppressed domain
+    db.execute(
+        text(
+            "INSERT INTO subscribers (email, name, status, custom_fields) "
+            f"SELECT '{_BENCH_PREFIX}' || g || '@' || CASE WHEN g % 100 = 0 THEN '{_DOMAINS[-1]}' "
+            f"ELSE ({domains})[1 + g % {len(_DOMAINS) - 1}] END, "
+            "'Bench ' || g, 'active', jsonb_build_object('plan', CASE WHEN g % 3 = 0 THEN 'pro' ELSE 'free' END) "
+            "FROM generate_series(1, :n) AS g"
+        ),
+        {"n": size},
+    )
+    # Every 50th address suppressed individually, stored upper-case to exercise the normalized match
+    db.execute(
+        text(
+            "INSERT INTO suppression_list (type, value) "
+            "SELECT 'email', upper(email) FROM subscribers WHERE email LIKE :p AND id % 50 = 0"
+        ),
+        {"p": f"{_BENCH_PREFIX}%"},
+    )
+    db.execute(
+        text("INSERT INTO suppression_list (type, value) VALUES ('domain', :d)"), {"d": _DOMAINS[-1]}
+    )
+    campaign = Campaign(
+        name=f"{_BENCH_PREFIX}{size}",
+        channel="email",
+        subject="Weekly update for {{name|you}}",
+        html_body=_newsletter_html(),
+    )
+    db.add(campaign)
+    db.commit()
+    db.execute(text("ANALYZE subscribers"))
+    db.execute(text("ANALYZE suppression_list"))
+    db.commit()
+    return campaign
+
+
+# --- one run (child process) ---
+
+
+def _max_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _run(size: int, api_url: str) -> dict:
+    import resend
+    from sqlalchemy import event, text
+
+    from app.database import SessionLocal, engine
+    from app.services.campaign_service import send_campaign
+
+    resend.api_url = api_url
+    db = SessionLocal()
+    try:
+        existing = db.execute(
+            text("SELECT count(*) FROM subscribers WHERE email NOT LIKE :p"), {"p": f"{_BENCH_PREFIX}%"}
+        ).scalar()
+        if existing:
+            raise SystemExit(f"DATABASE_URL has {existing} non-benchmark subscribers; use a scratch database")
+        _cleanup(db)
+        seed_start = time.perf_counter()
+        campaign = _seed(db, size)
+        seed_seconds = time.perf_counter() - seed_start
+
+        statements = 0
+
+        def count_statement(*args) -> None:
+            nonlocal statements
+            statements += 1
+
+        event.listen(engine, "before_cursor_execute", count_statement)
+        rss_before = _max_rss_mb()
+        started_at = time.time()
+        start = time.perf_counter()
+        sent, err = send_campaign(db, campaign, None)
+        elapsed = time.perf_counter() - start
+        event.remove(engine, "before_cursor_execute", count_statement)
+        peak_rss = _max_rss_mb()
+
+        with urllib.request.urlopen(api_url + "/stats") as resp:
+            stats = json.loads(resp.read())
+        first = stats["first_request_at"]
+        return {
+            "recipients": size,
+            "sent": sent,
+            "error": err or None,
+            "seconds": round(elapsed, 3),
+            "recipients_per_sec": round(sent / elapsed, 1) if elapsed else None,
+            "time_to_first_send_ms": round((first - started_at) * 1000, 1) if first else None,
+            "peak_rss_mb": round(peak_rss, 1),
+            "rss_before_send_mb": round(rss_before, 1),
+            "db_round_trips": statements,
+            "db_round_trips_per_1k_sent": round(statements * 1000 / sent, 2) if sent else None,
+            "provider_requests": stats["requests"],
+            "provider_errors": stats["errors"],
+            "seed_seconds": round(seed_seconds, 1),
+        }
+    finally:
+        db.rollback()
+        _cleanup(db)
+        db.close()
+
+
+# --- harness ---
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated audience sizes")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Fake provider response time per call")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="Fraction of calls answered with 429")
+    parser.add_argument(
+        "--requests-per-second", type=float, default=0.0, help="RESEND_REQUESTS_PER_SECOND for the run (0 = unpaced)"
+    )
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    parser.add_argument("--run", type=int, help=argparse.SUPPRESS)  # child mode: one size
+    parser.add_argument("--api-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(_run(args.run, args.api_url)))
+        return
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    env = dict(
+        os.environ,
+        RESEND_API_KEY="re_benchmark",
+        RESEND_REQUESTS_PER_SECOND=str(args.requests_per_second),
+        RESEND_MESSAGES_PER_DAY="0",
+        RESEND_SANDBOX_REDIRECT="",
+    )
+    results = []
+    for size in sizes:
+        # A fresh fake server per size so its counters and first-request time belong to this run
+        server = _FakeResend(args.latency_ms / 1000.0, args.error_rate)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        api_url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            proc = subprocess.run(
+                [sys.executable, __file__, "--run", str(size), "--api-url", api_url],
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+        if proc.returncode != 0:
+            sys.stderr.write(proc.stderr)
+            raise SystemExit(f"Benchmark run for {size} recipients failed")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(
+            f"{size:>9} recipients: {result['recipients_per_sec']} /s, first send {result['time_to_first_send_ms']} ms, "
+            f"peak RSS {result['peak_rss_mb']} MB, {result['db_round_trips']} DB round trips",
+            file=sys.stderr,
+        )
+        results.append(result)
+
+    report = {
+        "benchmark": "campaign_send",
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "latency_ms": args.latency_ms,
+            "error_rate": args.error_rate,
+            "requests_per_second": args.requests_per_second,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Microbenchmark: HTML scanner vs the old regex chain, on a ~100 KB newsletter.
+Times one compile-side pass over the variant HTML (image src rewrite, finding every href, the <body> position) both
+ways and checks the results are byte-identical. Then the plain-text alternative: building it once per variant
+(html_to_plain), and the per-recipient cost of the old regexes over each rendered email vs filling the
+placeholders of the per-variant plain text.
+
+    python scripts/bench_html_rewriter.py [--iterations 20] [--repeats 5] [--size-kb 100]
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+# Allow importing app when run as script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.campaign_render import RenderPlan
+from app.services.email_template import wrap_transactional_html
+from app.services.html_rewriter import html_to_plain, scan_html
+from app.services.template_engine import CompiledTemplate
+
+_BASE_URL = "https://mail.example.com"
+_SECRET = "bench-secret"
+
+
+def _build_body(size_kb: int) -> str:
+    block = (
+        '<table role="presentation" width="100%"><tr><td style="padding:12px 0;">'
+        '<img src="/uploads/story.png" alt="" width="560" style="display:block;">'
+        "<h2>Story headline</h2><p>Hi {{name}}, lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do "
+        "eiusmod tempor incididunt ut labore et dolore magna aliqua.<br>Ut enim ad minim veniam.</p>"
+        '<p><a href="https://example.com/articles/story?utm_source=newsletter&amp;utm_medium=email">Read more</a> '
+        '| <a href="https://example.com/share">Share</a></p></td></tr></table>\n'
+    )
+    body = []
+    while sum(len(b) for b in body) < size_kb * 1024:
+        body.append(block)
+    body.append('<p><a href="{{unsubscribe_url}}">Unsubscribe</a></p>')
+    return wrap_transactional_html("".join(body))
+
+
+# --- the pre-scanner implementations, kept here as the reference ---
+
+
+def _regex_rewrite_images(html: str, public_base_url: str) -> str:
+    base = public_base_url.rstrip("/")
+
+    def replace_src(match: re.Match) -> str:
+        quote = match.group(1)
+        url = (match.group(2) or "").strip()
+        if not url or "/t/open" in url:
+            return match.group(0)
+        if url.startswith("/") and "/uploads/" in url:
+            return f"src={quote}{base}{url}{quote}"
+        if ("localhost" in url.lower() or "127.0.0.1" in url) and "/uploads/" in url:
+            path = "/uploads/" + url.split("/uploads/", 1)[-1].split("?")[0].split("#")[0]
+            return f"src={quote}{base}{path}{quote}"
+        return match.group(0)
+
+    return re.sub(r'src=(["\'])([^"\']*?)["\']', replace_src, html, flags=re.IGNORECASE)
+
+
+_HREF_RE = re.compile(r"href\s*=\s*([\"'])(.+?)\1", re.DOTALL | re.IGNORECASE)
+_BODY_OPEN_RE = re.compile(r"(<body[^>]*>)", re.IGNORECASE)
+
+
+def _regex_html_to_plain(html: str) -> str:
+    text = re.sub(r"<br\s*/?>", "\n", html, flags=re.IGNORECASE)
+    text = re.sub(r"</p>", "\n", text, flags=re.IGNORECASE)
+    text = re.sub(r"<[^>]+>", "", text)
+    text = re.sub(r"\n\s*\n", "\n\n", text)
+    return text.strip() or ""
+
+
+def _regex_chain(html: str):
+    html = _regex_rewrite_images(html, _BASE_URL)
+    links = [(m.start(), m.end(), m.group(1), m.group(2)) for m in _HREF_RE.finditer(html)]
+    body = _BODY_OPEN_RE.search(html)
+    return html, links, body.end() if body else None
+
+
+def _scanner(html: str):
+    scan = scan_html(html, _BASE_URL)
+    return scan.html, scan.links, scan.body_open_end
+
+
+def _time(fn, iterations: int):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = fn()
+    return (time.perf_counter() - start) / iterations, result
+
+
+def _compare(label: str, html: str, iterations: int, repeats: int) -> None:
+    # Runs alternate and the fastest of each is kept, so load on the machine hits both sides alike
+    regex_time = scan_time = float("inf")
+    for _ in range(repeats):
+        elapsed, regex_result = _time(lambda: _regex_chain(html), iterations)
+        regex_time = min(regex_time, elapsed)
+        elapsed, scan_result = _time(lambda: _scanner(html), iterations)
+        scan_time = min(scan_time, elapsed)
+    print(
+        f"{label:<12} regex chain: {regex_time * 1e3:8.2f} ms   scanner: {scan_time * 1e3:6.2f} ms   "
+        f"({regex_time / scan_time:.1f}x)   byte-identical: {regex_result == scan_result}"
+    )
+
+
+def _compare_plain(html: str, recipients: int, iterations: int) -> None:
+    build_time, _ = _time(lambda: html_to_plain(html), iterations)
+    print(f"plain text   per variant: html_to_plain {build_time * 1e3:6.2f} ms (once per send)")
+    plan = RenderPlan(html, _BASE_URL, _SECRET, 1, image_base_url=_BASE_URL)
+    plain = CompiledTemplate(plan.plain_text)
+    contexts = [
+        {"name": f"User {i}", "email": f"user{i}@example.com", "id": str(i), "unsubscribe_url": f"{_BASE_URL}/u?s={i}"}
+        for i in range(recipients)
+    ]
+    rendered = [plan.render(context, i) for i, context in enumerate(contexts)]
+    start = time.perf_counter()
+    for body in rendered:
+        _regex_html_to_plain(body)
+    per_email = (time.perf_counter() - start) / recipients
+    start = time.perf_counter()
+    for context in contexts:
+        plain.render(context)
+    per_variant = (time.perf_counter() - start) / recipients
+    print(
+        f"plain text   per recipient: regex over email {per_email * 1e6:8.1f} us   "
+        f"per-variant template {per_variant * 1e6:6.1f} us   ({per_email / per_variant:.0f}x)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--size-kb", type=int, default=100)
+    parser.add_argument("--recipients", type=int, default=500)
+    args = parser.parse_args()
+
+    body = _build_body(args.size_kb)
+    print(f"body: {len(body) / 1024:.1f} KB, iterations: {args.iterations}")
+    _compare("newsletter", body, args.iterations, args.repeats)
+    _compare_plain(body, args.recipients, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
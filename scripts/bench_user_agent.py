@@ -0,0 +1,106 @@
+"""
+Microbenchmark: user-agent classification per tracking event, before and after memoization.
+Replays a corpus of User-Agent headers (one per event) through the uncached classifier and the cached
+parse_user_agent and reports the per-event cost of each, the cost of a cache miss and the cache hit rate.
+
+Without --corpus a built-in sample is used: a few hundred distinct strings from the usual open-tracking sources
+(Gmail/Yahoo image proxies, Apple Mail, Outlook, mobile apps, browsers) replayed with a skewed (Zipf) frequency.
+To replay real traffic, export it first, e.g.
+
+    psql "$DATABASE_URL" -At -c "SELECT u.user_agent FROM tracking_events t JOIN user_agents u ON u.id = t.ua_id ORDER BY t.id DESC LIMIT 200000" > ua.txt
+    python scripts/bench_user_agent.py --corpus ua.txt
+
+    python scripts/bench_user_agent.py [--events 200000] [--corpus FILE]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Allow importing app when run as script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils import user_agent
+from app.utils.user_agent import parse_user_agent, user_agent_cache_stats
+
+_TEMPLATES = [
+    "Mozilla/5.0 (Windows NT 5.1; rv:11.0) Gecko Firefox/11.0 (via ggpht.com GoogleImageProxy)",
+    "YahooMailProxy; https://help.yahoo.com/kb/yahoo-mail-proxy-SLN28749.html",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_{minor}) AppleWebKit/605.1.15 (KHTML, like Gecko)",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS {major}_{minor} like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148",
+    "Mozilla/5.0 (iPad; CPU OS {major}_{minor} like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148",
+    "Microsoft Office/16.0 (Windows NT 10.0; Microsoft Outlook 16.0.{build}; Pro)",
+    "Mozilla/4.0 (compatible; ms-office; MSOffice 16)",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{major}.0.0.0 Safari/537.36 Edg/{major}.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{major}.0.{build}.{minor} Safari/537.36",
+    "Mozilla/5.0 (Linux; Android {minor}; SM-S{build}B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{major}.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android {minor}; Pixel {minor}) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/{major}.0.0.0 Mobile Safari/537.36 GoogleMail",
+    "Mozilla/5.0 (Linux; Android {minor}; SAMSUNG SM-G{build}) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/{major}.0 Chrome/{major}.0 Mobile Safari/537.36 SamsungEmail/6.1",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:{major}.0) Gecko/20100101 Thunderbird/{major}.{minor}.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_{minor}) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.{minor} Safari/605.1.15",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:{major}.0) Gecko/20100101 Firefox/{major}.0",
+    "Mozilla/5.0 (compatible; ProtonMail image proxy)",
+    "AOL/{major}.0 (Windows NT 10.0)",
+]
+
+
+def _builtin_corpus(events: int, distinct: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    uas = []
+    seen = set()
+    while len(uas) < distinct:
+        ua = rng.choice(_TEMPLATES).format(
+            major=rng.randint(100, 131), minor=rng.randint(0, 9), build=rng.randint(1000, 18000)
+        )
+        if ua not in seen:
+            seen.add(ua)
+            uas.append(ua)
+    # A few senders dominate (the proxies, current Apple Mail/Outlook builds), with a long tail
+    weights = [1.0 / (rank + 1) for rank in range(len(uas))]
+    return rng.choices(uas, weights=weights, k=events)
+
+
+def _uncached(ua: Optional[str]) -> Tuple[str, str, str]:
+    """parse_user_agent without the cache (what every event paid before)."""
+    if not ua or not ua.strip():
+        return "Other", "desktop", "desktop"
+    return user_agent._classify(ua)
+
+
+def _time(fn, corpus: List[str]) -> float:
+    start = time.perf_counter()
+    for ua in corpus:
+        fn(ua)
+    return (time.perf_counter() - start) / len(corpus)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200_000, help="Events replayed from the built-in sample")
+    parser.add_argument("--distinct", type=int, default=300, help="Distinct strings in the built-in sample")
+    parser.add_argument("--corpus", help="File with one User-Agent per line (one line per event)")
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = Path(args.corpus).read_text(encoding="utf-8", errors="replace").splitlines()
+    else:
+        corpus = _builtin_corpus(args.events, args.distinct)
+    print(f"events: {len(corpus)}, distinct user agents: {len(set(corpus))}")
+
+    distinct = list(set(corpus))
+    user_agent._classify_cached.cache_clear()
+    miss = _time(parse_user_agent, distinct)  # every lookup a miss: classification plus cache insert
+    user_agent._classify_cached.cache_clear()
+    before = _time(_uncached, corpus)
+    cached = _time(parse_user_agent, corpus)
+    stats = user_agent_cache_stats()
+    print(f"uncached (before):        {before * 1e9:7.0f} ns/event")
+    print(f"cached parse_user_agent:  {cached * 1e9:7.0f} ns/event   ({before / cached:.1f}x)")
+    print(f"cache miss:               {miss * 1e9:7.0f} ns/event")
+    print(f"cache: hit rate {stats['hit_rate']:.2%}, {stats['size']} entries of {stats['max_size']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Campaign send worker: polls for queued send jobs and sends their work units outside the web tier.
+
+    python scripts/campaign_send_worker.py [--poll-seconds 5] [--once]
+
+Run as many of these as needed, on one or several hosts; POST /api/campaigns/{id}/send only queues the job.
+Each send is split into units of CAMPAIGN_SEND_UNIT_SIZE recipients and every unit is claimed by exactly one worker.
+"""
+import argparse
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+
+# Allow importing app when run as script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from loguru import logger
+
+from app.database import SessionLocal
+from app.services.campaign_service import process_campaign_send_queue
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--poll-seconds", type=float, default=5.0)
+    parser.add_argument("--once", action="store_true", help="Process the queue once and exit")
+    args = parser.parse_args()
+
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("Campaign send worker {} started", worker)
+    while True:
+        db = SessionLocal()
+        try:
+            processed = process_campaign_send_queue(db, worker=worker, max_units=1)
+        except Exception as e:
+            logger.exception("Campaign send unit failed: {}", e)
+            processed = 0
+        finally:
+            db.close()
+        if args.once and not processed:
+            return
+        if not processed:
+            time.sleep(args.poll_seconds)
+
+
+if __name__ == "__main__":
+    main()
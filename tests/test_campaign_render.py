@@ -0,0 +1,110 @@
+"""
+RenderPlan output against the per-recipient path it replaced: personalize the HTML, rewrite local image URLs, then
+inject_tracking_html. Without a link registry the two must agree byte for byte.
+"""
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.campaign_render import RenderPlan
+from app.services.email_template import wrap_transactional_html
+from app.services.template_engine import subscriber_context
+from app.services.tracking_utils import build_unsubscribe_url, inject_tracking_html, parse_click_token
+
+BASE_URL = "https://t.example.com"
+SECRET = "test-secret"
+CAMPAIGN_ID = 42
+
+
+def _old_personalize(text, subscriber, unsubscribe_url):
+    return (
+        text.replace("{{name}}", subscriber.name or "")
+        .replace("{{email}}", subscriber.email or "")
+        .replace("{{id}}", str(subscriber.id))
+        .replace("{{unsubscribe_url}}", unsubscribe_url)
+    )
+
+
+def _old_rewrite_image_urls(html, base):
+    def replace_src(match):
+        quote = match.group(1)
+        url = (match.group(2) or "").strip()
+        if not url or "/t/open" in url:
+            return match.group(0)
+        if url.startswith("/") and "/uploads/" in url:
+            return f"src={quote}{base}{url}{quote}"
+        if ("localhost" in url.lower() or "127.0.0.1" in url) and "/uploads/" in url:
+            path = "/uploads/" + url.split("/uploads/", 1)[-1].split("?")[0].split("#")[0]
+            return f"src={quote}{base}{path}{quote}"
+        return match.group(0)
+
+    return re.sub(r'src=(["\'])([^"\']*?)["\']', replace_src, html, flags=re.IGNORECASE)
+
+
+def _old_render(html, subscriber):
+    unsubscribe_url = build_unsubscribe_url(BASE_URL, SECRET, subscriber.id)
+    out = _old_personalize(html, subscriber, unsubscribe_url)
+    out = _old_rewrite_image_urls(out, BASE_URL)
+    return inject_tracking_html(out, BASE_URL, SECRET, CAMPAIGN_ID, subscriber.id)
+
+
+def _new_render(plan, subscriber):
+    unsubscribe_url = build_unsubscribe_url(BASE_URL, SECRET, subscriber.id)
+    return plan.render(subscriber_context(subscriber, unsubscribe_url=unsubscribe_url), subscriber.id)
+
+
+SUBSCRIBERS = [
+    SimpleNamespace(id=7, email="ada@example.com", name="Ada"),
+    SimpleNamespace(id=123456, email="bob+news@example.org", name=""),
+]
+
+DOCUMENTS = {
+    "body_tag": (
+        '<html><body class="x"><p>Hi {{name}},</p><a href="https://example.com/a?x=1&amp;y=2">Read</a>'
+        '<img src="/uploads/banner.png"><a href="mailto:hi@example.com">Mail</a></body></html>'
+    ),
+    "no_body_tag": '<p>Hello {{email}}</p><a href=\'https://example.com/b\'>B</a><a href="#top">Top</a>',
+    "closing_body_only": '<div><a href = "https://example.com/c">C</a></div></BODY>',
+    "unsubscribe_and_tracking_links": (
+        '<a href="{{unsubscribe_url}}">Unsubscribe</a><a href="https://t.example.com/already">Ours</a>'
+        '<img src="http://localhost:8000/uploads/logo.png?v=2">'
+    ),
+    "placeholder_in_href": '<a href="https://example.com/u/{{id}}?e={{email}}">Profile</a><p>{{id}}</p>',
+    "wrapped": wrap_transactional_html('<p>Hi {{name}}</p><a href="https://example.com/d">D</a>'),
+}
+
+
+@pytest.mark.parametrize("name", sorted(DOCUMENTS))
+def test_render_plan_matches_the_old_per_recipient_path(name):
+    html = DOCUMENTS[name]
+    plan = RenderPlan(html, BASE_URL, SECRET, CAMPAIGN_ID, image_base_url=BASE_URL)
+    for subscriber in SUBSCRIBERS:
+        assert _new_render(plan, subscriber) == _old_render(html, subscriber)
+
+
+def test_render_plan_without_tracking_only_personalizes():
+    plan = RenderPlan('<p>Hi {{name}}</p><a href="https://example.com/a">A</a>', "", SECRET, CAMPAIGN_ID)
+    assert plan.render({"name": "Ada"}, 7) == '<p>Hi Ada</p><a href="https://example.com/a">A</a>'
+
+
+def test_registered_links_get_tokens_bound_to_their_link():
+    links = {}
+    html = '<a href="https://example.com/a">A</a><a href="https://example.com/b">B</a>'
+    plan = RenderPlan(html, BASE_URL, SECRET, CAMPAIGN_ID, link_id=lambda url: links.setdefault(url, len(links) + 1))
+    out = plan.render({"name": "Ada"}, 7)
+
+    tokens = re.findall(r"/t/click\?t=([\w-]+)", out)
+    assert [parse_click_token(SECRET, token) for token in tokens] == [(CAMPAIGN_ID, 7, 1), (CAMPAIGN_ID, 7, 2)]
+    assert parse_click_token("other-secret", tokens[0]) is None
+
+
+def test_plain_text_keeps_placeholders_and_link_destinations():
+    plan = RenderPlan(
+        '<html><head><title>T</title></head><body><p>Hi {{name}}</p><a href="https://example.com/a">Read more</a>'
+        "<ul><li>One</li><li>Two</li></ul></body></html>",
+        BASE_URL,
+        SECRET,
+        CAMPAIGN_ID,
+    )
+    assert plan.plain_text == "Hi {{name}}\nRead more (https://example.com/a)\n\n- One\n- Two"
@@ -0,0 +1,100 @@
+"""
+Campaign send worker error handling and the send preflight. Needs a scratch Postgres database (its tables are created and dropped):
+
+    TEST_DATABASE_URL=postgresql://localhost/email_auto_agent_test python -m pytest tests
+"""
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+@pytest.fixture
+def db():
+    import app.models  # noqa: F401  (registers every table on Base.metadata)
+    from app.database import Base
+
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+def test_unit_whose_renderer_raises_fails_the_send(db, monkeypatch):
+    from app.config import get_settings
+    from app.models.campaign import Campaign, CampaignSend, CampaignSendUnit, CampaignStatus
+    from app.models.subscriber import Subscriber, SubscriberStatus
+    from app.services import campaign_service
+
+    settings = get_settings()
+    monkeypatch.setattr(settings, "campaign_send_max_attempts", 2)
+    monkeypatch.setattr(settings, "campaign_render_processes", 0)
+
+    def broken_render(*args, **kwargs):
+        raise RuntimeError("renderer exploded")
+
+    monkeypatch.setattr(campaign_service, "_build_email_payload", broken_render)
+
+    campaign = Campaign(name="Broken", subject="Hi", html_body="<p>Hi</p>", status=CampaignStatus.draft)
+    db.add(campaign)
+    db.add_all([Subscriber(email=f"user{i}@example.com", status=SubscriberStatus.active) for i in range(3)])
+    db.commit()
+    send, err = campaign_service.enqueue_campaign_send(db, campaign, None)
+    assert err == ""
+    assert send.total_count is None  # counted by the worker, not in the request
+    send_id, campaign_id = send.id, campaign.id
+
+    # First attempt puts the unit back to pending, the second hits the cap; then there is nothing left to claim
+    processed = [campaign_service.process_campaign_send_queue(db, worker="test", max_units=1) for _ in range(3)]
+    assert processed == [1, 1, 0]
+
+    db.expire_all()
+    unit = db.query(CampaignSendUnit).filter(CampaignSendUnit.send_id == send_id).one()
+    assert unit.status == "failed"
+    assert unit.attempts == 2
+    assert "renderer exploded" in unit.error_message
+
+    send = db.query(CampaignSend).filter(CampaignSend.id == send_id).one()
+    assert send.total_count == 3
+    assert send.status == "failed"
+    assert "renderer exploded" in send.error_message
+    assert send.finished_at is not None
+    # Nothing went out, so the campaign is a draft again
+    assert db.query(Campaign).filter(Campaign.id == campaign_id).one().status == CampaignStatus.draft
+
+
+def test_preflight_counts_blank_emails_apart_from_suppressed(db):
+    from app.models.campaign import Campaign, CampaignStatus
+    from app.models.subscriber import Subscriber, SubscriberStatus
+    from app.models.suppression import SuppressionEntry, SuppressionType
+    from app.services import campaign_service
+
+    campaign = Campaign(name="Preflight", subject="Hi", html_body="<p>Hi</p>", status=CampaignStatus.draft)
+    db.add(campaign)
+    db.add_all(
+        [
+            Subscriber(email=email, status=SubscriberStatus.active)
+            for email in ["ok@example.com", "Blocked@Example.com ", "someone@blocked.test", "", "   "]
+        ]
+    )
+    db.add_all(
+        [
+            SuppressionEntry(type=SuppressionType.email, value="blocked@example.com"),
+            SuppressionEntry(type=SuppressionType.domain, value="blocked.test"),
+        ]
+    )
+    db.commit()
+
+    result = campaign_service.preflight_campaign_send(db, campaign, None)
+    assert result == {"audience": 5, "invalid": 2, "suppressed": 2, "recipients": 1}
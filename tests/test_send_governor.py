@@ -0,0 +1,139 @@
+"""
+SendGovernor: transactional reserve, weighted fair queuing between lanes, AIMD backoff and the daily quota.
+A governor on a hand-driven clock makes admissions deterministic.
+"""
+import threading
+import time
+
+import pytest
+
+from app.services.send_governor import BULK, TRANSACTIONAL, SendGovernor
+
+
+class _ClockGovernor(SendGovernor):
+    def __init__(self, *args, **kwargs):
+        self.clock = 0.0
+        super().__init__(*args, **kwargs)
+        self._updated = 0.0
+
+    def _now(self) -> float:
+        return self.clock
+
+    def advance(self, seconds: float) -> None:
+        with self._cond:
+            self.clock += seconds
+            self._cond.notify_all()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.005)
+
+
+def _admit_now(governor, lane):
+    """Seconds a lone request in this lane would wait (0 = admitted, taking a token)."""
+    ticket = (0.0, 0, lane)
+    governor._waiting.append(ticket)
+    try:
+        return governor._admit(ticket)
+    finally:
+        governor._waiting.remove(ticket)
+
+
+def test_bulk_cannot_take_the_transactional_reserve():
+    governor = _ClockGovernor(1.0, reserved_tokens=1)  # starts with 1 + reserve tokens
+
+    assert _admit_now(governor, BULK) == 0
+    # One token left: that is the reserve, so bulk waits for a second one while transactional goes at once
+    assert _admit_now(governor, BULK) == pytest.approx(1.0)
+    assert _admit_now(governor, TRANSACTIONAL) == 0
+    assert _admit_now(governor, TRANSACTIONAL) == pytest.approx(1.0)
+
+
+def test_lanes_share_tokens_by_weight_while_both_are_backlogged():
+    governor = _ClockGovernor(1.0, weights={TRANSACTIONAL: 4.0, BULK: 1.0})
+    governor.acquire(BULK)  # use the initial token
+    admitted = []
+    lock = threading.Lock()
+
+    def request(lane):
+        governor.acquire(lane)
+        with lock:
+            admitted.append(lane)
+
+    threads = [threading.Thread(target=request, args=(TRANSACTIONAL,)) for _ in range(8)]
+    threads += [threading.Thread(target=request, args=(BULK,)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: len(governor._waiting) == len(threads))
+
+    # One token per step, so exactly one request is admitted each time
+    for step in range(1, len(threads) + 1):
+        governor.advance(1.0)
+        _wait_for(lambda: len(admitted) == step)
+    for thread in threads:
+        thread.join()
+
+    assert admitted[:5].count(TRANSACTIONAL) == 4
+    assert admitted[5:].count(TRANSACTIONAL) == 4
+
+
+def test_rate_halves_on_429_and_recovers_on_successes():
+    governor = _ClockGovernor(10.0)
+    governor.on_rate_limited(2.0)
+
+    assert governor.rate == 5.0
+    assert _admit_now(governor, BULK) == pytest.approx(2.0)  # paused for Retry-After
+    governor.on_rate_limited(0.0)
+    assert governor.rate == 2.5
+
+    for _ in range(14):
+        governor.on_success()
+    assert governor.rate == pytest.approx(9.5)
+    governor.on_success()
+    governor.on_success()
+    assert governor.rate == 10.0  # never above the configured maximum
+
+
+def test_rate_never_backs_off_below_the_floor():
+    governor = _ClockGovernor(1.0)
+    for _ in range(20):
+        governor.on_rate_limited(0.0)
+    assert governor.rate == SendGovernor._MIN_RATE
+
+
+def test_unpaced_governor_admits_at_once():
+    governor = SendGovernor(0)
+    for _ in range(100):
+        governor.acquire(BULK)
+
+
+def test_daily_quota_keeps_a_share_for_transactional_mail():
+    governor = SendGovernor(0, messages_per_day=100, reserved_daily=10)
+
+    assert governor.reserve_messages(90, BULK)
+    assert not governor.reserve_messages(1, BULK)
+    assert governor.quota_exhausted(BULK)
+    assert not governor.quota_exhausted(TRANSACTIONAL)
+    assert governor.reserve_messages(10, TRANSACTIONAL)
+    assert not governor.reserve_messages(1, TRANSACTIONAL)
+    assert governor.quota_exhausted(TRANSACTIONAL)
+
+
+def test_released_messages_are_given_back():
+    governor = SendGovernor(0, messages_per_day=10)
+
+    assert governor.reserve_messages(10, TRANSACTIONAL)
+    governor.release_messages(4)
+    assert governor.reserve_messages(4, TRANSACTIONAL)
+
+
+def test_provider_quota_error_stops_every_lane():
+    governor = SendGovernor(0)
+    governor.on_quota_exceeded()
+
+    assert governor.quota_exhausted(TRANSACTIONAL)
+    assert not governor.reserve_messages(1, TRANSACTIONAL)
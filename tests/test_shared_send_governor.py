@@ -0,0 +1,78 @@
+"""
+SharedSendGovernor: two instances stand for two processes (the API and a campaign send worker) on one Resend account.
+Needs a scratch Postgres database (its tables are created and dropped):
+
+    TEST_DATABASE_URL=postgresql://localhost/email_auto_agent_test python -m pytest tests
+"""
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.services.send_governor import BULK, TRANSACTIONAL
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    import app.models  # noqa: F401  (registers every table on Base.metadata)
+    from app.database import Base
+    from app.services import shared_send_governor
+
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    monkeypatch.setattr(shared_send_governor, "SessionLocal", factory)
+    try:
+        yield factory
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+def _governor(**kwargs):
+    from app.services.shared_send_governor import SharedSendGovernor
+
+    limits = dict(requests_per_second=0, messages_per_day=100, reserved_daily=10)
+    limits.update(kwargs)
+    return SharedSendGovernor("resend", **limits)
+
+
+def test_daily_quota_is_shared_between_processes(session_factory):
+    api, worker = _governor(), _governor()
+
+    assert worker.reserve_messages(60, BULK)
+    assert api.reserve_messages(5, TRANSACTIONAL)
+    # 65 used: the worker's bulk share (90) has 25 left, not 30 of its own
+    assert not worker.reserve_messages(30, BULK)
+    assert worker.quota_exhausted(BULK)
+    assert not api.quota_exhausted(TRANSACTIONAL)
+    # The transactional reserve is still there for the API
+    assert api.reserve_messages(10, TRANSACTIONAL)
+    api.release_messages(10)
+    assert api.reserve_messages(35, TRANSACTIONAL)
+    assert not api.reserve_messages(1, TRANSACTIONAL)
+    assert worker.quota_exhausted(TRANSACTIONAL)
+
+
+def test_rate_limit_pause_and_backoff_are_shared(session_factory):
+    from app.models.send_governor import SendGovernorState
+
+    api, worker = _governor(requests_per_second=10), _governor(requests_per_second=10)
+    worker.acquire(BULK)
+    worker.on_rate_limited(30)
+
+    db = session_factory()
+    try:
+        state = db.query(SendGovernorState).filter(SendGovernorState.name == "resend").one()
+        assert state.rate == 5
+        assert state.paused_until is not None
+    finally:
+        db.close()
+    # The API process sees the pause too: its next admission would have to wait
+    assert api._admit((1.0, 1, TRANSACTIONAL)) > 20
@@ -0,0 +1,52 @@
+"""Compiled personalization templates: placeholders, custom fields and defaults."""
+from types import SimpleNamespace
+
+from app.services.template_engine import compile_template, parse_segments, render_for_subscriber
+
+CONTEXT = {"name": "Ada", "email": "ada@example.com", "id": "7", "unsubscribe_url": "https://t.example.com/u"}
+
+
+def _render(source, context=CONTEXT, custom_fields=None):
+    return compile_template(source).render(context, custom_fields)
+
+
+def test_standard_placeholders():
+    assert _render("Hi {{name}} <{{email}}> #{{id}} {{unsubscribe_url}}") == (
+        "Hi Ada <ada@example.com> #7 https://t.example.com/u"
+    )
+
+
+def test_repeated_placeholder_and_whitespace_inside_braces():
+    assert _render("{{name}}, {{ name }}!") == "Ada, Ada!"
+
+
+def test_default_used_when_value_missing_or_empty():
+    assert _render("Hi {{name|there}}", {"name": ""}) == "Hi there"
+    assert _render("Hi {{name|there}}", {}) == "Hi there"
+    assert _render("Hi {{name| friend }}", {"name": "Ada"}) == "Hi Ada"
+    assert _render("Hi {{name| friend }}", {"name": None}) == "Hi friend"
+
+
+def test_custom_fields():
+    fields = {"city": "Lagos", "plan": 3, "empty": ""}
+    assert _render("{{custom.city}} / {{custom.plan}}", custom_fields=fields) == "Lagos / 3"
+    assert _render("[{{custom.missing}}]", custom_fields=fields) == "[]"
+    assert _render("[{{custom.empty|n/a}}]", custom_fields=fields) == "[n/a]"
+    assert _render("[{{custom.city}}]", custom_fields=None) == "[]"
+
+
+def test_unknown_placeholder_is_left_as_written_and_known_empty_one_removed():
+    assert _render("{{company}} {{name}}", {"name": ""}) == "{{company}} "
+    assert _render("{{company|Acme}}", {}) == "Acme"
+
+
+def test_text_without_placeholders_is_returned_as_is():
+    source = "No {placeholders} here {{ }}"
+    assert _render(source) == source
+    assert parse_segments(source) == [source]
+
+
+def test_render_for_subscriber_reads_custom_fields_from_the_subscriber():
+    subscriber = SimpleNamespace(id=7, email="ada@example.com", name=None, custom_fields={"city": "Lagos"})
+    assert render_for_subscriber("{{name|there}} in {{custom.city}} ({{id}})", subscriber) == "there in Lagos (7)"
+    assert render_for_subscriber("", subscriber) == ""
@@ -0,0 +1,93 @@
+"""
+Tracking buffer flush failures: rows the database rejects are dropped one by one, transient errors keep the batch.
+The database write is replaced by a recorder, so these run without Postgres.
+"""
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.services.tracking_buffer import TrackingBuffer
+
+
+class _Writer:
+    """Stands in for TrackingBuffer._write: rejects rows of deleted campaigns, optionally fails like a dropped connection."""
+
+    def __init__(self, missing_campaigns=(), down=False):
+        self.missing_campaigns = set(missing_campaigns)
+        self.down = down
+        self.written = []
+        self.calls = []
+
+    def __call__(self, rows):
+        self.calls.append(len(rows))
+        if self.down:
+            raise OperationalError("INSERT", {}, Exception("connection refused"))
+        if any(row["campaign_id"] in self.missing_campaigns for row in rows):
+            raise IntegrityError("INSERT", {}, Exception("violates foreign key constraint"))
+        self.written.extend(rows)
+
+
+@pytest.fixture
+def buffer():
+    return TrackingBuffer(max_size=100, flush_interval_ms=1000, flush_batch=4, overflow="inline")
+
+
+def _queue(buffer, campaign_ids):
+    for campaign_id in campaign_ids:
+        buffer._queue.put_nowait(buffer._row(campaign_id, 1, "open", None, None))
+
+
+def test_rejected_row_is_dropped_and_the_rest_of_its_batch_written(buffer, monkeypatch):
+    writer = _Writer(missing_campaigns={7})
+    monkeypatch.setattr(buffer, "_write", writer)
+    _queue(buffer, [1, 2, 7, 3, 4, 5])
+
+    buffer._flush()
+
+    assert [row["campaign_id"] for row in writer.written] == [1, 2, 3, 4, 5]
+    # The batch with the bad row is retried one row at a time; the next batch goes in one INSERT again
+    assert writer.calls == [4, 1, 1, 1, 1, 2]
+    assert buffer.rejected == 1
+    assert buffer.dropped == 0
+    assert buffer.stats()["retrying"] == 0
+
+
+def test_rejected_rows_do_not_block_later_flushes(buffer, monkeypatch):
+    writer = _Writer(missing_campaigns={7})
+    monkeypatch.setattr(buffer, "_write", writer)
+    _queue(buffer, [7, 7])
+    buffer._flush()
+    _queue(buffer, [1, 2])
+    buffer._flush()
+
+    assert [row["campaign_id"] for row in writer.written] == [1, 2]
+    assert writer.calls == [2, 1, 1, 2]
+    assert buffer.rejected == 2
+
+
+def test_transient_failure_keeps_the_rows_for_the_next_flush(buffer, monkeypatch):
+    writer = _Writer(down=True)
+    monkeypatch.setattr(buffer, "_write", writer)
+    _queue(buffer, [1, 2, 3, 4, 5])
+    buffer._flush()
+
+    assert writer.written == []
+    assert buffer.stats()["retrying"] == 5
+    assert buffer.rejected == 0
+
+    writer.down = False
+    buffer._flush()
+
+    assert [row["campaign_id"] for row in writer.written] == [1, 2, 3, 4, 5]
+    assert buffer.stats()["retrying"] == 0
+    assert buffer.dropped == 0
+
+
+def test_transient_failure_keeps_at_most_the_buffer_size(monkeypatch):
+    buffer = TrackingBuffer(max_size=3, flush_interval_ms=1000, flush_batch=10, overflow="inline")
+    monkeypatch.setattr(buffer, "_write", _Writer(down=True))
+    buffer._retry = [buffer._row(campaign_id, 1, "open", None, None) for campaign_id in range(5)]
+
+    buffer._flush()
+
+    assert [row["campaign_id"] for row in buffer._retry] == [2, 3, 4]
+    assert buffer.dropped == 2